@@ -1,12 +1,42 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, send_file, redirect, Response, g
+import io
 import os
+import re
+import gzip
+import base64
+import hashlib
+import itertools
+import time
+import atexit
+import argparse
 import json
 import subprocess
+import tempfile
 from pathlib import Path
 from datetime import datetime
 from werkzeug.utils import secure_filename
 import pymysql
 
+from chunked_upload import UploadStore, UploadError, verify_image_file
+from click_ingest import ClickIngestor, ClickIngestError
+from find_stats import FindStatsStore, MIN_CALIBRATION_PLAYS
+from scoring import score_play, final_result, difference_points, ScoreError, TIME_LIMIT, MAX_HINTS, HINT_PENALTY
+from game_sessions import create_session_store, SessionError
+from leaderboard import Leaderboard
+from answer_cache import AnswerCache
+from db_pool import ConnectionPool
+from change_feed import ChangeFeed
+from generation_jobs import JobStore, JobError
+from pregen_pool import PregenPool
+from generator.difference_mask import MaskHitTester
+from generator.delta_asset import manifest_name, reconstruct
+from generator.asset_publish import create_staging, publish_version, is_hashed_name, write_json_atomic, file_lock
+from generator.puzzle_store import ScanIndex, puzzle_path, relative_path
+from generator.asset_storage import get_storage, sync_puzzle, fetch_puzzle
+from generator import profiling
+from generator.progress import append_event
+from generator.variants import variant_ids, split_variant_id
+
 app = Flask(__name__, static_folder='.', static_url_path='')
 
 BASE_DIR = Path(__file__).parent.absolute()
@@ -17,8 +47,30 @@ if (BASE_DIR / "public" / "puzzles").exists():
 else:
     PUZZLES_DIR = BASE_DIR / "puzzles"
 MANIFEST_PATH = PUZZLES_DIR / "manifest.json"
+ANALYTICS_DIR = BASE_DIR / "analytics"
+
+def puzzle_folder(puzzle_id):
+    """퍼즐 폴더 (PUZZLE_LAYOUT=sharded면 puzzles/<해시 2자리>/<ID>)"""
+    return puzzle_path(PUZZLES_DIR, puzzle_id)
+
+def asset_key(puzzle_id, filename):
+    """에셋 저장소 key (puzzles 폴더 기준 상대 경로)"""
+    return f"{puzzle_folder(puzzle_id).relative_to(PUZZLES_DIR).as_posix()}/{filename}"
+
+# 퍼즐 에셋 저장소 (ASSET_STORAGE=s3면 이미지 요청을 버킷 URL로 리다이렉트)
+asset_storage = get_storage(PUZZLES_DIR)
+
+# 퍼즐 폴더 / 업로드 원본 위치 인덱스 (요청마다 폴더를 glob 하지 않도록)
+scan_index = ScanIndex(PUZZLES_DIR)
 
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+upload_store = UploadStore(UPLOAD_FOLDER / ".uploads")
+
+# 생성 작업 진행 이벤트 (GET /jobs/<id>/events 로 구독)
+generation_jobs = JobStore(ANALYTICS_DIR / "jobs")
+
+# 미리 생성해 둔 퍼즐 후보 (PREGEN_POOL=1, 같은 원본이면 생성기를 기다리지 않고 바로 발행)
+pregen_pool = PregenPool(UPLOAD_FOLDER, UPLOAD_FOLDER / ".pool", PUZZLES_DIR)
 
 # Database Profile
 try:
@@ -35,32 +87,227 @@ except ImportError:
         "cursorclass": pymysql.cursors.DictCursor
     }
 
+# 프로세스별 연결 풀 (conn.close()는 풀 반납)
+db_pool = ConnectionPool(lambda: pymysql.connect(**DB_CONFIG))
+
 def get_db_connection():
-    return pymysql.connect(**DB_CONFIG)
+    return db_pool.connect()
+
+# 요청 프로파일링 (PROFILE=1 또는 --profile). 꺼져 있으면 플래그만 확인
+# 생성 작업은 생성기 서브프로세스가 같은 환경변수를 물려받아 따로 프로파일합니다.
+@app.before_request
+def start_request_profile():
+    if profiling.PROFILE:
+        g.request_profile = profiling.profiled(f"request-{request.endpoint}")
+        g.request_profile.__enter__()
+
+@app.teardown_request
+def finish_request_profile(exc):
+    request_profile = g.pop('request_profile', None)
+    if request_profile is not None:
+        request_profile.__exit__(None, None, None)
+
+# 퍼즐 변경 기록 (GET /changes 로 구독)
+change_feed = ChangeFeed(get_db_connection)
+
+version_column_ready = False
+
+def ensure_version_column(cursor):
+    """발행된 버전 ID 컬럼이 없으면 추가 (프로세스당 한 번 확인)"""
+    global version_column_ready
+    if version_column_ready:
+        return
+    cursor.execute("SHOW COLUMNS FROM puzzles LIKE 'version'")
+    if not cursor.fetchall():
+        cursor.execute("ALTER TABLE puzzles ADD COLUMN version VARCHAR(32) DEFAULT NULL")
+    version_column_ready = True
 
 def sync_db_to_manifest():
     try:
         conn = get_db_connection()
         with conn.cursor() as cursor:
-            cursor.execute("SELECT id, created_at, recommended, differences, status FROM puzzles ORDER BY id")
+            ensure_version_column(cursor)
+            cursor.execute("SELECT id, created_at, recommended, differences, status, version FROM puzzles ORDER BY id")
             db_puzzles = cursor.fetchall()
+            change_seq = change_feed.current_seq(cursor)
             
             # Format dates for JSON
             for p in db_puzzles:
                 if p['created_at']:
                     p['created_at'] = p['created_at'].isoformat()
+                p['path'] = f"puzzles/{relative_path(p['id'])}"
+                base_puzzle, variant = split_variant_id(p['id'])
+                if variant:
+                    p['variant'], p['base_puzzle'] = variant, base_puzzle
             
             manifest_data = {
                 "puzzles": db_puzzles,
+                # 이 manifest에 반영된 마지막 변경 - 이후 변경은 GET /changes?since=change_seq
+                "change_seq": change_seq,
                 "generated_at": datetime.now().isoformat()
             }
             
-            with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
-                json.dump(manifest_data, f, indent=2, ensure_ascii=False)
+            # 여러 워커/생성기/감시 데몬이 동시에 쓰지 않도록 잠그고 통째로 교체
+            with file_lock(MANIFEST_PATH):
+                write_json_atomic(MANIFEST_PATH, manifest_data)
+            asset_storage.put_file("manifest.json", MANIFEST_PATH)
         conn.close()
     except Exception as e:
         print(f"Error syncing DB to manifest: {e}")
 
+# ============================================================
+# 퍼즐 목록 API (커서 페이지네이션 + 필터)
+#   GET /puzzles?limit=50&cursor=...&status=ready&recommended=1&created_from=...&created_to=...&order=asc|desc
+# ============================================================
+
+PUZZLE_PAGE_SIZE = 50
+MAX_PUZZLE_PAGE_SIZE = 500
+# 이 크기 이상인 응답만 gzip 압축
+GZIP_MIN_BYTES = 1024
+PUZZLE_INDEXES = {
+    "idx_puzzles_status_id": "(status, id)",
+    "idx_puzzles_recommended_id": "(recommended, id)",
+    "idx_puzzles_created_id": "(created_at, id)",
+}
+puzzle_indexes_ready = False
+
+def ensure_puzzle_indexes(cursor):
+    """목록 필터용 인덱스가 없으면 생성 (프로세스당 한 번 확인)"""
+    global puzzle_indexes_ready
+    if puzzle_indexes_ready:
+        return
+    cursor.execute("SHOW INDEX FROM puzzles")
+    existing = {row['Key_name'] for row in cursor.fetchall()}
+    for name, columns in PUZZLE_INDEXES.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE puzzles ADD INDEX {name} {columns}")
+    puzzle_indexes_ready = True
+
+def cached_json_response(payload, max_age=0):
+    """강한 ETag(본문 해시) + If-None-Match 304 + gzip 압축 JSON 응답"""
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+    return json_bytes_response(body, hashlib.sha256(body).hexdigest()[:32], max_age=max_age)
+
+def json_bytes_response(body, etag, gzipped=None, max_age=0):
+    """이미 직렬화된 JSON 본문 응답 (gzipped를 넘기면 압축을 다시 하지 않음)"""
+    use_gzip = len(body) >= GZIP_MIN_BYTES and 'gzip' in request.headers.get('Accept-Encoding', '')
+    # 인코딩이 다르면 바이트가 다르므로 강한 ETag도 구분
+    etag = f'"{etag}-gz"' if use_gzip else f'"{etag}"'
+    headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": f"max-age={max_age}, must-revalidate"}
+    if etag in [t.strip() for t in request.headers.get('If-None-Match', '').split(',')]:
+        return Response(status=304, headers=headers)
+    if use_gzip:
+        body = gzipped or gzip.compress(body, compresslevel=6)
+        headers["Content-Encoding"] = "gzip"
+    return Response(body, mimetype='application/json', headers=headers)
+
+def encode_cursor(puzzle_id):
+    return base64.urlsafe_b64encode(puzzle_id.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    return base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+
+@app.route('/puzzles', methods=['GET'])
+def list_puzzles():
+    args = request.args
+    limit = min(max(args.get('limit', PUZZLE_PAGE_SIZE, type=int), 1), MAX_PUZZLE_PAGE_SIZE)
+    descending = args.get('order', 'asc') == 'desc'
+    where, params = [], []
+    try:
+        if args.get('cursor'):
+            where.append("id < %s" if descending else "id > %s")
+            params.append(decode_cursor(args['cursor']))
+        if args.get('status'):
+            where.append("status = %s")
+            params.append(args['status'])
+        if args.get('recommended') is not None:
+            where.append("recommended = %s")
+            params.append(args.get('recommended') in ('1', 'true'))
+        for key, op in (('created_from', '>='), ('created_to', '<')):
+            if args.get(key):
+                where.append(f"created_at {op} %s")
+                params.append(datetime.fromisoformat(args[key]))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid filter: {e}"}), 400
+
+    sql = "SELECT id, created_at, recommended, differences, status, version FROM puzzles"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY id {'DESC' if descending else 'ASC'} LIMIT %s"
+    try:
+        conn = get_db_connection()
+        with conn.cursor() as cursor:
+            ensure_puzzle_indexes(cursor)
+            ensure_version_column(cursor)
+            cursor.execute(sql, (*params, limit + 1))
+            rows = cursor.fetchall()
+        conn.close()
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    for p in rows:
+        if p['created_at']:
+            p['created_at'] = p['created_at'].isoformat()
+        p['recommended'] = bool(p['recommended'])
+    return cached_json_response({
+        "puzzles": rows,
+        "next_cursor": encode_cursor(rows[-1]['id']) if has_more else None,
+    })
+
+# 해시 파일명(original.3fa2c1d94b7e.jpg, answer.<버전>.json)은 내용이 바뀌지 않으므로 1년 캐시
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@app.after_request
+def immutable_asset_headers(response):
+    parts = request.path.strip('/').split('/')
+    if (response.status_code == 200 and len(parts) >= 3 and parts[-3] == 'puzzles'
+            and is_hashed_name(parts[-1])):
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+# ============================================================
+# 정답 데이터 캐시 (DB data 컬럼, 없으면 answer.json)
+#   GET /puzzles/<puzzle_id>/answer   캐시된 정답 데이터 (ETag/gzip)
+#   GET /answer-cache/stats           적중률, 크기, 제거 횟수
+# ============================================================
+
+def load_puzzle_answer(puzzle_id):
+    try:
+        conn = get_db_connection()
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT data, status, recommended FROM puzzles WHERE id = %s", (puzzle_id,))
+            row = cursor.fetchone()
+        conn.close()
+        if row and row['data']:
+            data = json.loads(row['data'])
+            if data.get('differences'):
+                data['status'] = row['status']
+                data['recommended'] = bool(row['recommended'])
+                return data
+    except Exception as e:
+        print(f"Answer load from DB failed ({puzzle_id}): {e}")
+
+    return asset_storage.read_json(asset_key(puzzle_id, "answer.json"))
+
+answer_cache = AnswerCache(load_puzzle_answer)
+
+def invalidate_changed_puzzle(change):
+    """변경 피드 구독 - 다른 워커가 바꾼 퍼즐의 정답 캐시도 삭제 (캐시 메모리는 워커마다 따로 있음)"""
+    answer_cache.invalidate(change["puzzle_id"])
+
+@app.route('/puzzles/<puzzle_id>/answer', methods=['GET'])
+def puzzle_answer(puzzle_id):
+    entry = answer_cache.get(secure_filename(puzzle_id))
+    if entry is None:
+        return jsonify({"error": f"Puzzle {puzzle_id} not found"}), 404
+    return json_bytes_response(entry.body, entry.etag, entry.gzipped)
+
+@app.route('/answer-cache/stats', methods=['GET'])
+def answer_cache_stats():
+    return jsonify(answer_cache.metrics())
+
 @app.route('/')
 def index():
     return send_from_directory('.', 'admin_dashboard.html')
@@ -72,31 +319,39 @@ def save_puzzle():
     if not puzzle_id:
         return jsonify({"error": "Missing puzzle_id"}), 400
 
-    answer_path = PUZZLES_DIR / puzzle_id / "answer.json"
+    puzzle_dir = puzzle_folder(puzzle_id)
     
     try:
-        # 1. Save answer.json
-        with open(answer_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        # 1. Save answer.json (이미지는 그대로, 정답 데이터만 새 버전으로 발행)
+        publish_version(puzzle_dir, create_staging(puzzle_dir), data)
+        sync_puzzle(asset_storage, PUZZLES_DIR, puzzle_dir)
         
         # 2. Update DB
         conn = get_db_connection()
         with conn.cursor() as cursor:
+            ensure_version_column(cursor)
             sql = """
-                INSERT INTO puzzles (id, created_at, differences, data)
-                VALUES (%s, %s, %s, %s)
+                INSERT INTO puzzles (id, created_at, differences, data, version)
+                VALUES (%s, %s, %s, %s, %s)
                 ON DUPLICATE KEY UPDATE 
                 differences = VALUES(differences),
-                data = VALUES(data)
+                data = VALUES(data),
+                version = VALUES(version)
             """
             cursor.execute(sql, (
                 puzzle_id, 
                 data.get('created_at', datetime.now().isoformat()),
                 data.get('total_differences', 10),
-                json.dumps(data, ensure_ascii=False)
+                json.dumps(data, ensure_ascii=False),
+                data.get('version')
             ))
+            change_feed.record(cursor, "saved", puzzle_id, version=data.get('version'),
+                               differences=data.get('total_differences', 10))
         conn.commit()
         conn.close()
+        change_feed.notify()
+
+        answer_cache.invalidate(puzzle_id)
 
         # 3. Sync to manifest.json for frontend
         sync_db_to_manifest()
@@ -105,6 +360,111 @@ def save_puzzle():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def next_puzzle_id():
+    """DB와 업로드 폴더에서 다음 퍼즐 ID (i1, i2, ...) 결정 - 생성 중이라 아직 DB 행이 없는 ID도 원본 파일로 확인"""
+    conn = get_db_connection()
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT id FROM puzzles WHERE id LIKE 'i%'")
+        rows = cursor.fetchall()
+        # 변형 퍼즐(i5-easy 등)은 기본 퍼즐 번호를 따름
+        ids = [int(m.group(1)) for m in (re.match(r'i(\d+)', r['id']) for r in rows) if m]
+    conn.close()
+    with os.scandir(UPLOAD_FOLDER) as entries:
+        ids += [int(m.group(1)) for m in (re.match(r'i(\d+)(?:\.|$)', e.name) for e in entries) if m]
+    return f"i{max(ids) + 1}" if ids else "i1"
+
+def reserve_upload_path(extension):
+    """
+    다음 퍼즐 ID를 정하고 원본 파일(IMG/<ID><확장자>)을 O_EXCL로 만들어 예약 → (ID, 경로).
+    비동기 생성은 DB 행이 생기기 전에 202를 반환하므로, 생성이 끝나기 전에 온 다음 업로드가
+    같은 ID를 받아 원본과 퍼즐 폴더를 덮어쓰지 않도록 잠금 안에서 ID 결정과 파일 생성을 같이 합니다.
+    """
+    # 예약한 빈 파일을 후보 풀이 원본으로 집어 가지 않도록 먼저 사용자 요청을 알림
+    pregen_pool.notify_activity()
+    with file_lock(UPLOAD_FOLDER / "puzzle-id"):
+        puzzle_id = next_puzzle_id()
+        file_path = UPLOAD_FOLDER / f"{puzzle_id}{extension}"
+        os.close(os.open(file_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    return puzzle_id, file_path
+
+def wants_async():
+    """?async=1 (또는 JSON/폼의 async) 이면 생성 작업을 백그라운드로 돌리고 job_id만 바로 반환"""
+    data = request.get_json(silent=True) or {}
+    value = request.args.get('async') or request.form.get('async') or data.get('async')
+    return str(value).lower() in ('1', 'true')
+
+def run_generation_job(kind, puzzle_id, target):
+    """
+    target(job_id)를 생성 작업으로 실행. 동기 요청은 결과에 job_id를 붙여 반환하고 (실패 시 예외),
+    비동기 요청은 202와 이벤트 구독 주소를 바로 반환합니다.
+    """
+    job_id = generation_jobs.create(kind, puzzle_id)
+    # 사용자 요청이 있는 동안은 후보 미리 생성을 쉼
+    pregen_pool.notify_activity()
+    if wants_async():
+        generation_jobs.run(job_id, lambda: target(job_id), background=True)
+        return jsonify({"status": "accepted", "job_id": job_id, "puzzle_id": puzzle_id,
+                        "events_url": f"/jobs/{job_id}/events"}), 202
+    return jsonify({**generation_jobs.run(job_id, lambda: target(job_id)), "job_id": job_id})
+
+def promote_pooled_candidate(puzzle_id, file_path, job_id=None):
+    """같은 원본의 미리 생성된 후보가 있으면 puzzle_id로 발행하고 True (없으면 False, 생성기를 실행해야 함)"""
+    candidate = pregen_pool.take(file_path)
+    if candidate is None:
+        return False
+    published = pregen_pool.promote(candidate, puzzle_id)
+    print(f"🫙 Promoted pre-generated candidate for {puzzle_id}")
+    if job_id:
+        append_event(generation_jobs.path(job_id), "pool", puzzle_ids=published)
+    return True
+
+def generate_and_register(puzzle_id, file_path, job_id=None):
+    """생성기를 실행하고 (미리 생성된 후보가 있으면 그 후보를 발행하고) 결과 answer.json을 DB에 최초 등록"""
+    print(f"🚀 Generating puzzle for {puzzle_id}...")
+    # 변형 퍼즐(VARIANTS)도 같은 원본에서 재생성할 수 있도록 원본 위치 기록
+    for generated_id in [puzzle_id] + variant_ids(puzzle_id):
+        scan_index.record_source(generated_id, file_path)
+    from_pool = promote_pooled_candidate(puzzle_id, file_path, job_id)
+    if not from_pool:
+        subprocess.run(["python3", "generator/generate_puzzle.py", str(file_path), "--puzzle-id", puzzle_id], check=True,
+                       env=generation_jobs.env(job_id) if job_id else None)
+
+    # Initial Save to DB (기본 퍼즐 + 함께 만들어진 변형 퍼즐)
+    registered = []
+    conn = get_db_connection()
+    with conn.cursor() as cursor:
+        ensure_version_column(cursor)
+        for generated_id in [puzzle_id] + variant_ids(puzzle_id):
+            answer_path = puzzle_folder(generated_id) / "answer.json"
+            if not answer_path.exists():
+                continue
+            with open(answer_path, 'r', encoding='utf-8') as f:
+                ans_data = json.load(f)
+            sql = "INSERT INTO puzzles (id, created_at, differences, data, version) VALUES (%s, %s, %s, %s, %s)"
+            cursor.execute(sql, (
+                generated_id,
+                ans_data.get('created_at', datetime.now().isoformat()),
+                ans_data.get('total_differences', 10),
+                json.dumps(ans_data, ensure_ascii=False),
+                ans_data.get('version')
+            ))
+            change_feed.record(cursor, "created", generated_id, version=ans_data.get('version'),
+                               differences=ans_data.get('total_differences', 10))
+            registered.append(generated_id)
+    conn.commit()
+    conn.close()
+    if registered:
+        change_feed.notify()
+        sync_db_to_manifest()
+
+    return {
+        "status": "success",
+        "puzzle_id": puzzle_id,
+        "variants": registered[1:] if puzzle_id in registered else registered,
+        "from_pool": from_pool,
+        "review_url": f"./puzzles/review.html?ID={puzzle_id}"
+    }
+
 @app.route('/upload', methods=['POST'])
 def upload_image():
     if 'image' not in request.files:
@@ -116,53 +476,131 @@ def upload_image():
 
     if file:
         filename = secure_filename(file.filename)
-        
-        # Determine next ID from DB
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT id FROM puzzles WHERE id LIKE 'i%'")
-            rows = cursor.fetchall()
-            ids = [int(r['id'].replace('i', '')) for r in rows if r['id'].startswith('i')]
-            next_id = f"i{max(ids) + 1}" if ids else "i1"
-        conn.close()
-        
-        extension = os.path.splitext(filename)[1]
-        new_filename = f"{next_id}{extension}"
-        file_path = UPLOAD_FOLDER / new_filename
+        next_id, file_path = reserve_upload_path(os.path.splitext(filename)[1])
         file.save(file_path)
+
+        # 생성기로 넘기기 전에 손상된 파일 거절
+        try:
+            verify_image_file(file_path)
+        except UploadError as e:
+            file_path.unlink()
+            return jsonify({"error": str(e)}), e.status
         
         # Run generator
-        print(f"🚀 Generating puzzle for {next_id}...")
         try:
-            subprocess.run(["python3", "generator/generate_puzzle.py", str(file_path)], check=True)
-            
-            # Initial Save to DB
-            answer_path = PUZZLES_DIR / next_id / "answer.json"
-            if answer_path.exists():
-                with open(answer_path, 'r', encoding='utf-8') as f:
-                    ans_data = json.load(f)
-                
-                conn = get_db_connection()
-                with conn.cursor() as cursor:
-                    sql = "INSERT INTO puzzles (id, created_at, differences, data) VALUES (%s, %s, %s, %s)"
-                    cursor.execute(sql, (
-                        next_id,
-                        ans_data.get('created_at', datetime.now().isoformat()),
-                        ans_data.get('total_differences', 10),
-                        json.dumps(ans_data, ensure_ascii=False)
-                    ))
-                conn.commit()
-                conn.close()
-                sync_db_to_manifest()
-
-            return jsonify({
-                "status": "success",
-                "puzzle_id": next_id,
-                "review_url": f"./puzzles/review.html?ID={next_id}"
-            })
+            return run_generation_job("upload", next_id, lambda job_id: generate_and_register(next_id, file_path, job_id))
         except Exception as e:
             return jsonify({"error": f"Generation failed: {str(e)}"}), 500
 
+# ============================================================
+# 청크 업로드 (이어받기 가능)
+#   POST   /uploads                 {filename, size, sha256?} → upload_id
+#   GET    /uploads/<id>            현재 offset 조회 (이어받기)
+#   PATCH  /uploads/<id>?offset=N   청크 전송 (body = raw bytes)
+#   POST   /uploads/<id>/complete   검증 후 퍼즐 생성
+#   DELETE /uploads/<id>            업로드 취소
+# ============================================================
+
+@app.route('/uploads', methods=['POST'])
+def create_upload():
+    data = request.json or {}
+    try:
+        session = upload_store.create(
+            secure_filename(data.get('filename', '')), data.get('size'), data.get('sha256'))
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+    return jsonify(session.to_dict()), 201
+
+@app.route('/uploads/<upload_id>', methods=['GET'])
+def upload_status(upload_id):
+    try:
+        session = upload_store.get(upload_id)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+    return jsonify(session.to_dict())
+
+@app.route('/uploads/<upload_id>', methods=['PATCH'])
+def upload_chunk(upload_id):
+    offset = request.args.get('offset', type=int)
+    if offset is None:
+        offset = request.headers.get('Upload-Offset', type=int)
+    if offset is None:
+        return jsonify({"error": "Missing offset"}), 400
+
+    try:
+        session = upload_store.append(upload_id, offset, request.stream, request.content_length)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+    return jsonify(session.to_dict())
+
+@app.route('/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload(upload_id):
+    try:
+        session = upload_store.finalize(upload_id)
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+
+    next_id, file_path = reserve_upload_path(session.extension)
+    os.replace(session.part_path, file_path)
+    upload_store.discard(upload_id)
+
+    try:
+        return run_generation_job("upload", next_id, lambda job_id: generate_and_register(next_id, file_path, job_id))
+    except Exception as e:
+        return jsonify({"error": f"Generation failed: {str(e)}"}), 500
+
+@app.route('/uploads/<upload_id>', methods=['DELETE'])
+def cancel_upload(upload_id):
+    upload_store.discard(upload_id)
+    return jsonify({"status": "success"})
+
+def update_puzzle_from_answer(puzzle_id, action, sync=True):
+    """생성기가 다시 쓴 answer.json을 DB와 manifest에 반영 (여러 개를 갱신할 때는 sync=False 후 한 번만 동기화)
+    action: 변경 피드에 남길 작업 이름 (regenerated, reedited, calibrated)"""
+    answer_path = puzzle_folder(puzzle_id) / "answer.json"
+    if not answer_path.exists():
+        return
+    with open(answer_path, 'r', encoding='utf-8') as f:
+        ans_data = json.load(f)
+    conn = get_db_connection()
+    with conn.cursor() as cursor:
+        ensure_version_column(cursor)
+        # 버전 포인터 교체: 생성기가 발행한 answer.json의 version을 그대로 기록
+        # (재생성하면서 새로 생긴 변형 퍼즐은 여기서 처음 등록)
+        sql = """
+            INSERT INTO puzzles (id, created_at, differences, data, version)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+            differences = VALUES(differences),
+            data = VALUES(data),
+            version = VALUES(version)
+        """
+        cursor.execute(sql, (puzzle_id, ans_data.get('created_at', datetime.now().isoformat()),
+                             ans_data.get('total_differences', 10), json.dumps(ans_data),
+                             ans_data.get('version')))
+        change_feed.record(cursor, action, puzzle_id, version=ans_data.get('version'),
+                           differences=ans_data.get('total_differences', 10))
+    conn.commit()
+    conn.close()
+    change_feed.notify()
+    answer_cache.invalidate(puzzle_id)
+    if sync:
+        sync_db_to_manifest()
+
+def load_stored_plan(puzzle_id):
+    """DB data 컬럼(없으면 answer.json)에 저장된 퍼즐 데이터 반환"""
+    conn = get_db_connection()
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT data FROM puzzles WHERE id = %s", (puzzle_id,))
+        row = cursor.fetchone()
+    conn.close()
+    if row and row['data']:
+        plan = json.loads(row['data'])
+        if plan.get('differences'):
+            return plan
+
+    return asset_storage.read_json(asset_key(puzzle_id, "answer.json"))
+
 @app.route('/regenerate', methods=['POST'])
 def regenerate_puzzle():
     data = request.json
@@ -170,31 +608,136 @@ def regenerate_puzzle():
     if not puzzle_id:
         return jsonify({"error": "Missing puzzle_id"}), 400
 
-    possible_files = list(UPLOAD_FOLDER.glob(f"{puzzle_id}.*"))
-    if not possible_files:
+    # 변형 퍼즐(i5-easy)은 기본 퍼즐(i5)의 원본에서 만듦
+    file_path = scan_index.find_source(UPLOAD_FOLDER, split_variant_id(puzzle_id)[0])
+    if file_path is None:
         return jsonify({"error": f"Original image for {puzzle_id} not found"}), 404
     
-    file_path = possible_files[0]
+    # 변형 퍼즐 ID면 그 변형만, 기본 퍼즐이면 변형(VARIANTS)까지 같이 다시 생성
+    command = ["python3", "generator/generate_puzzle.py", str(file_path), "--puzzle-id", puzzle_id]
+    if data.get('tiled'):
+        command.append("--tiled")
+
+    # reuse_plan: 검수된(관리자가 수정했을 수 있는) 차이점 목록으로 이미지만 재생성 (분석 API 생략)
+    plan_path = None
+    if data.get('reuse_plan'):
+        plan = load_stored_plan(puzzle_id)
+        if not plan:
+            return jsonify({"error": f"Stored plan for {puzzle_id} not found"}), 404
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as f:
+            json.dump(plan, f, ensure_ascii=False)
+            plan_path = f.name
+        command += ["--plan", plan_path]
     
-    try:
-        subprocess.run(["python3", "generator/generate_puzzle.py", str(file_path)], check=True)
-        # Update DB after regeneration
-        answer_path = PUZZLES_DIR / puzzle_id / "answer.json"
-        if answer_path.exists():
-            with open(answer_path, 'r', encoding='utf-8') as f:
-                ans_data = json.load(f)
-            conn = get_db_connection()
-            with conn.cursor() as cursor:
-                sql = "UPDATE puzzles SET differences = %s, data = %s WHERE id = %s"
-                cursor.execute(sql, (ans_data.get('total_differences', 10), json.dumps(ans_data), puzzle_id))
-            conn.commit()
-            conn.close()
+    # 기본 퍼즐을 처음부터 다시 만들 때만 미리 생성된 후보 사용 (변형 하나만 / 타일 / 계획 재사용은 생성기 실행)
+    use_pool = not (plan_path or data.get('tiled') or split_variant_id(puzzle_id)[1])
+
+    def regenerate(job_id):
+        try:
+            from_pool = use_pool and promote_pooled_candidate(puzzle_id, file_path, job_id)
+            if not from_pool:
+                subprocess.run(command, check=True, env=generation_jobs.env(job_id))
+            # Update DB after regeneration
+            generated_ids = [puzzle_id] if split_variant_id(puzzle_id)[1] else [puzzle_id] + variant_ids(puzzle_id)
+            for generated_id in generated_ids:
+                update_puzzle_from_answer(generated_id, "regenerated", sync=False)
             sync_db_to_manifest()
+            return {"status": "success", "from_pool": from_pool}
+        finally:
+            if plan_path:
+                os.unlink(plan_path)
 
-        return jsonify({"status": "success"})
+    try:
+        return run_generation_job("regenerate", puzzle_id, regenerate)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/reedit-difference', methods=['POST'])
+def reedit_difference():
+    """차이점 하나만 부분 재편집 (나머지 차이점과 이미지는 유지)"""
+    data = request.json
+    puzzle_id = data.get('puzzle_id')
+    difference_id = data.get('difference_id')
+    if not puzzle_id or difference_id is None:
+        return jsonify({"error": "Missing puzzle_id or difference_id"}), 400
+    try:
+        difference_id = int(difference_id)
+    except (TypeError, ValueError):
+        return jsonify({"error": "difference_id must be an integer"}), 400
+    if not puzzle_exists(puzzle_id):
+        return jsonify({"error": f"Puzzle {puzzle_id} not found"}), 404
+
+    command = ["python3", "generator/generate_puzzle.py",
+               "--reedit", puzzle_id, "--difference", str(difference_id)]
+    if data.get('modification'):
+        command += ["--instruction", data['modification']]
+
+    def reedit(job_id):
+        # 다른 노드가 만들었거나 더 최근에 발행한 퍼즐일 수 있으므로 저장소의 현재 버전을 먼저 받음
+        fetch_puzzle(asset_storage, PUZZLES_DIR, puzzle_folder(puzzle_id))
+        subprocess.run(command, check=True, env=generation_jobs.env(job_id))
+        update_puzzle_from_answer(puzzle_id, "reedited")
+        return {"status": "success"}
+
+    try:
+        return run_generation_job("reedit", puzzle_id, reedit)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# ============================================================
+# 생성 작업 진행 상황
+#   GET /jobs/<id>          현재 상태(queued/running/done/failed)와 지금까지의 이벤트
+#   GET /jobs/<id>/events   SSE: 단계 이벤트를 생기는 대로 전송, done/failed 후 종료 (Last-Event-ID로 이어받기)
+#   업로드/재생성/재편집에 async=1 을 주면 202 + job_id를 바로 받고 이 주소로 진행 상황을 구독
+# ============================================================
+
+JOB_STREAM_SECONDS = 600
+JOB_HEARTBEAT_SECONDS = 15
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    try:
+        return jsonify(generation_jobs.status(job_id))
+    except JobError as e:
+        return jsonify({"error": str(e)}), e.status
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    after = request.headers.get('Last-Event-ID') or request.args.get('after') or 0
+    try:
+        events = generation_jobs.follow(job_id, int(after), JOB_STREAM_SECONDS, JOB_HEARTBEAT_SECONDS)
+        # 첫 이벤트를 미리 꺼내 없는 작업이면 스트림을 열기 전에 404
+        first = next(events, None)
+    except ValueError:
+        return jsonify({"error": "Last-Event-ID must be a number"}), 400
+    except JobError as e:
+        return jsonify({"error": str(e)}), e.status
+    if first is None:
+        # 이미 끝난 작업의 마지막 이벤트까지 받은 재접속 - 204면 EventSource가 재접속을 멈춤
+        return '', 204
+
+    def stream():
+        yield "retry: 1000\n\n"
+        for event_id, event in itertools.chain([first], events):
+            if event_id is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {event_id}\nevent: {event['event']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+    response = Response(stream(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# ============================================================
+# 미리 생성된 후보 풀 (PREGEN_POOL=1)
+#   GET /pregen-pool/stats   후보 수, 생성/사용/폐기 수와 시간 (쓰지 못하고 버린 생성량 확인)
+# ============================================================
+
+@app.route('/pregen-pool/stats', methods=['GET'])
+def pregen_pool_stats():
+    return jsonify(pregen_pool.stats())
+
 @app.route('/toggle-recommended', methods=['POST'])
 def toggle_recommended():
     data = request.json
@@ -205,8 +748,11 @@ def toggle_recommended():
         conn = get_db_connection()
         with conn.cursor() as cursor:
             cursor.execute("UPDATE puzzles SET recommended = %s WHERE id = %s", (recommended, puzzle_id))
+            change_feed.record(cursor, "recommended", puzzle_id, recommended=recommended)
         conn.commit()
         conn.close()
+        change_feed.notify()
+        answer_cache.invalidate(puzzle_id)
         sync_db_to_manifest()
         return jsonify({"status": "success"})
     except Exception as e:
@@ -222,41 +768,467 @@ def toggle_status():
         conn = get_db_connection()
         with conn.cursor() as cursor:
             cursor.execute("UPDATE puzzles SET status = %s WHERE id = %s", (status, puzzle_id))
+            change_feed.record(cursor, "status", puzzle_id, status=status)
         conn.commit()
         conn.close()
+        change_feed.notify()
+        answer_cache.invalidate(puzzle_id)
         sync_db_to_manifest()
         return jsonify({"status": "success"})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-if __name__ == '__main__':
-    # Initial sync from files to DB if DB is empty
+# ============================================================
+# 변경 피드 (manifest.json을 주기적으로 다시 받는 대신)
+#   GET /changes                      현재 last_seq만 바로 반환 (구독 시작점, manifest의 change_seq와 같음)
+#   GET /changes?since=<seq>&timeout=25
+#                                     long-poll: since 이후 변경이 생기면 바로, 없으면 timeout 후 빈 목록
+#   GET /changes?since=<seq>&stream=1 (또는 Accept: text/event-stream)
+#                                     SSE: 변경마다 id/event/data 프레임, 재접속 시 Last-Event-ID 사용
+# ============================================================
+
+CHANGE_WAIT_TIMEOUT = 25
+MAX_CHANGE_WAIT_TIMEOUT = 60
+# SSE 연결 하나를 유지하는 최대 시간 (끝나면 브라우저가 Last-Event-ID로 자동 재접속) / 하트비트 주기
+CHANGE_STREAM_SECONDS = int(os.getenv("CHANGE_STREAM_SECONDS", 300))
+CHANGE_HEARTBEAT_SECONDS = 15
+
+def change_stream(since):
+    deadline = time.monotonic() + CHANGE_STREAM_SECONDS
+    yield "retry: 1000\n\n"
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        changes = change_feed.wait(since, min(CHANGE_HEARTBEAT_SECONDS, remaining))
+        if not changes:
+            # 프록시가 유휴 연결을 끊지 않도록 주석 프레임
+            yield ": keep-alive\n\n"
+            continue
+        for change in changes:
+            yield f"id: {change['seq']}\nevent: change\ndata: {json.dumps(change, ensure_ascii=False)}\n\n"
+        since = changes[-1]['seq']
+
+@app.route('/changes', methods=['GET'])
+def list_changes():
+    since = request.args.get('since') or request.headers.get('Last-Event-ID')
     try:
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT COUNT(*) as cnt FROM puzzles")
-            if cursor.fetchone()['cnt'] == 0:
-                print("Initial DB Load from manifest.json...")
-                if MANIFEST_PATH.exists():
-                    with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
-                        manifest = json.load(f)
-                    for p in manifest.get('puzzles', []):
-                        # try to load full data from answer.json
-                        ans_p = PUZZLES_DIR / p['id'] / "answer.json"
-                        ans_data = {}
-                        created_at = datetime.now()
-                        if ans_p.exists():
-                            with open(ans_p, 'r', encoding='utf-8') as f:
-                                ans_data = json.load(f)
-                                if 'created_at' in ans_data:
-                                    try: created_at = datetime.fromisoformat(ans_data['created_at'])
-                                    except: pass
-                        
-                        cursor.execute("INSERT INTO puzzles (id, created_at, recommended, differences, data, status) VALUES (%s, %s, %s, %s, %s, %s)",
-                                       (p['id'], created_at, p.get('recommended', False), p.get('differences', 10), json.dumps(ans_data), p.get('status', 'ready')))
-                    conn.commit()
-        conn.close()
+        since = int(since) if since else None
+        timeout = min(float(request.args.get('timeout', CHANGE_WAIT_TIMEOUT)), MAX_CHANGE_WAIT_TIMEOUT)
+    except ValueError:
+        return jsonify({"error": "since and timeout must be numbers"}), 400
+
+    if request.args.get('stream') == '1' or 'text/event-stream' in request.headers.get('Accept', ''):
+        response = Response(change_stream(change_feed.head() if since is None else since),
+                            mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+
+    if since is None:
+        return jsonify({"changes": [], "last_seq": change_feed.head()})
+    changes = change_feed.wait(since, max(timeout, 0))
+    return jsonify({"changes": changes, "last_seq": changes[-1]['seq'] if changes else since})
+
+# 퍼즐별 클릭 판정기 캐시 (정답 데이터 캐시 항목의 ETag가 바뀌면 다시 로드)
+hit_testers = {}
+
+def get_hit_tester(puzzle_id):
+    """
+    클릭 판정기 (퍼즐이 없으면 None).
+    정답 데이터와 마스크를 저장소에서 읽으므로 로컬 퍼즐 폴더가 없는 노드에서도 동작합니다.
+    """
+    entry = answer_cache.get(puzzle_id)
+    if entry is None:
+        return None
+    cached = hit_testers.get(puzzle_id)
+    if cached and cached[0] == entry.etag:
+        return cached[1]
+    mask_name = entry.data.get("mask_image")
+    mask_bytes = asset_storage.read_bytes(asset_key(puzzle_id, mask_name)) if mask_name else None
+    tester = MaskHitTester.from_bytes(mask_bytes, entry.data)
+    hit_testers[puzzle_id] = (entry.etag, tester)
+    return tester
+
+@app.route('/hit-test', methods=['POST'])
+def hit_test():
+    """클릭 좌표(원본 이미지 픽셀)가 어느 차이점인지 판정"""
+    data = request.json
+    puzzle_id = secure_filename(data.get('puzzle_id') or '')
+    if not puzzle_id or 'x' not in data or 'y' not in data:
+        return jsonify({"error": "Missing puzzle_id, x or y"}), 400
+    try:
+        x, y = float(data['x']), float(data['y'])
+    except (TypeError, ValueError):
+        return jsonify({"error": "x and y must be numbers"}), 400
+    tester = get_hit_tester(puzzle_id)
+    if tester is None:
+        return jsonify({"error": f"Puzzle {puzzle_id} not found"}), 404
+
+    difference_id = tester.hit(x, y)
+    return jsonify({"hit": difference_id is not None, "difference_id": difference_id})
+
+@app.route('/puzzles/<puzzle_id>/<path:filename>')
+def puzzle_file(puzzle_id, filename):
+    """퍼즐 파일 (샤드 배치에서도 기존 ./puzzles/<ID>/파일 URL이 그대로 동작하도록)"""
+    puzzle_id = secure_filename(puzzle_id)
+    if asset_storage.remote:
+        return redirect(asset_storage.url(asset_key(puzzle_id, filename)))
+    puzzle_dir = puzzle_folder(puzzle_id)
+    if not puzzle_dir.exists():
+        # 퍼즐 폴더가 아닌 경로 (review.html, 샤드 폴더 등)는 정적 파일 그대로
+        return send_from_directory(PUZZLES_DIR, f"{puzzle_id}/{filename}")
+    return send_from_directory(puzzle_dir, filename)
+
+# 델타 에셋에서 복원한 modified.jpg 캐시 (퍼즐 ID → ((매니페스트 이름, 수정 시각), JPEG 바이트))
+delta_images = {}
+DELTA_CACHE_SIZE = 32
+
+@app.route('/puzzles/<puzzle_id>/modified.jpg')
+def modified_image(puzzle_id):
+    """
+    modified.jpg가 있으면 그대로, 정리(prune)된 퍼즐은 원본 + 델타 타일로 복원해서 제공
+    (정리된 퍼즐의 answer.json은 modified_image가 이 주소를 가리킴)
+    """
+    puzzle_id = secure_filename(puzzle_id)
+    puzzle_dir = puzzle_folder(puzzle_id)
+    if asset_storage.remote and not (puzzle_dir / "answer.json").exists():
+        # 정리된 퍼즐은 저장소에 modified.jpg가 없으므로 델타를 받아서 복원
+        fetch_puzzle(asset_storage, PUZZLES_DIR, puzzle_dir)
+    manifest_path = puzzle_dir / manifest_name(puzzle_dir)
+    if asset_storage.remote and not manifest_path.exists():
+        return redirect(asset_storage.url(asset_key(puzzle_id, "modified.jpg")))
+    if (puzzle_dir / "modified.jpg").exists():
+        return send_from_directory(puzzle_dir, "modified.jpg")
+    if not manifest_path.exists():
+        return jsonify({"error": f"Puzzle {puzzle_id} not found"}), 404
+
+    key = (manifest_path.name, manifest_path.stat().st_mtime)
+    cached = delta_images.get(puzzle_id)
+    if not cached or cached[0] != key:
+        buffer = io.BytesIO()
+        reconstruct(puzzle_dir).save(buffer, "JPEG", quality=92, subsampling=0)
+        if len(delta_images) >= DELTA_CACHE_SIZE:
+            delta_images.pop(next(iter(delta_images)))
+        cached = delta_images[puzzle_id] = (key, buffer.getvalue())
+    return send_file(io.BytesIO(cached[1]), mimetype="image/jpeg")
+
+# ============================================================
+# 클릭 이벤트 수집 / 히트맵
+#   POST /clicks                 {puzzle_id?, events: [{puzzle_id?, x, y, hit, difference_id?, t?}, ...]}
+#   GET  /heatmap/<puzzle_id>    히트/미스 2차원 히스토그램
+# ============================================================
+
+# 퍼즐 정보는 정답 데이터 캐시(DB, 없으면 에셋 저장소)에서 읽음 - 로컬 퍼즐 폴더가 없는 노드에서도 동작
+def puzzle_image_size(puzzle_id):
+    """(너비, 높이), 삭제되었거나 저장소에 없는 퍼즐이면 None (그 퍼즐의 클릭 이벤트는 버려짐)"""
+    entry = answer_cache.get(puzzle_id)
+    if entry is None:
+        return None
+    return entry.data.get("image_width", 1024), entry.data.get("image_height", 1024)
+
+def puzzle_exists(puzzle_id):
+    return answer_cache.get(puzzle_id) is not None
+
+click_ingestor = ClickIngestor(ANALYTICS_DIR / "clicks", puzzle_image_size, puzzle_exists)
+
+@app.route('/clicks', methods=['POST'])
+def ingest_clicks():
+    data = request.get_json(silent=True) or {}
+    events = data.get('events')
+    if not isinstance(events, list):
+        return jsonify({"error": "Missing events"}), 400
+    try:
+        accepted = click_ingestor.submit(events, data.get('puzzle_id'))
+    except ClickIngestError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"accepted": accepted}), 202
+
+@app.route('/heatmap/<puzzle_id>', methods=['GET'])
+def click_heatmap(puzzle_id):
+    puzzle_id = secure_filename(puzzle_id)
+    heatmap = click_ingestor.heatmap(puzzle_id) if puzzle_exists(puzzle_id) else None
+    if heatmap is None:
+        return jsonify({"error": f"Puzzle {puzzle_id} not found"}), 404
+    return jsonify({"puzzle_id": puzzle_id, **heatmap.to_dict()})
+
+@app.route('/clicks/stats', methods=['GET'])
+def click_stats():
+    return jsonify({**click_ingestor.stats, "buffered": len(click_ingestor.buffer)})
+
+# ============================================================
+# 차이점 발견 통계 / 난이도 보정
+#   POST /plays                  {puzzle_id, found: {차이점ID: 발견까지 걸린 초}}  (게임 종료 시)
+#   GET  /find-stats/<puzzle_id>  발견율, 발견 시간 분위수
+#   POST /calibrate-difficulty   {min_plays?} answer.json/DB/manifest 난이도 보정
+# ============================================================
+
+find_stats = FindStatsStore(ANALYTICS_DIR / "find_stats.json")
+atexit.register(find_stats.save)
+# 이 플레이 수마다 통계 스냅샷 저장
+FIND_STATS_SAVE_EVERY = 100
+recorded_plays = 0
+
+@app.route('/plays', methods=['POST'])
+def record_play():
+    global recorded_plays
+    data = request.get_json(silent=True) or {}
+    puzzle_id = secure_filename(data.get('puzzle_id') or '')
+    found = data.get('found') or {}
+    if isinstance(found, list):
+        found = {f.get('difference_id'): f.get('elapsed') for f in found if isinstance(f, dict)}
+    if not puzzle_id or not isinstance(found, dict):
+        return jsonify({"error": "Missing puzzle_id or found"}), 400
+    if not puzzle_exists(puzzle_id):
+        return jsonify({"error": f"Puzzle {puzzle_id} not found"}), 404
+    try:
+        found = {int(k): float(v) for k, v in found.items() if 0 <= float(v)}
+    except (TypeError, ValueError):
+        return jsonify({"error": "found must map difference ids to seconds"}), 400
+
+    find_stats.record_play(puzzle_id, found)
+    recorded_plays += 1
+    if recorded_plays % FIND_STATS_SAVE_EVERY == 0:
+        find_stats.save()
+    return jsonify({"status": "success"})
+
+@app.route('/find-stats/<puzzle_id>', methods=['GET'])
+def puzzle_find_stats(puzzle_id):
+    return jsonify({"puzzle_id": puzzle_id, **find_stats.summary(secure_filename(puzzle_id))})
+
+@app.route('/calibrate-difficulty', methods=['POST'])
+def calibrate_difficulty():
+    """플레이 통계로 answer.json 난이도를 보정하고 DB/manifest에 반영하는 배치 작업"""
+    data = request.get_json(silent=True) or {}
+    try:
+        changed = find_stats.calibrate(puzzle_folder, int(data.get('min_plays', MIN_CALIBRATION_PLAYS)))
+        find_stats.save()
+        for puzzle_id in changed:
+            sync_puzzle(asset_storage, PUZZLES_DIR, puzzle_folder(puzzle_id))
+            update_puzzle_from_answer(puzzle_id, "calibrated", sync=False)
+        if changed:
+            sync_db_to_manifest()
+        return jsonify({"status": "success", "calibrated": changed})
     except Exception as e:
-        print(f"Startup DB sync error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+# ============================================================
+# 서버 채점 / 리더보드
+#   POST /scores                      {puzzle_id, player, clicks: [{x, y, t}], hints_used, elapsed}
+#   GET  /leaderboard/<puzzle_id>     퍼즐별 Top-K
+#   GET  /leaderboard/daily?day=YYYY-MM-DD
+# ============================================================
+
+leaderboard = Leaderboard(get_db_connection)
+
+@app.route('/scores', methods=['POST'])
+def submit_score():
+    """클라이언트 점수 대신 클릭 기록을 다시 채점해서 리더보드에 반영"""
+    data = request.get_json(silent=True) or {}
+    puzzle_id = secure_filename(data.get('puzzle_id') or '')
+    player = str(data.get('player') or '').strip()[:64]
+    if not puzzle_id or not player or not isinstance(data.get('clicks'), list):
+        return jsonify({"error": "Missing puzzle_id, player or clicks"}), 400
+    entry = answer_cache.get(puzzle_id)
+    tester = get_hit_tester(puzzle_id) if entry is not None else None
+    if tester is None:
+        return jsonify({"error": f"Puzzle {puzzle_id} not found"}), 404
+
+    try:
+        result = score_play(entry.data, tester, data['clicks'],
+                            data.get('hints_used', 0), data.get('elapsed'))
+    except (ScoreError, TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 422
+
+    find_stats.record_play(puzzle_id, result['found'])
+    ranks = leaderboard.record(puzzle_id, player, result)
+    result['found'] = sorted(result['found'])
+    return jsonify({**result, **ranks})
+
+@app.route('/leaderboard/<puzzle_id>', methods=['GET'])
+def puzzle_leaderboard(puzzle_id):
+    puzzle_id = secure_filename(puzzle_id)
+    # 없는 퍼즐 ID로 보드가 계속 늘어나지 않도록 먼저 확인
+    if answer_cache.get(puzzle_id) is None:
+        return jsonify({"error": f"Puzzle {puzzle_id} not found"}), 404
+    limit = request.args.get('limit', type=int)
+    return jsonify({"puzzle_id": puzzle_id, "entries": leaderboard.top_puzzle(puzzle_id, limit)})
+
+@app.route('/leaderboard/daily', methods=['GET'])
+def daily_leaderboard():
+    day = request.args.get('day') or datetime.now().strftime("%Y-%m-%d")
+    try:
+        datetime.strptime(day, "%Y-%m-%d")
+    except ValueError:
+        return jsonify({"error": "day must be YYYY-MM-DD"}), 400
+    return jsonify({"day": day, "entries": leaderboard.top_daily(day, request.args.get('limit', type=int))})
+
+# ============================================================
+# 게임 세션 (서버가 진행 상태를 들고 채점)
+#   POST /sessions                    {puzzle_id} → session_id
+#   GET  /sessions/<id>               현재 상태
+#   POST /sessions/<id>/click         {x, y}
+#   POST /sessions/<id>/hint
+#   POST /sessions/<id>/finish        {player?} → 최종 결과 (+ 리더보드)
+# ============================================================
 
-    app.run(port=8001, debug=True)
+game_sessions = create_session_store(get_db_connection, ANALYTICS_DIR / "sessions.json")
+def load_answer(puzzle_id):
+    entry = answer_cache.get(puzzle_id)
+    if entry is None:
+        raise SessionError(f"Puzzle {puzzle_id} not found", 404)
+    return entry.data
+
+def get_puzzle_points(puzzle_id):
+    return difference_points(load_answer(puzzle_id))
+
+@app.errorhandler(SessionError)
+def session_error(e):
+    return jsonify({"error": str(e)}), e.status
+
+@app.route('/sessions', methods=['POST'])
+def create_session():
+    data = request.get_json(silent=True) or {}
+    puzzle_id = secure_filename(data.get('puzzle_id') or '')
+    if not puzzle_id:
+        return jsonify({"error": "Missing puzzle_id"}), 400
+    points = get_puzzle_points(puzzle_id)
+    session = game_sessions.create(puzzle_id)
+    return jsonify({**session.to_dict(), "total": len(points), "time_limit": TIME_LIMIT, "max_hints": MAX_HINTS})
+
+@app.route('/sessions/<session_id>', methods=['GET'])
+def get_session(session_id):
+    return jsonify(game_sessions.get(session_id).to_dict())
+
+@app.route('/sessions/<session_id>/click', methods=['POST'])
+def session_click(session_id):
+    data = request.get_json(silent=True) or {}
+    session = game_sessions.get(session_id)
+    elapsed = time.time() - session.started
+    if elapsed > TIME_LIMIT:
+        return jsonify({"error": "시간이 초과되었습니다"}), 409
+    try:
+        x, y = float(data['x']), float(data['y'])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "Missing x or y"}), 400
+
+    points = get_puzzle_points(session.puzzle_id)
+    tester = get_hit_tester(session.puzzle_id)
+    if tester is None:
+        return jsonify({"error": f"Puzzle {session.puzzle_id} not found"}), 404
+    difference_id = tester.hit(x, y)
+    if difference_id in points:
+        found = game_sessions.mark_found(session, difference_id, elapsed)
+        if found is not None:
+            return jsonify({"success": True, "difference_id": difference_id, "points": points[difference_id],
+                            "found": found, "total": len(points)})
+        return jsonify({"success": False, "difference_id": difference_id, "wrong_clicks": session.wrong_clicks})
+    wrong_clicks = game_sessions.add_wrong_click(session) if difference_id is None else session.wrong_clicks
+    return jsonify({"success": False, "difference_id": difference_id, "wrong_clicks": wrong_clicks})
+
+@app.route('/sessions/<session_id>/hint', methods=['POST'])
+def session_hint(session_id):
+    session = game_sessions.get(session_id)
+    if session.hints_used >= MAX_HINTS:
+        return jsonify({"success": False, "message": "힌트를 모두 사용했습니다!"})
+    remaining = [d for d in load_answer(session.puzzle_id)['differences'] if not session.is_found(d['id'])]
+    if not remaining:
+        return jsonify({"success": False, "message": "모든 차이점을 찾았습니다!"})
+    # 동시에 온 힌트 요청이 MAX_HINTS를 넘지 않도록 확인과 차감을 한 번에
+    hints_remaining = game_sessions.use_hint(session, MAX_HINTS)
+    if hints_remaining is None:
+        return jsonify({"success": False, "message": "힌트를 모두 사용했습니다!"})
+    box = remaining[0]['bounding_box']
+    if isinstance(box, dict):
+        box = [box['x1'], box['y1'], box['x2'], box['y2']]
+    return jsonify({
+        "success": True,
+        "hint": {"x": round((box[0] + box[2]) / 2), "y": round((box[1] + box[3]) / 2), "name": remaining[0].get('name')},
+        "penalty": HINT_PENALTY,
+        "hintsRemaining": hints_remaining,
+    })
+
+@app.route('/sessions/<session_id>/finish', methods=['POST'])
+def finish_session(session_id):
+    data = request.get_json(silent=True) or {}
+    session = game_sessions.remove(session_id)
+    elapsed = min(time.time() - session.started, TIME_LIMIT + 1)
+    found = dict(session.found_at or ())
+    result = final_result(get_puzzle_points(session.puzzle_id), found,
+                          session.wrong_clicks, session.hints_used, elapsed)
+    find_stats.record_play(session.puzzle_id, found)
+    player = str(data.get('player') or '').strip()[:64]
+    if player:
+        result.update(leaderboard.record(session.puzzle_id, player, result))
+    result['found'] = sorted(found)
+    return jsonify(result)
+
+# ============================================================
+# 서버 시작 (개발: python3 admin_server.py / 운영: gunicorn -c gunicorn.conf.py wsgi:app)
+# ============================================================
+
+def seed_db_from_manifest():
+    """DB가 비어 있으면 manifest.json + answer.json으로 초기 적재 (여러 워커가 동시에 떠도 한 번만)"""
+    with file_lock(ANALYTICS_DIR / "seed"):
+        try:
+            conn = get_db_connection()
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT COUNT(*) as cnt FROM puzzles")
+                if cursor.fetchone()['cnt'] == 0:
+                    print("Initial DB Load from manifest.json...")
+                    if MANIFEST_PATH.exists():
+                        with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+                            manifest = json.load(f)
+                        for p in manifest.get('puzzles', []):
+                            # try to load full data from answer.json
+                            ans_p = puzzle_folder(p['id']) / "answer.json"
+                            ans_data = {}
+                            created_at = datetime.now()
+                            if ans_p.exists():
+                                with open(ans_p, 'r', encoding='utf-8') as f:
+                                    ans_data = json.load(f)
+                                    if 'created_at' in ans_data:
+                                        try: created_at = datetime.fromisoformat(ans_data['created_at'])
+                                        except: pass
+                        
+                            cursor.execute("INSERT INTO puzzles (id, created_at, recommended, differences, data, status) VALUES (%s, %s, %s, %s, %s, %s)",
+                                           (p['id'], created_at, p.get('recommended', False), p.get('differences', 10), json.dumps(ans_data), p.get('status', 'ready')))
+                        conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Startup DB sync error: {e}")
+
+initialized_pid = None
+
+def create_app():
+    """
+    앱 팩토리. 프로세스(워커)마다 fork 뒤에 한 번 불러서 백그라운드 스레드를 시작하고 초기 적재를 확인합니다.
+    스레드는 fork로 복제되지 않으므로 import 시점이 아니라 여기서 시작합니다.
+    """
+    global initialized_pid
+    if initialized_pid != os.getpid():
+        initialized_pid = os.getpid()
+        click_ingestor.start()
+        leaderboard.start()
+        game_sessions.start()
+        change_feed.subscribe(invalidate_changed_puzzle)
+        seed_db_from_manifest()
+        pregen_pool.start()
+    return app
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="관리 서버 (개발용)")
+    parser.add_argument("--profile", action="store_true",
+                        help="요청/생성 작업 프로파일 리포트 작성 (환경변수 PROFILE=1과 동일)")
+    parser.add_argument("--profile-mode", choices=["cprofile", "sample"], help="환경변수 PROFILE_MODE와 동일")
+    parser.add_argument("--profile-sample", type=float, help="프로파일할 요청 비율 (환경변수 PROFILE_SAMPLE_RATE와 동일)")
+    args = parser.parse_args()
+    # 생성기 서브프로세스도 같은 설정으로 프로파일하도록 환경변수로 전달
+    if args.profile:
+        os.environ["PROFILE"] = "1"
+    if args.profile_mode:
+        os.environ["PROFILE_MODE"] = args.profile_mode
+    if args.profile_sample is not None:
+        os.environ["PROFILE_SAMPLE_RATE"] = str(args.profile_sample)
+    profiling.configure(enabled=args.profile or None, mode=args.profile_mode, sample_rate=args.profile_sample)
+    create_app().run(port=8001, debug=True)
@@ -0,0 +1,112 @@
+"""
+퍼즐 정답 데이터 캐시 (read-through LRU)
+파싱한 정답 데이터와 미리 직렬화한 JSON/gzip 바이트를 함께 보관해서
+자주 열리는 퍼즐은 디스크/DB 읽기와 JSON 파싱·직렬화 없이 바로 응답합니다.
+전체 크기(바이트) 기준으로 오래 안 쓴 항목부터 내보냅니다.
+"""
+
+import os
+import gzip
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+ANSWER_CACHE_BYTES = int(os.getenv("ANSWER_CACHE_BYTES", 64 * 1024 * 1024))
+
+
+class CachedAnswer:
+    """캐시 항목 (data는 여러 요청이 공유하므로 수정하면 안 됨)"""
+
+    __slots__ = ("data", "body", "gzipped", "etag")
+
+    def __init__(self, data: dict):
+        self.data = data
+        self.body = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.gzipped = gzip.compress(self.body, compresslevel=6)
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+
+    @property
+    def nbytes(self) -> int:
+        # 파싱된 dict 크기는 직렬화 크기의 약 4배로 추정
+        return len(self.body) * 5 + len(self.gzipped)
+
+
+class AnswerCache:
+    """loader(puzzle_id) -> dict | None 로 빈 항목을 채우는 LRU 캐시"""
+
+    def __init__(self, loader, max_bytes: int = ANSWER_CACHE_BYTES):
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # 무효화 세대 (퍼즐별 + 전체). 읽는 도중 무효화된 결과는 캐시에 넣지 않기 위해 사용
+        self.generations = {}
+        self.epoch = 0
+        self.lock = threading.Lock()
+
+    def get(self, puzzle_id: str):
+        """캐시 항목 반환, 퍼즐이 없으면 None"""
+        with self.lock:
+            entry = self.entries.get(puzzle_id)
+            if entry is not None:
+                self.entries.move_to_end(puzzle_id)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            generation = (self.epoch, self.generations.get(puzzle_id, 0))
+
+        # loader는 lock 밖에서 실행 (느린 디스크/DB 읽기가 다른 퍼즐 조회를 막지 않도록)
+        data = self.loader(puzzle_id)
+        if data is None:
+            return None
+        entry = CachedAnswer(data)
+        if entry.nbytes > self.max_bytes:
+            return entry
+        with self.lock:
+            # 읽는 사이에 무효화되었다면 이전 내용일 수 있으므로 이번 요청에만 쓰고 캐시하지 않음
+            if generation != (self.epoch, self.generations.get(puzzle_id, 0)):
+                return entry
+            previous = self.entries.pop(puzzle_id, None)
+            if previous is not None:
+                self.size -= previous.nbytes
+            self.entries[puzzle_id] = entry
+            self.size += entry.nbytes
+            while self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= evicted.nbytes
+                self.evictions += 1
+        return entry
+
+    def invalidate(self, puzzle_id: str = None):
+        """퍼즐 하나(또는 전체) 캐시 삭제"""
+        with self.lock:
+            if puzzle_id is None:
+                self.epoch += 1
+                self.invalidations += len(self.entries)
+                self.entries.clear()
+                self.size = 0
+                return
+            self.generations[puzzle_id] = self.generations.get(puzzle_id, 0) + 1
+            entry = self.entries.pop(puzzle_id, None)
+            if entry is not None:
+                self.size -= entry.nbytes
+                self.invalidations += 1
+
+    def metrics(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
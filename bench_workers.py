@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+gunicorn 워커 수별 읽기 처리량 벤치마크
+워커 수마다 gunicorn을 새로 띄우고, 클라이언트 프로세스 여러 개가 읽기 엔드포인트
+(정답 데이터, 리더보드, 발견 통계, 히트맵)를 keep-alive 연결로 계속 요청해서
+초당 요청 수와 지연 시간 분위수를 워커 1개 대비 배율로 보여줍니다.
+DB와 퍼즐이 준비된 운영과 같은 환경에서 실행하세요 (pip install gunicorn).
+
+사용법:
+    python3 bench_workers.py [--workers 1,2,4,8] [--clients 16] [--seconds 10] [퍼즐ID ...]
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import socket
+import argparse
+import subprocess
+import http.client
+import multiprocessing
+from pathlib import Path
+
+ROOT = Path(__file__).parent
+READ_PATHS = ["/puzzles/{id}/answer", "/leaderboard/{id}", "/find-stats/{id}", "/heatmap/{id}"]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_ready(port: int, timeout: float = 60) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/answer-cache/stats")
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.5)
+    return False
+
+def run_client(args) -> tuple:
+    """한 클라이언트 프로세스: 정해진 시간 동안 순서대로 요청하고 (성공 수, 실패 수, 지연 목록) 반환"""
+    port, paths, seconds, offset = args
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    ok, failed, latencies = 0, 0, []
+    deadline = time.monotonic() + seconds
+    i = offset
+    while time.monotonic() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request("GET", path, headers={"Accept-Encoding": "gzip"})
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            failed += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+        if response.status == 200:
+            ok += 1
+        else:
+            failed += 1
+    conn.close()
+    return ok, failed, latencies
+
+def percentile(values: list, q: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+def bench(workers: int, paths: list, clients: int, seconds: float) -> dict:
+    port = free_port()
+    env = {**os.environ, "WEB_CONCURRENCY": str(workers), "BIND": f"127.0.0.1:{port}"}
+    server = subprocess.Popen(["gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_ready(port):
+            raise RuntimeError(f"gunicorn (workers={workers})가 시작되지 않았습니다")
+        # 워커마다 캐시를 채우도록 잠깐 예열
+        with multiprocessing.Pool(clients) as pool:
+            pool.map(run_client, [(port, paths, 1.0, i) for i in range(clients)])
+            results = pool.map(run_client, [(port, paths, seconds, i) for i in range(clients)])
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+    latencies = sorted(l for _, _, ls in results for l in ls)
+    ok = sum(r[0] for r in results)
+    return {
+        "workers": workers,
+        "rps": ok / seconds,
+        "failed": sum(r[1] for r in results),
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="gunicorn 워커 수별 읽기 처리량 벤치마크")
+    parser.add_argument("puzzle_ids", nargs="*", help="요청할 퍼즐 ID (기본: manifest.json의 처음 10개)")
+    parser.add_argument("--workers", default="1,2,4", help="쉼표로 구분한 워커 수 목록")
+    parser.add_argument("--clients", type=int, default=16, help="동시 클라이언트 프로세스 수")
+    parser.add_argument("--seconds", type=float, default=10, help="워커 수마다 측정 시간 (초)")
+    args = parser.parse_args()
+
+    puzzle_ids = args.puzzle_ids
+    if not puzzle_ids:
+        with open(ROOT / "puzzles" / "manifest.json", "r", encoding="utf-8") as f:
+            puzzle_ids = [p["id"] for p in json.load(f).get("puzzles", [])[:10]]
+    if not puzzle_ids:
+        print("요청할 퍼즐이 없습니다.")
+        sys.exit(1)
+    paths = [template.format(id=puzzle_id) for puzzle_id in puzzle_ids for template in READ_PATHS]
+
+    print(f"퍼즐 {len(puzzle_ids)}개 × 엔드포인트 {len(READ_PATHS)}개, 클라이언트 {args.clients}개, {args.seconds:g}초씩")
+    baseline = None
+    for workers in [int(w) for w in args.workers.split(",")]:
+        result = bench(workers, paths, args.clients, args.seconds)
+        baseline = baseline or result["rps"]
+        print(f"workers={workers:<3} {result['rps']:8.0f} req/s (x{result['rps'] / baseline:.2f})  "
+              f"p50 {result['p50_ms']:.1f}ms  p99 {result['p99_ms']:.1f}ms  실패 {result['failed']}")
@@ -0,0 +1,251 @@
+"""
+퍼즐 변경 피드 (append-only 변경 기록 + long-poll/SSE 대기)
+관리 서버의 변경 요청(저장, 업로드, 재생성, 추천/상태 변경)은 같은 DB 트랜잭션 안에서 puzzle_changes 테이블에 한 줄씩 남깁니다.
+클라이언트는 마지막으로 받은 seq 이후의 변경만 받아 가므로 manifest.json 전체를 다시 받아 비교할 필요가 없습니다.
+
+기다리는 클라이언트는 조건 변수에서 잠들어 있고, 프로세스마다 폴러 스레드 하나만 (대기자나 구독자가 있을 때만) 새 변경을 조회합니다.
+같은 프로세스의 변경은 즉시, 다른 워커의 변경은 POLL_INTERVAL 안에 전달됩니다.
+subscribe()로 등록한 콜백은 모든 변경을 받으므로 워커별 캐시(정답 데이터 등)를 다른 워커의 변경에 맞춰 무효화할 수 있습니다.
+대기자 없이 구독자만 있으면 빈 조회마다 주기를 두 배로 늘려 CHANGE_IDLE_POLL_INTERVAL까지 줄이므로
+접속한 클라이언트가 없는 워커는 거의 조회하지 않습니다 (대신 다른 워커의 변경이 그만큼 늦게 무효화됨).
+
+seq는 INSERT 순서(AUTO_INCREMENT)로 정해지지만 커밋은 워커/스레드마다 순서가 뒤바뀔 수 있습니다.
+낮은 seq가 늦게 커밋되면 이미 그 뒤로 since를 옮긴 클라이언트가 영영 받지 못하므로,
+중간에 빈 seq가 있으면 채워질 때까지 그 뒤 변경은 내보내지 않습니다 (연속된 seq까지만 공개).
+롤백된 트랜잭션의 번호는 영원히 비므로 CHANGE_GAP_TIMEOUT이 지난 빈 번호는 건너뜁니다.
+"""
+
+import os
+import json
+import time
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+
+# 다른 프로세스가 남긴 변경을 확인하는 주기 (대기 중인 클라이언트가 있을 때)
+CHANGE_POLL_INTERVAL = float(os.getenv("CHANGE_POLL_INTERVAL", 0.5))
+# 대기자 없이 구독자만 있을 때 늘려 가는 조회 주기의 상한 (초)
+CHANGE_IDLE_POLL_INTERVAL = float(os.getenv("CHANGE_IDLE_POLL_INTERVAL", 10))
+# 메모리에 들고 있는 최근 변경 수 (이보다 오래된 seq는 DB에서 조회)
+RECENT_CHANGES = 1000
+MAX_CHANGES_PER_RESPONSE = 500
+# 빈 seq를 커밋 중인 트랜잭션으로 보고 기다리는 최대 시간 (초) - 지나면 롤백으로 보고 건너뜀
+CHANGE_GAP_TIMEOUT = float(os.getenv("CHANGE_GAP_TIMEOUT", 5))
+
+CREATE_CHANGES_TABLE = """
+CREATE TABLE IF NOT EXISTS puzzle_changes (
+    seq BIGINT AUTO_INCREMENT PRIMARY KEY,
+    puzzle_id VARCHAR(64) NOT NULL,
+    action VARCHAR(32) NOT NULL,
+    data TEXT,
+    created_at DATETIME NOT NULL
+)
+"""
+
+
+def _row_to_change(row: dict) -> dict:
+    return {
+        "seq": row["seq"],
+        "puzzle_id": row["puzzle_id"],
+        "action": row["action"],
+        **json.loads(row["data"] or "{}"),
+        "at": row["created_at"].isoformat() if hasattr(row["created_at"], "isoformat") else row["created_at"],
+    }
+
+
+class ChangeFeed:
+    def __init__(self, connect, poll_interval: float = CHANGE_POLL_INTERVAL, gap_timeout: float = CHANGE_GAP_TIMEOUT,
+                 idle_poll_interval: float = CHANGE_IDLE_POLL_INTERVAL):
+        self.connect = connect
+        self.poll_interval = poll_interval
+        self.idle_poll_interval = max(idle_poll_interval, poll_interval)
+        # 대기자가 없을 때의 현재 조회 주기 (빈 조회마다 두 배, 변경이 있거나 대기자가 오면 처음으로)
+        self.idle_interval = poll_interval
+        self.gap_timeout = gap_timeout
+        # 내보내지 못하고 기다리는 빈 seq를 처음 본 시각
+        self.gap_since = None
+        self.recent = deque(maxlen=RECENT_CHANGES)
+        self.latest_seq = None
+        self.waiters = 0
+        self.listeners = []
+        self.condition = threading.Condition()
+        self.wakeup = threading.Event()
+        self.table_ready = False
+        self.thread = None
+
+    def _ensure_table(self, cursor):
+        if not self.table_ready:
+            cursor.execute(CREATE_CHANGES_TABLE)
+            self.table_ready = True
+
+    # ------------------------------------------------------------
+    # 기록 (변경 요청 핸들러)
+    # ------------------------------------------------------------
+
+    def record(self, cursor, action: str, puzzle_id: str, **fields):
+        """변경 한 줄 추가 - 퍼즐 UPDATE와 같은 트랜잭션(커서)에서 호출하고, 커밋 후 notify()"""
+        if not self.table_ready:
+            # CREATE TABLE은 MySQL에서 진행 중인 트랜잭션을 커밋해 버리므로 별도 연결에서 확인
+            self.head()
+        cursor.execute("INSERT INTO puzzle_changes (puzzle_id, action, data, created_at) VALUES (%s, %s, %s, %s)",
+                       (puzzle_id, action, json.dumps(fields, ensure_ascii=False, default=str),
+                        datetime.now().replace(microsecond=0)))
+
+    def notify(self):
+        """같은 프로세스에서 커밋한 변경을 기다리는 클라이언트에게 바로 전달"""
+        self.wakeup.set()
+
+    # ------------------------------------------------------------
+    # 조회 / 대기
+    # ------------------------------------------------------------
+
+    def fetch(self, since: int, limit: int = MAX_CHANGES_PER_RESPONSE, until: int = None) -> list:
+        """since 초과 (until 이하) 변경 목록"""
+        conn = self.connect()
+        try:
+            with conn.cursor() as cursor:
+                self._ensure_table(cursor)
+                if until is None:
+                    cursor.execute("SELECT * FROM puzzle_changes WHERE seq > %s ORDER BY seq LIMIT %s", (since, limit))
+                else:
+                    cursor.execute("SELECT * FROM puzzle_changes WHERE seq > %s AND seq <= %s ORDER BY seq LIMIT %s",
+                                   (since, until, limit))
+                return [_row_to_change(row) for row in cursor.fetchall()]
+        finally:
+            conn.close()
+
+    def current_seq(self, cursor) -> int:
+        """
+        구독을 시작해도 안전한 seq (manifest에 같이 적어 두면 클라이언트가 그 지점부터 구독).
+        아직 커밋 중인 낮은 seq를 건너뛰지 않도록 CHANGE_GAP_TIMEOUT보다 오래된 변경까지만 셉니다.
+        (그 뒤 변경은 한 번 더 받을 수 있지만 빠뜨리지는 않음)
+        """
+        self._ensure_table(cursor)
+        cursor.execute("SELECT seq FROM puzzle_changes WHERE created_at < %s ORDER BY seq DESC LIMIT 1",
+                       (datetime.now().replace(microsecond=0) - timedelta(seconds=self.gap_timeout),))
+        row = cursor.fetchone()
+        return row["seq"] if row else 0
+
+    def head(self) -> int:
+        """DB 기준 구독 시작점 (새 구독자, 프로세스의 처음 위치)"""
+        conn = self.connect()
+        try:
+            with conn.cursor() as cursor:
+                return self.current_seq(cursor)
+        finally:
+            conn.close()
+
+    def latest(self) -> int:
+        """이 프로세스가 공개한 마지막 seq - 이 seq까지는 빈 번호 없이 모두 커밋됨 (처음 한 번은 DB에서 조회)"""
+        if self.latest_seq is None:
+            seq = self.head()
+            with self.condition:
+                if self.latest_seq is None:
+                    self.latest_seq = seq
+        return self.latest_seq
+
+    def _from_recent(self, since: int, limit: int):
+        """메모리의 최근 변경으로 답할 수 있으면 목록, 아니면 None - condition 안에서 호출"""
+        if self.recent and self.recent[0]["seq"] <= since + 1:
+            return [c for c in self.recent if c["seq"] > since][:limit]
+        if not self.recent and self.latest_seq is not None and since >= self.latest_seq:
+            return []
+        return None
+
+    def wait(self, since: int, timeout: float, limit: int = MAX_CHANGES_PER_RESPONSE) -> list:
+        """since 이후 변경이 생길 때까지 최대 timeout초 대기 (long-poll)"""
+        if since < self.latest():
+            with self.condition:
+                changes = self._from_recent(since, limit)
+            return changes if changes is not None else self.fetch(since, limit, self.latest_seq)
+
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            self.waiters += 1
+            self._ensure_poller()
+            self.wakeup.set()
+            try:
+                while self.latest_seq <= since:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return []
+                    self.condition.wait(remaining)
+                changes = self._from_recent(since, limit)
+            finally:
+                self.waiters -= 1
+        return changes if changes is not None else self.fetch(since, limit, self.latest_seq)
+
+    def subscribe(self, listener):
+        """새 변경마다 listener(change) 호출 (폴러 스레드에서, 등록한 뒤로는 항상 조회)"""
+        self.listeners.append(listener)
+        with self.condition:
+            self._ensure_poller()
+        self.wakeup.set()
+
+    # ------------------------------------------------------------
+    # 폴러 (대기자나 구독자가 있을 때만 DB 조회, 구독자만 있으면 주기를 늘려 감)
+    # ------------------------------------------------------------
+
+    def _ensure_poller(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name="change-feed-poll", daemon=True)
+            self.thread.start()
+
+    def _contiguous(self, changes: list) -> list:
+        """latest_seq 바로 다음부터 빈 번호 없이 이어지는 변경만 (오래된 빈 번호는 롤백으로 보고 건너뜀)"""
+        fresh = []
+        expected = self.latest_seq + 1
+        for change in changes:
+            if change["seq"] != expected:
+                now = time.monotonic()
+                if self.gap_since is None:
+                    self.gap_since = now
+                if now - self.gap_since < self.gap_timeout:
+                    break
+            self.gap_since = None
+            fresh.append(change)
+            expected = change["seq"] + 1
+        return fresh
+
+    def _next_timeout(self):
+        """다음 조회까지 기다릴 시간 (None이면 깨울 때까지)"""
+        if self.waiters:
+            return self.poll_interval
+        return self.idle_interval if self.listeners else None
+
+    def _backoff(self, busy: bool):
+        """변경이 있었거나 기다리는 빈 seq가 있으면 처음 주기로, 아니면 두 배 (최대 idle_poll_interval)"""
+        if busy:
+            self.idle_interval = self.poll_interval
+        else:
+            self.idle_interval = min(self.idle_interval * 2, self.idle_poll_interval)
+
+    def _run(self):
+        while True:
+            woken = self.wakeup.wait(self._next_timeout())
+            self.wakeup.clear()
+            if not self.waiters and not self.listeners:
+                continue
+            try:
+                changes = self.fetch(self.latest(), MAX_CHANGES_PER_RESPONSE)
+            except Exception as e:
+                print(f"Change feed poll error: {e}")
+                self._backoff(False)
+                time.sleep(1)
+                continue
+            fresh = self._contiguous(changes)
+            # notify()/wait()로 깨운 경우도 바쁜 것으로 봄 (이 프로세스에 클라이언트가 있음)
+            self._backoff(bool(fresh) or self.gap_since is not None or woken)
+            if fresh:
+                with self.condition:
+                    for change in fresh:
+                        if change["seq"] > self.latest_seq:
+                            self.recent.append(change)
+                            self.latest_seq = change["seq"]
+                    self.condition.notify_all()
+                for listener in self.listeners:
+                    for change in fresh:
+                        try:
+                            listener(change)
+                        except Exception as e:
+                            print(f"Change feed listener error: {e}")
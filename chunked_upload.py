@@ -0,0 +1,262 @@
+"""
+청크 업로드 세션 관리
+바이트가 도착하는 동안 SHA-256 해시와 이미지 헤더를 확인하여
+크기/해상도 제한을 넘거나 손상된 파일은 생성 단계로 넘기기 전에 거절합니다.
+"""
+
+import io
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+from pathlib import Path
+from PIL import Image
+
+# 업로드 제한
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 50 * 1024 * 1024))
+MAX_IMAGE_DIMENSION = int(os.getenv("MAX_IMAGE_DIMENSION", 12000))
+MIN_IMAGE_DIMENSION = int(os.getenv("MIN_IMAGE_DIMENSION", 256))
+CHUNK_SIZE = 1024 * 1024
+# 이 바이트 안에서 이미지 헤더를 찾지 못하면 거절 (EXIF 포함 JPEG 헤더도 충분히 들어감)
+HEADER_SNIFF_LIMIT = 512 * 1024
+# 완료되지 않은 업로드 보관 시간
+STALE_UPLOAD_SECONDS = 24 * 60 * 60
+
+# 매직 바이트 → PIL 포맷 / 저장 확장자
+IMAGE_SIGNATURES = {
+    b"\xff\xd8\xff": "JPEG",
+    b"\x89PNG\r\n\x1a\n": "PNG",
+}
+FORMAT_EXTENSIONS = {"JPEG": ".jpg", "PNG": ".png"}
+
+READ_BLOCK_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    """업로드 검증 실패 (HTTP 상태 코드 포함)"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class UploadSession:
+    """진행 중인 업로드 하나의 상태"""
+
+    def __init__(self, upload_id: str, part_path: Path, filename: str, total_size: int, expected_sha256: str = None):
+        self.upload_id = upload_id
+        self.part_path = part_path
+        self.filename = filename
+        self.total_size = total_size
+        self.expected_sha256 = expected_sha256
+        self.offset = 0
+        self.hasher = hashlib.sha256()
+        self.header = bytearray()
+        self.image_format = None
+        self.dimensions = None
+        self.lock = threading.Lock()
+
+    @property
+    def meta_path(self) -> Path:
+        return self.part_path.with_suffix(".json")
+
+    @property
+    def complete(self) -> bool:
+        return self.offset == self.total_size
+
+    @property
+    def extension(self) -> str:
+        return FORMAT_EXTENSIONS.get(self.image_format, "")
+
+    def to_dict(self) -> dict:
+        return {
+            "upload_id": self.upload_id,
+            "offset": self.offset,
+            "size": self.total_size,
+            "chunk_size": CHUNK_SIZE,
+            "format": self.image_format,
+            "dimensions": list(self.dimensions) if self.dimensions else None,
+            "complete": self.complete,
+        }
+
+    def save_meta(self):
+        with open(self.meta_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "filename": self.filename,
+                "size": self.total_size,
+                "sha256": self.expected_sha256,
+            }, f)
+
+    def consume(self, data: bytes):
+        """도착한 바이트를 해시에 반영하고, 헤더를 아직 모르면 헤더를 확인"""
+        self.hasher.update(data)
+        if self.dimensions is None:
+            self.header.extend(data[:HEADER_SNIFF_LIMIT - len(self.header)])
+            self._sniff_header()
+        self.offset += len(data)
+
+    def _sniff_header(self):
+        head = bytes(self.header)
+        if self.image_format is None:
+            for signature, fmt in IMAGE_SIGNATURES.items():
+                if head[:len(signature)] == signature[:len(head)]:
+                    if len(head) >= len(signature):
+                        self.image_format = fmt
+                    break
+            else:
+                raise UploadError("지원하지 않는 파일 형식입니다 (JPEG/PNG만 가능)", 415)
+            if self.image_format is None:
+                return
+
+        try:
+            with Image.open(io.BytesIO(head)) as img:
+                width, height = img.size
+        except Exception:
+            # 헤더가 아직 다 도착하지 않음
+            if len(head) >= HEADER_SNIFF_LIMIT:
+                raise UploadError("이미지 헤더를 해석할 수 없습니다 (손상된 파일)", 422)
+            return
+
+        if width > MAX_IMAGE_DIMENSION or height > MAX_IMAGE_DIMENSION:
+            raise UploadError(f"이미지가 너무 큽니다: {width}x{height} (최대 {MAX_IMAGE_DIMENSION}px)", 413)
+        if width < MIN_IMAGE_DIMENSION or height < MIN_IMAGE_DIMENSION:
+            raise UploadError(f"이미지가 너무 작습니다: {width}x{height} (최소 {MIN_IMAGE_DIMENSION}px)", 422)
+        self.dimensions = (width, height)
+        self.header = bytearray()
+
+
+class UploadStore:
+    """업로드 세션 저장소 (part 파일 + 메타 JSON으로 재시작 후에도 이어받기 가능)"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def create(self, filename: str, total_size, expected_sha256: str = None) -> UploadSession:
+        try:
+            total_size = int(total_size)
+        except (TypeError, ValueError):
+            raise UploadError("size가 필요합니다")
+        if total_size <= 0:
+            raise UploadError("빈 파일은 업로드할 수 없습니다")
+        if total_size > MAX_UPLOAD_BYTES:
+            raise UploadError(f"파일이 너무 큽니다 (최대 {MAX_UPLOAD_BYTES // (1024 * 1024)}MB)", 413)
+
+        self.cleanup_stale()
+        upload_id = uuid.uuid4().hex
+        session = UploadSession(upload_id, self.directory / f"{upload_id}.part", filename,
+                                total_size, (expected_sha256 or "").lower() or None)
+        session.part_path.touch()
+        session.save_meta()
+        with self.lock:
+            self.sessions[upload_id] = session
+        return session
+
+    def get(self, upload_id: str) -> UploadSession:
+        with self.lock:
+            session = self.sessions.get(upload_id)
+            if session is None:
+                session = self._restore(upload_id)
+                self.sessions[upload_id] = session
+        return session
+
+    def _restore(self, upload_id: str) -> UploadSession:
+        """서버 재시작 후 디스크의 part 파일로 세션 복원 (해시는 다시 계산)"""
+        part_path = self.directory / f"{upload_id}.part"
+        meta_path = part_path.with_suffix(".json")
+        if not upload_id.isalnum() or not part_path.exists() or not meta_path.exists():
+            raise UploadError("업로드를 찾을 수 없습니다", 404)
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        session = UploadSession(upload_id, part_path, meta["filename"], meta["size"], meta.get("sha256"))
+        with open(part_path, "rb") as f:
+            while True:
+                block = f.read(READ_BLOCK_SIZE)
+                if not block:
+                    break
+                session.consume(block)
+        return session
+
+    def append(self, upload_id: str, offset: int, stream, content_length: int = None) -> UploadSession:
+        """offset 위치부터 stream의 바이트를 이어 씁니다"""
+        session = self.get(upload_id)
+        if not session.lock.acquire(blocking=False):
+            raise UploadError("같은 업로드에 다른 청크가 전송 중입니다", 409)
+        try:
+            if offset != session.offset:
+                raise UploadError(f"offset 불일치: 서버는 {session.offset}바이트까지 받았습니다", 409)
+            remaining = session.total_size - session.offset
+            if content_length is not None and content_length > remaining:
+                raise UploadError("선언한 파일 크기를 초과합니다", 413)
+
+            with open(session.part_path, "ab") as f:
+                try:
+                    while True:
+                        block = stream.read(min(READ_BLOCK_SIZE, remaining + 1))
+                        if not block:
+                            break
+                        if len(block) > remaining:
+                            raise UploadError("선언한 파일 크기를 초과합니다", 413)
+                        session.consume(block)
+                        f.write(block)
+                        remaining -= len(block)
+                except UploadError:
+                    # 잘못된 파일은 더 받지 않고 바로 폐기
+                    f.close()
+                    self.discard(upload_id)
+                    raise
+            return session
+        finally:
+            session.lock.release()
+
+    def finalize(self, upload_id: str) -> UploadSession:
+        """모든 바이트가 도착한 업로드의 해시와 이미지 무결성을 검사"""
+        session = self.get(upload_id)
+        with session.lock:
+            if not session.complete:
+                raise UploadError(f"업로드가 완료되지 않았습니다 ({session.offset}/{session.total_size})", 409)
+            try:
+                if session.dimensions is None:
+                    raise UploadError("이미지 헤더를 해석할 수 없습니다 (손상된 파일)", 422)
+                digest = session.hasher.hexdigest()
+                if session.expected_sha256 and digest != session.expected_sha256:
+                    raise UploadError("SHA-256 불일치: 전송 중 파일이 손상되었습니다", 422)
+                verify_image_file(session.part_path)
+            except UploadError:
+                self.discard(upload_id)
+                raise
+        return session
+
+    def discard(self, upload_id: str):
+        with self.lock:
+            session = self.sessions.pop(upload_id, None)
+        part_path = session.part_path if session else self.directory / f"{upload_id}.part"
+        for path in (part_path, part_path.with_suffix(".json")):
+            if path.exists():
+                path.unlink()
+
+    def cleanup_stale(self):
+        cutoff = time.time() - STALE_UPLOAD_SECONDS
+        for part_path in self.directory.glob("*.part"):
+            if part_path.stat().st_mtime < cutoff:
+                self.discard(part_path.stem)
+
+
+def verify_image_file(path: Path):
+    """
+    전체 파일이 정상적으로 디코딩되는지 확인합니다.
+    PNG는 verify()로 청크 CRC를, JPEG은 draft로 1/8 크기 디코딩하여 잘린 파일을 찾아냅니다.
+    """
+    try:
+        with Image.open(path) as img:
+            img.verify()
+        with Image.open(path) as img:
+            if img.format == "JPEG":
+                img.draft(None, (img.width // 8 or 1, img.height // 8 or 1))
+                img.load()
+    except Exception as e:
+        raise UploadError(f"손상된 이미지 파일입니다: {e}", 422)
@@ -0,0 +1,282 @@
+"""
+클릭 이벤트 수집
+게임 클라이언트가 묶어서 보낸 클릭 이벤트를 메모리 버퍼에 모았다가
+개수/시간 조건이 되면 백그라운드 스레드가 append-only 세그먼트 파일(CSV)에 한 번에 기록하고,
+퍼즐별 2차원 히스토그램(히트/미스 히트맵)을 갱신합니다.
+요청 스레드는 검증 후 리스트에 붙이기만 하므로 디스크 I/O를 기다리지 않습니다.
+서버 재시작 후에는 flush 스레드가 기존 세그먼트를 한 번만 읽어 모든 퍼즐의 히트맵을 복원합니다.
+"""
+
+import os
+import time
+import fcntl
+import atexit
+import threading
+import numpy as np
+from pathlib import Path
+
+# 버퍼가 이 개수를 넘으면 즉시 flush, 아니면 FLUSH_INTERVAL초마다 flush
+FLUSH_SIZE = int(os.getenv("CLICK_FLUSH_SIZE", 5000))
+FLUSH_INTERVAL = float(os.getenv("CLICK_FLUSH_INTERVAL", 2.0))
+# flush가 밀려 버퍼가 이만큼 쌓이면 새 이벤트를 거절 (메모리 보호)
+MAX_BUFFERED = 500_000
+# 한 요청에 담을 수 있는 최대 이벤트 수
+MAX_BATCH_EVENTS = 1000
+# 세그먼트 파일 최대 크기 (넘으면 다음 번호로)
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+# 히트맵 한 칸 크기 (이미지 px)
+HEATMAP_CELL = 16
+DEFAULT_IMAGE_SIZE = (1024, 1024)
+
+SEGMENT_HEADER = "ts,puzzle_id,x,y,hit,difference_id\n"
+
+
+class ClickIngestError(Exception):
+    """클릭 이벤트 형식 오류"""
+
+
+def parse_event(event: dict, puzzle_id: str = None, now: float = None) -> tuple:
+    """
+    클라이언트 이벤트 → (ts, puzzle_id, x, y, hit, difference_id) 튜플.
+    ts는 초 단위 epoch (ms 단위로 보내도 자동 변환), 없으면 수신 시각.
+    """
+    try:
+        pid = str(event.get("puzzle_id") or puzzle_id or "")
+        x, y = float(event["x"]), float(event["y"])
+        ts = float(event.get("t") or event.get("ts") or now or time.time())
+        difference_id = int(event.get("difference_id") or 0)
+    except (KeyError, TypeError, ValueError, AttributeError):
+        raise ClickIngestError(f"잘못된 클릭 이벤트: {event!r}")
+    if not pid or not pid.replace("_", "").replace("-", "").isalnum():
+        raise ClickIngestError("puzzle_id가 필요합니다")
+    if ts > 1e11:
+        ts /= 1000.0
+    return ts, pid, x, y, bool(event.get("hit")), difference_id
+
+
+class ClickHeatmap:
+    """퍼즐 하나의 클릭 히스토그램 (0 = 미스, 1 = 히트)"""
+
+    __slots__ = ("cell", "width", "height", "counts")
+
+    def __init__(self, width: int, height: int, cell: int = HEATMAP_CELL):
+        self.cell = cell
+        self.width, self.height = width, height
+        self.counts = np.zeros((2, -(-height // cell), -(-width // cell)), dtype=np.uint32)
+
+    def add(self, xs: np.ndarray, ys: np.ndarray, hits: np.ndarray):
+        inside = (xs >= 0) & (ys >= 0) & (xs < self.width) & (ys < self.height)
+        cx = (xs[inside] // self.cell).astype(np.intp)
+        cy = (ys[inside] // self.cell).astype(np.intp)
+        np.add.at(self.counts, (hits[inside].astype(np.intp), cy, cx), 1)
+
+    def to_dict(self) -> dict:
+        return {
+            "cell": self.cell,
+            "width": self.width,
+            "height": self.height,
+            "hits": self.counts[1].tolist(),
+            "misses": self.counts[0].tolist(),
+            "total_hits": int(self.counts[1].sum()),
+            "total_misses": int(self.counts[0].sum()),
+        }
+
+
+class ClickIngestor:
+    """
+    클릭 이벤트 버퍼 + 백그라운드 flush 스레드.
+    size_resolver(puzzle_id) -> (width, height)로 히트맵 크기를 정합니다. None을 반환하면 (삭제되었거나 저장소에 없는 퍼즐)
+    그 퍼즐의 이벤트는 버립니다.
+    is_known(puzzle_id) -> bool을 넘기면 카탈로그에 없는 퍼즐의 이벤트는 거절합니다 (히트맵이 무한히 늘지 않도록).
+    listener(events)를 등록하면 flush마다 같은 배치를 넘겨받습니다 (통계 집계 등).
+    """
+
+    def __init__(self, directory: Path, size_resolver=None, is_known=None,
+                 flush_size: int = FLUSH_SIZE, flush_interval: float = FLUSH_INTERVAL):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.size_resolver = size_resolver or (lambda puzzle_id: DEFAULT_IMAGE_SIZE)
+        self.is_known = is_known or (lambda puzzle_id: True)
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.buffer = []
+        self.lock = threading.Lock()
+        self.flush_lock = threading.RLock()
+        self.wakeup = threading.Event()
+        self.heatmaps = {}
+        # 기존 세그먼트 재생은 프로세스당 한 번 (끝나기 전의 히트맵 조회는 기다림)
+        self.replay_lock = threading.Lock()
+        self.replayed = False
+        self.listeners = []
+        self.stats = {"accepted": 0, "rejected": 0, "dropped": 0, "flushed": 0, "flushes": 0, "last_flush_ms": 0.0}
+        self.segment_path = None
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="click-ingest", daemon=True)
+            self.thread.start()
+            atexit.register(self.flush)
+        return self
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def submit(self, events: list, puzzle_id: str = None) -> int:
+        """이벤트 배치를 검증해서 버퍼에 추가하고, 받은 개수를 반환"""
+        if len(events) > MAX_BATCH_EVENTS:
+            raise ClickIngestError(f"한 번에 최대 {MAX_BATCH_EVENTS}개까지 보낼 수 있습니다")
+        now = time.time()
+        parsed = [parse_event(e, puzzle_id, now) for e in events]
+        unknown = [pid for pid in {event[1] for event in parsed} if not self.is_known(pid)]
+        if unknown:
+            raise ClickIngestError(f"알 수 없는 퍼즐입니다: {', '.join(sorted(unknown))}")
+        with self.lock:
+            if len(self.buffer) + len(parsed) > MAX_BUFFERED:
+                self.stats["rejected"] += len(parsed)
+                raise ClickIngestError("클릭 버퍼가 가득 찼습니다. 잠시 후 다시 보내주세요")
+            self.buffer.extend(parsed)
+            self.stats["accepted"] += len(parsed)
+            full = len(self.buffer) >= self.flush_size
+        if full:
+            self.wakeup.set()
+        return len(parsed)
+
+    def _run(self):
+        try:
+            self.replay()
+        except Exception as e:
+            print(f"Click replay error: {e}")
+        while True:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Click flush error: {e}")
+
+    def flush(self) -> int:
+        """버퍼를 비우고 세그먼트 파일 기록 + 히트맵 갱신"""
+        with self.flush_lock:
+            with self.lock:
+                events, self.buffer = self.buffer, []
+            if not events:
+                return 0
+            start = time.perf_counter()
+            kept = self._update_heatmaps(events)
+            self.stats["dropped"] += len(events) - len(kept)
+            events = kept
+            if not events:
+                return 0
+            self._write_segment(events)
+            for listener in self.listeners:
+                listener(events)
+            self.stats["flushed"] += len(events)
+            self.stats["flushes"] += 1
+            self.stats["last_flush_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            return len(events)
+
+    def _write_segment(self, events: list):
+        path = self._current_segment()
+        lines = "".join(f"{ts:.3f},{pid},{x:.1f},{y:.1f},{int(hit)},{diff}\n"
+                        for ts, pid, x, y, hit, diff in events)
+        with open(path, "a", encoding="utf-8") as f:
+            # 여러 워커가 같은 세그먼트에 붙여 쓰므로 배치 단위로 잠금 (줄이 섞이지 않도록)
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.write(lines)
+            f.flush()
+
+    def _current_segment(self) -> Path:
+        """날짜별 세그먼트 파일, 크기 제한을 넘으면 번호를 올림"""
+        day = time.strftime("%Y%m%d")
+        path = self.segment_path
+        if path is None or not path.name.startswith(f"clicks-{day}-") or path.stat().st_size >= SEGMENT_MAX_BYTES:
+            seq = 0
+            while True:
+                path = self.directory / f"clicks-{day}-{seq:03d}.csv"
+                if not path.exists() or path.stat().st_size < SEGMENT_MAX_BYTES:
+                    break
+                seq += 1
+            if not path.exists():
+                # 헤더를 쓴 임시 파일을 link로 붙여서, 다른 워커가 헤더 없는 파일에 먼저 쓰는 일이 없게 함
+                tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+                tmp_path.write_text(SEGMENT_HEADER, encoding="utf-8")
+                try:
+                    os.link(tmp_path, path)
+                except FileExistsError:
+                    pass
+                tmp_path.unlink()
+            self.segment_path = path
+        return path
+
+    def _update_heatmaps(self, events: list) -> list:
+        """히트맵을 갱신하고, 크기를 알 수 없는 퍼즐의 이벤트를 뺀 목록 반환"""
+        _, pids, xs, ys, hits, _ = zip(*events)
+        pids = np.array(pids)
+        xs, ys, hits = np.array(xs), np.array(ys), np.array(hits, dtype=bool)
+        dropped = set()
+        for pid in np.unique(pids):
+            heatmap = self._heatmap(str(pid))
+            if heatmap is None:
+                dropped.add(str(pid))
+                continue
+            selected = pids == pid
+            heatmap.add(xs[selected], ys[selected], hits[selected])
+        return [event for event in events if event[1] not in dropped] if dropped else events
+
+    def heatmap(self, puzzle_id: str):
+        """퍼즐 히트맵 (크기를 알 수 없는 퍼즐이면 None)"""
+        self.replay()
+        with self.flush_lock:
+            return self._heatmap(puzzle_id)
+
+    def _heatmap(self, puzzle_id: str):
+        """flush_lock 안에서 호출"""
+        heatmap = self.heatmaps.get(puzzle_id)
+        if heatmap is None:
+            try:
+                size = self.size_resolver(puzzle_id)
+            except Exception:
+                size = DEFAULT_IMAGE_SIZE
+            if size is None:
+                return None
+            width, height = size
+            heatmap = self.heatmaps[puzzle_id] = ClickHeatmap(int(width), int(height))
+        return heatmap
+
+    def replay(self):
+        """
+        서버 재시작 후 기존 세그먼트에서 모든 퍼즐의 히트맵을 한 번에 복원.
+        세그먼트 크기만 잠금 안에서 기록하고 읽기는 잠금 밖에서 하므로 그동안에도 flush가 막히지 않습니다.
+        (기록한 크기까지는 재생 결과로, 그 뒤에 flush된 이벤트는 새 히트맵으로 세고 마지막에 합침)
+        """
+        if self.replayed:
+            return
+        with self.replay_lock:
+            if self.replayed:
+                return
+            with self.flush_lock:
+                offsets = [(path, path.stat().st_size) for path in sorted(self.directory.glob("clicks-*.csv"))]
+                self.heatmaps = {}
+
+            columns = {}
+            for path, size in offsets:
+                with open(path, "rb") as f:
+                    data = f.read(size)
+                # 다른 워커가 쓰는 중인 마지막 줄은 제외
+                for line in data[:data.rfind(b"\n") + 1].decode("utf-8").splitlines()[1:]:
+                    try:
+                        _, pid, x, y, hit, _ = line.split(",")
+                        xs, ys, hits = columns.setdefault(pid, ([], [], []))
+                        xs.append(float(x))
+                        ys.append(float(y))
+                        hits.append(hit == "1")
+                    except ValueError:
+                        continue
+
+            with self.flush_lock:
+                for pid, (xs, ys, hits) in columns.items():
+                    heatmap = self._heatmap(pid) if self.is_known(pid) else None
+                    if heatmap is not None:
+                        heatmap.add(np.array(xs), np.array(ys), np.array(hits, dtype=bool))
+                self.replayed = True
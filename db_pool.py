@@ -0,0 +1,76 @@
+"""
+DB 연결 풀 (프로세스별)
+요청마다 MySQL에 새로 접속하지 않도록 다 쓴 연결을 모아 두었다가 재사용합니다.
+기존 코드처럼 conn.close()를 부르면 실제로 끊지 않고 풀에 돌려놓습니다.
+pre-fork WSGI 서버에서 부모 프로세스의 소켓을 자식이 나눠 쓰지 않도록, 프로세스 ID가 바뀌면 풀을 비우고 새로 만듭니다.
+"""
+
+import os
+import threading
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 8))
+
+
+class PooledConnection:
+    """pymysql 연결 래퍼 - close()는 풀 반납, 나머지 속성은 원래 연결로 전달"""
+
+    def __init__(self, pool: "ConnectionPool", conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.release(conn)
+
+
+class ConnectionPool:
+    def __init__(self, factory, size: int = DB_POOL_SIZE):
+        self.factory = factory
+        self.size = size
+        self.idle = []
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def _check_fork(self):
+        """fork 뒤 처음 사용할 때 부모에게 물려받은 연결은 닫지 않고 버림 (소켓은 부모 것)"""
+        if self.pid != os.getpid():
+            self.idle = []
+            self.pid = os.getpid()
+
+    def connect(self) -> PooledConnection:
+        with self.lock:
+            self._check_fork()
+            conn = self.idle.pop() if self.idle else None
+        if conn is not None:
+            try:
+                conn.ping(reconnect=True)
+                self.reused += 1
+                return PooledConnection(self, conn)
+            except Exception:
+                pass
+        conn = self.factory()
+        self.created += 1
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        try:
+            # 커밋하지 않은 트랜잭션(읽기 스냅샷 포함)을 끝내고 반납
+            conn.rollback()
+        except Exception:
+            return
+        with self.lock:
+            self._check_fork()
+            if len(self.idle) < self.size:
+                self.idle.append(conn)
+                return
+        conn.close()
+
+    def metrics(self) -> dict:
+        with self.lock:
+            return {"idle": len(self.idle), "size": self.size, "created": self.created, "reused": self.reused}
@@ -0,0 +1,239 @@
+"""
+차이점별 발견 통계 (난이도 보정용)
+플레이가 끝날 때마다 퍼즐/차이점별 발견율과 발견 시간 분포를 누적합니다.
+발견 시간은 로그 간격 버킷 스케치(상대 오차 약 5%)에 모으므로
+플레이 수가 늘어도 차이점 하나당 메모리는 일정합니다 (버킷 배열 하나).
+"""
+
+import os
+import math
+import json
+import fcntl
+import threading
+import numpy as np
+from pathlib import Path
+from datetime import datetime
+
+from generator.asset_publish import create_staging, publish_version
+
+# 스케치 범위 (초) / 버킷 간격 (이웃 버킷 경계 비율)
+SKETCH_MIN_SECONDS = 0.1
+SKETCH_MAX_SECONDS = 3600.0
+SKETCH_GAMMA = 1.1
+SKETCH_BUCKETS = int(math.ceil(math.log(SKETCH_MAX_SECONDS / SKETCH_MIN_SECONDS, SKETCH_GAMMA))) + 1
+
+# 보정에 필요한 최소 플레이 수
+MIN_CALIBRATION_PLAYS = 30
+# 기대 발견 시간(중앙값 / 발견율, 초) 경계 → 난이도 1~5
+DIFFICULTY_THRESHOLDS = (8.0, 15.0, 30.0, 60.0)
+
+
+class FindTimeSketch:
+    """로그 버킷 히스토그램 기반 분위수 스케치"""
+
+    __slots__ = ("counts",)
+
+    def __init__(self, counts=None):
+        self.counts = np.zeros(SKETCH_BUCKETS, dtype=np.uint32) if counts is None \
+            else np.asarray(counts, dtype=np.uint32)
+
+    @staticmethod
+    def bucket(seconds: float) -> int:
+        seconds = min(max(seconds, SKETCH_MIN_SECONDS), SKETCH_MAX_SECONDS)
+        return int(math.log(seconds / SKETCH_MIN_SECONDS, SKETCH_GAMMA))
+
+    def add(self, seconds: float):
+        self.counts[self.bucket(seconds)] += 1
+
+    def merge(self, other: "FindTimeSketch"):
+        self.counts += other.counts
+
+    @property
+    def count(self) -> int:
+        return int(self.counts.sum())
+
+    def quantile(self, q: float):
+        """q 분위수 (버킷 기하 평균값), 데이터가 없으면 None"""
+        total = self.count
+        if total == 0:
+            return None
+        index = int(np.searchsorted(np.cumsum(self.counts), q * total, side="left"))
+        index = min(index, SKETCH_BUCKETS - 1)
+        return SKETCH_MIN_SECONDS * SKETCH_GAMMA ** (index + 0.5)
+
+
+class DifferenceStats:
+    __slots__ = ("found", "times")
+
+    def __init__(self, found: int = 0, counts=None):
+        self.found = found
+        self.times = FindTimeSketch(counts)
+
+    def summary(self, plays: int) -> dict:
+        return {
+            "found": self.found,
+            "find_rate": round(self.found / plays, 3) if plays else None,
+            "p25": _round(self.times.quantile(0.25)),
+            "median": _round(self.times.quantile(0.5)),
+            "p90": _round(self.times.quantile(0.9)),
+        }
+
+
+def _round(value):
+    return round(value, 1) if value is not None else None
+
+
+def _add_play(plays: dict, differences: dict, puzzle_id: str, found_times: dict):
+    plays[puzzle_id] = plays.get(puzzle_id, 0) + 1
+    stats = differences.setdefault(puzzle_id, {})
+    for difference_id, seconds in found_times.items():
+        diff = stats.get(int(difference_id))
+        if diff is None:
+            diff = stats[int(difference_id)] = DifferenceStats()
+        diff.found += 1
+        diff.times.add(float(seconds))
+
+def _merge(plays: dict, differences: dict, other_plays: dict, other_differences: dict):
+    """다른 통계를 더함 (버킷 배열은 복사)"""
+    for puzzle_id, count in other_plays.items():
+        plays[puzzle_id] = plays.get(puzzle_id, 0) + count
+    for puzzle_id, other_stats in other_differences.items():
+        stats = differences.setdefault(puzzle_id, {})
+        for difference_id, other in other_stats.items():
+            diff = stats.get(difference_id)
+            if diff is None:
+                stats[difference_id] = DifferenceStats(other.found, other.times.counts.copy())
+            else:
+                diff.found += other.found
+                diff.times.merge(other.times)
+
+
+class FindStatsStore:
+    """
+    퍼즐별 플레이 수 + 차이점별 통계.
+    여러 프로세스(WSGI 워커)가 같은 파일을 쓰므로, 저장할 때는 파일 잠금 안에서
+    디스크 스냅샷에 마지막 저장 이후 이 프로세스가 받은 플레이(pending)만 더해서 씁니다.
+    """
+
+    def __init__(self, path: Path = None):
+        self.path = Path(path) if path else None
+        self.plays = {}
+        self.differences = {}
+        self.pending_plays = {}
+        self.pending_differences = {}
+        self.lock = threading.Lock()
+        if self.path and self.path.exists():
+            self.plays, self.differences = self._read()
+
+    def record_play(self, puzzle_id: str, found_times: dict):
+        """
+        플레이 한 번 반영.
+        found_times: {차이점 ID: 플레이 시작부터 발견까지 걸린 초}, 찾지 못한 차이점은 빠짐
+        """
+        with self.lock:
+            _add_play(self.plays, self.differences, puzzle_id, found_times)
+            if self.path:
+                _add_play(self.pending_plays, self.pending_differences, puzzle_id, found_times)
+
+    def summary(self, puzzle_id: str) -> dict:
+        with self.lock:
+            plays = self.plays.get(puzzle_id, 0)
+            return {
+                "plays": plays,
+                "differences": {str(k): v.summary(plays)
+                                for k, v in sorted(self.differences.get(puzzle_id, {}).items())},
+            }
+
+    def calibrated_difficulty(self, puzzle_id: str, difference_id: int):
+        """기대 발견 시간으로 난이도 1~5 계산 (한 번도 못 찾았으면 5)"""
+        plays = self.plays.get(puzzle_id, 0)
+        diff = self.differences.get(puzzle_id, {}).get(difference_id)
+        if diff is None or diff.found == 0:
+            return 5
+        expected = diff.times.quantile(0.5) / (diff.found / plays)
+        return 1 + sum(expected > t for t in DIFFICULTY_THRESHOLDS)
+
+    def calibrate(self, puzzle_dir_for, min_plays: int = MIN_CALIBRATION_PLAYS) -> list:
+        """
+        플레이 수가 충분한 퍼즐의 answer.json 난이도를 보정해 새 버전으로 발행하고, 바뀐 퍼즐 ID 목록을 반환.
+        (answer.<version>.json을 읽는 클라이언트도 보정 결과를 받도록 answer.json을 직접 고치지 않음)
+        puzzle_dir_for(puzzle_id) -> 퍼즐 폴더 경로 (평면/샤드 배치에 따라 다름)
+        처음 보정할 때 원래(LLM) 난이도는 llm_difficulty로 남겨 둡니다.
+        """
+        changed = []
+        for puzzle_id in sorted(self.plays):
+            answer_path = Path(puzzle_dir_for(puzzle_id)) / "answer.json"
+            if self.plays[puzzle_id] < min_plays or not answer_path.exists():
+                continue
+            with open(answer_path, "r", encoding="utf-8") as f:
+                answer_data = json.load(f)
+            summary = self.summary(puzzle_id)
+            updated = False
+            for diff in answer_data.get("differences", []):
+                with self.lock:
+                    difficulty = self.calibrated_difficulty(puzzle_id, diff["id"])
+                stats = summary["differences"].get(str(diff["id"]))
+                diff.setdefault("llm_difficulty", diff.get("difficulty"))
+                diff["find_rate"] = stats["find_rate"] if stats else 0.0
+                diff["median_find_seconds"] = stats["median"] if stats else None
+                if diff.get("difficulty") != difficulty:
+                    diff["difficulty"] = difficulty
+                    updated = True
+            if not updated:
+                continue
+            answer_data["difficulty_calibrated_at"] = datetime.now().isoformat()
+            answer_data["calibration_plays"] = summary["plays"]
+            publish_version(answer_path.parent, create_staging(answer_path.parent), answer_data)
+            changed.append(puzzle_id)
+        return changed
+
+    def save(self):
+        """디스크 스냅샷 + 미저장 플레이를 저장하고, 다른 프로세스가 저장한 플레이도 메모리에 반영"""
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_name(f".{self.path.name}.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            plays, differences = self._read() if self.path.exists() else ({}, {})
+            with self.lock:
+                pending = (self.pending_plays, self.pending_differences)
+                self.pending_plays, self.pending_differences = {}, {}
+            _merge(plays, differences, *pending)
+            snapshot = {
+                puzzle_id: {
+                    "plays": count,
+                    "differences": {
+                        str(k): {"found": v.found, "counts": v.times.counts.tolist()}
+                        for k, v in differences.get(puzzle_id, {}).items()
+                    },
+                }
+                for puzzle_id, count in plays.items()
+            }
+            tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"buckets": SKETCH_BUCKETS, "puzzles": snapshot}, f, separators=(",", ":"))
+            tmp_path.replace(self.path)
+        with self.lock:
+            # 저장하는 동안 들어온 플레이는 아직 pending에 남아 있음
+            _merge(plays, differences, self.pending_plays, self.pending_differences)
+            self.plays, self.differences = plays, differences
+
+    def _read(self) -> tuple:
+        with open(self.path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        if snapshot.get("buckets") != SKETCH_BUCKETS:
+            print(f"Find stats snapshot ignored: bucket layout changed ({self.path})")
+            return {}, {}
+        plays, differences = {}, {}
+        for puzzle_id, entry in snapshot["puzzles"].items():
+            plays[puzzle_id] = entry["plays"]
+            differences[puzzle_id] = {
+                int(k): DifferenceStats(v["found"], v["counts"]) for k, v in entry["differences"].items()
+            }
+        return plays, differences
+
+if __name__ == "__main__":
+    import sys
+    store = FindStatsStore(Path(__file__).parent / "analytics" / "find_stats.json")
+    for puzzle_id in sys.argv[1:] or sorted(store.plays):
+        print(puzzle_id, json.dumps(store.summary(puzzle_id), ensure_ascii=False))
@@ -0,0 +1,407 @@
+"""
+진행 중인 게임 세션 저장소
+game_logic.js의 gameData.state(찾은 차이점, 오답 수, 힌트 수, 시작 시각)를 서버에 둡니다.
+세션 하나는 __slots__ 객체이고 찾은 차이점은 정수 비트셋이라 작게 유지되며 (세션당 수백 바이트),
+만료는 타이머 휠로 처리하므로 생성/갱신/만료가 모두 O(1)입니다.
+서버 종료 시 스냅샷을 저장해 두면 재시작 후 (모든 워커에서) 이어서 플레이할 수 있습니다.
+
+SessionStore는 프로세스 메모리에 세션을 두므로 워커 하나(개발 서버, workers=1)에서만 쓸 수 있습니다.
+gunicorn 워커 여러 개로 띄울 때는 같은 세션의 요청이 어느 워커로 갈지 모르므로
+모든 워커가 같은 game_sessions 테이블을 보는 DbSessionStore를 씁니다 (SESSION_STORE=db, 기본값).
+"""
+
+import os
+import json
+import time
+import fcntl
+import atexit
+import secrets
+import threading
+from pathlib import Path
+
+# 마지막 요청 후 이 시간이 지나면 세션 만료 (초)
+SESSION_TTL = int(os.getenv("SESSION_TTL", 30 * 60))
+# 타이머 휠 한 칸 시간 (초). DB 저장소는 만료 시각을 이 간격보다 자주 갱신하지 않음
+WHEEL_TICK = 5
+# memory: 프로세스 메모리 (워커 1개 전용) / db: game_sessions 테이블 (워커 여러 개)
+SESSION_STORE = os.getenv("SESSION_STORE", "db")
+
+CREATE_SESSIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS game_sessions (
+    id CHAR(24) PRIMARY KEY,
+    puzzle_id VARCHAR(64) NOT NULL,
+    found_at TEXT NOT NULL,
+    wrong_clicks INT NOT NULL DEFAULT 0,
+    hints_used INT NOT NULL DEFAULT 0,
+    started DOUBLE NOT NULL,
+    expires_at DOUBLE NOT NULL,
+    INDEX idx_game_sessions_expires (expires_at)
+)
+"""
+
+
+class SessionError(Exception):
+    """세션 요청 오류 (HTTP 상태 코드 포함)"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class GameSession:
+    """플레이 한 번의 상태. found는 차이점 ID 비트셋, found_at은 (ID, 경과 초) 목록"""
+
+    __slots__ = ("session_id", "puzzle_id", "found", "found_at", "wrong_clicks", "hints_used",
+                 "started", "expires_tick")
+
+    def __init__(self, session_id: str, puzzle_id: str, started: float):
+        self.session_id = session_id
+        self.puzzle_id = puzzle_id
+        self.found = 0
+        self.found_at = None
+        self.wrong_clicks = 0
+        self.hints_used = 0
+        self.started = started
+        self.expires_tick = 0
+
+    def is_found(self, difference_id: int) -> bool:
+        return bool(self.found >> difference_id & 1)
+
+    def mark_found(self, difference_id: int, elapsed: float):
+        self.found |= 1 << difference_id
+        if self.found_at is None:
+            self.found_at = []
+        self.found_at.append((difference_id, round(elapsed, 2)))
+
+    def found_ids(self) -> list:
+        return [d for d, _ in self.found_at or ()]
+
+    def to_dict(self) -> dict:
+        return {
+            "session_id": self.session_id,
+            "puzzle_id": self.puzzle_id,
+            "found": self.found_ids(),
+            "wrong_clicks": self.wrong_clicks,
+            "hints_used": self.hints_used,
+            "elapsed": round(time.time() - self.started, 1),
+        }
+
+    def to_row(self) -> list:
+        return [self.session_id, self.puzzle_id, self.found_at or [], self.wrong_clicks,
+                self.hints_used, self.started]
+
+    @classmethod
+    def from_row(cls, session_id, puzzle_id, found_at, wrong_clicks, hints_used, started):
+        session = cls(session_id, puzzle_id, started)
+        for difference_id, elapsed in found_at:
+            session.mark_found(difference_id, elapsed)
+        session.wrong_clicks, session.hints_used = wrong_clicks, hints_used
+        return session
+
+
+# 세션 상태 변경 - 저장소가 같은 세션에 대해 한 번에 하나씩 실행되도록 보장 (메모리: lock, DB: 행 잠금)
+
+def _mark_found(session: GameSession, difference_id: int, elapsed: float):
+    """처음 찾은 차이점이면 기록하고 찾은 개수 반환, 이미 찾았으면 None"""
+    if session.is_found(difference_id):
+        return None
+    session.mark_found(difference_id, elapsed)
+    return len(session.found_at)
+
+def _add_wrong_click(session: GameSession) -> int:
+    session.wrong_clicks += 1
+    return session.wrong_clicks
+
+def _use_hint(session: GameSession, max_hints: int):
+    """힌트 하나 사용 후 남은 개수 반환, 다 썼으면 None"""
+    if session.hints_used >= max_hints:
+        return None
+    session.hints_used += 1
+    return max_hints - session.hints_used
+
+
+class SessionStore:
+    """
+    세션 저장소 + 타이머 휠.
+    휠의 각 칸은 그 시각에 만료될 세션 ID 집합이고, 요청이 올 때마다 세션을 새 칸으로 옮깁니다.
+    """
+
+    def __init__(self, ttl: int = SESSION_TTL, tick: int = WHEEL_TICK, snapshot_path: Path = None):
+        self.ttl = ttl
+        self.tick = tick
+        self.slots = [set() for _ in range(-(-ttl // tick) + 1)]
+        self.current_tick = int(time.time() // tick)
+        self.sessions = {}
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        """만료 스레드 시작 + 스냅샷 복원 (fork 뒤 워커마다 호출)"""
+        if self.thread is None:
+            if self.snapshot_path:
+                self.load_snapshot()
+            self.thread = threading.Thread(target=self._run, name="session-expiry", daemon=True)
+            self.thread.start()
+            if self.snapshot_path:
+                atexit.register(self.save_snapshot)
+        return self
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def _schedule(self, session: GameSession, now: float):
+        """세션을 (현재 + TTL) 칸으로 옮김 - lock 안에서 호출"""
+        expires_tick = int((now + self.ttl) // self.tick)
+        if session.expires_tick == expires_tick:
+            return
+        if session.expires_tick:
+            self.slots[session.expires_tick % len(self.slots)].discard(session.session_id)
+        session.expires_tick = expires_tick
+        self.slots[expires_tick % len(self.slots)].add(session.session_id)
+
+    def create(self, puzzle_id: str) -> GameSession:
+        now = time.time()
+        session = GameSession(secrets.token_hex(12), puzzle_id, now)
+        with self.lock:
+            self.sessions[session.session_id] = session
+            self._schedule(session, now)
+        return session
+
+    def get(self, session_id: str) -> GameSession:
+        """세션 조회 + 만료 시각 연장"""
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                raise SessionError("세션이 없거나 만료되었습니다", 404)
+            self._schedule(session, time.time())
+        return session
+
+    def remove(self, session_id: str) -> GameSession:
+        """세션을 꺼내서 반환 (동시에 두 번 끝내도 한 요청만 세션을 받음)"""
+        with self.lock:
+            session = self.sessions.pop(session_id, None)
+            if session is None:
+                raise SessionError("세션이 없거나 만료되었습니다", 404)
+            self.slots[session.expires_tick % len(self.slots)].discard(session_id)
+        return session
+
+    # 같은 세션에 요청이 동시에 와도 확인과 갱신이 한 번에 일어나도록 상태 변경은 lock 안에서 합니다.
+
+    def mark_found(self, session: GameSession, difference_id: int, elapsed: float):
+        with self.lock:
+            return _mark_found(session, difference_id, elapsed)
+
+    def add_wrong_click(self, session: GameSession) -> int:
+        with self.lock:
+            return _add_wrong_click(session)
+
+    def use_hint(self, session: GameSession, max_hints: int):
+        with self.lock:
+            return _use_hint(session, max_hints)
+
+    def expire(self, now: float = None) -> int:
+        """지나간 휠 칸의 세션을 만료시키고 만료된 개수 반환"""
+        target = int((now or time.time()) // self.tick)
+        expired = 0
+        with self.lock:
+            # 오래 멈춰 있었다면 휠 한 바퀴만 돌면 충분함
+            start = max(self.current_tick + 1, target - len(self.slots) + 1)
+            for tick in range(start, target + 1):
+                slot = self.slots[tick % len(self.slots)]
+                for session_id in [s for s in slot if self.sessions[s].expires_tick <= target]:
+                    slot.discard(session_id)
+                    del self.sessions[session_id]
+                    expired += 1
+            self.current_tick = max(self.current_tick, target)
+        return expired
+
+    def _run(self):
+        while True:
+            time.sleep(self.tick)
+            self.expire()
+
+    # ------------------------------------------------------------
+    # 스냅샷 (서버 종료 시 저장, 시작 시 복원)
+    # ------------------------------------------------------------
+
+    def _snapshot_lock(self):
+        """여러 워커가 같은 스냅샷 파일을 읽고 쓰므로 파일 잠금 (with 블록 동안 유지)"""
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.snapshot_path.with_name(f".{self.snapshot_path.name}.lock"), "a")
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+
+    def save_snapshot(self):
+        with self.lock:
+            rows = {s.session_id: s.to_row() + [s.expires_tick] for s in self.sessions.values()}
+        with self._snapshot_lock():
+            # 먼저 종료한 다른 워커의 세션과 합침 - 모든 워커가 같은 스냅샷을 복원했으므로
+            # 같은 세션이 여럿이면 마지막 요청이 가장 늦은(만료가 가장 늦은) 쪽을 남김
+            if self.snapshot_path.exists():
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    snapshot = json.load(f)
+                if snapshot["tick"] == self.tick:
+                    for row in snapshot["sessions"]:
+                        if row[0] not in rows or rows[row[0]][-1] < row[-1]:
+                            rows[row[0]] = row
+            now_tick = int(time.time() // self.tick)
+            rows = [row for row in rows.values() if row[-1] > now_tick]
+            tmp_path = self.snapshot_path.with_name(f".{self.snapshot_path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"tick": self.tick, "sessions": rows}, f, separators=(",", ":"))
+            tmp_path.replace(self.snapshot_path)
+        print(f"Saved {len(rows)} game sessions to {self.snapshot_path}")
+
+    def load_snapshot(self):
+        """
+        스냅샷 복원. 다음 요청이 어느 워커로 갈지 모르므로 파일은 지우지 않고 모든 워커가 전부 복원합니다.
+        (종료 시 save_snapshot이 세션 ID 기준으로 합치고 만료된 세션은 버림)
+        """
+        with self._snapshot_lock():
+            if not self.snapshot_path.exists():
+                return
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        now_tick = int(time.time() // self.tick)
+        for session_id, puzzle_id, found_at, wrong_clicks, hints_used, started, expires_tick in snapshot["sessions"]:
+            if expires_tick * snapshot["tick"] <= now_tick * self.tick:
+                continue
+            session = GameSession.from_row(session_id, puzzle_id, found_at, wrong_clicks, hints_used, started)
+            with self.lock:
+                self.sessions[session_id] = session
+                self._schedule(session, time.time())
+
+
+class DbSessionStore:
+    """
+    game_sessions 테이블 세션 저장소 (SessionStore와 같은 인터페이스, 모든 워커가 공유).
+    상태 변경은 행을 SELECT ... FOR UPDATE로 잠근 트랜잭션 안에서 하므로 워커가 달라도 힌트/클릭이 겹치지 않습니다.
+    만료는 expires_at으로 판단하고, 지난 행은 백그라운드 스레드가 주기적으로 지웁니다.
+    """
+
+    def __init__(self, connect, ttl: int = SESSION_TTL, tick: int = WHEEL_TICK, cleanup_interval: float = 60):
+        self.connect = connect
+        self.ttl = ttl
+        self.tick = tick
+        self.cleanup_interval = cleanup_interval
+        self.table_ready = False
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="session-expiry", daemon=True)
+            self.thread.start()
+        return self
+
+    def _ensure_table(self, cursor):
+        if not self.table_ready:
+            cursor.execute(CREATE_SESSIONS_TABLE)
+            self.table_ready = True
+
+    def _cursor_do(self, work):
+        """work(cursor) 실행 후 커밋 (예외면 롤백)"""
+        conn = self.connect()
+        try:
+            with conn.cursor() as cursor:
+                self._ensure_table(cursor)
+                result = work(cursor)
+            conn.commit()
+            return result
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _from_row(row: dict) -> GameSession:
+        return GameSession.from_row(row["id"], row["puzzle_id"], json.loads(row["found_at"]),
+                                    row["wrong_clicks"], row["hints_used"], row["started"])
+
+    def __len__(self):
+        def work(cursor):
+            cursor.execute("SELECT COUNT(*) AS cnt FROM game_sessions WHERE expires_at > %s", (time.time(),))
+            return cursor.fetchone()["cnt"]
+        return self._cursor_do(work)
+
+    def create(self, puzzle_id: str) -> GameSession:
+        now = time.time()
+        session = GameSession(secrets.token_hex(12), puzzle_id, now)
+        self._cursor_do(lambda cursor: cursor.execute(
+            "INSERT INTO game_sessions (id, puzzle_id, found_at, started, expires_at) VALUES (%s, %s, '[]', %s, %s)",
+            (session.session_id, puzzle_id, now, now + self.ttl)))
+        return session
+
+    def get(self, session_id: str) -> GameSession:
+        """세션 조회 + 만료 시각 연장 (tick보다 자주 쓰지 않음)"""
+        now = time.time()
+
+        def work(cursor):
+            cursor.execute("UPDATE game_sessions SET expires_at = %s WHERE id = %s AND expires_at > %s "
+                           "AND expires_at < %s", (now + self.ttl, session_id, now, now + self.ttl - self.tick))
+            cursor.execute("SELECT * FROM game_sessions WHERE id = %s AND expires_at > %s", (session_id, now))
+            return cursor.fetchone()
+        row = self._cursor_do(work)
+        if row is None:
+            raise SessionError("세션이 없거나 만료되었습니다", 404)
+        return self._from_row(row)
+
+    def _locked(self, cursor, session_id: str) -> GameSession:
+        cursor.execute("SELECT * FROM game_sessions WHERE id = %s AND expires_at > %s FOR UPDATE",
+                       (session_id, time.time()))
+        row = cursor.fetchone()
+        if row is None:
+            raise SessionError("세션이 없거나 만료되었습니다", 404)
+        return self._from_row(row)
+
+    def remove(self, session_id: str) -> GameSession:
+        """세션을 꺼내서 반환 (동시에 두 번 끝내도 한 요청만 세션을 받음)"""
+        def work(cursor):
+            session = self._locked(cursor, session_id)
+            cursor.execute("DELETE FROM game_sessions WHERE id = %s", (session_id,))
+            return session
+        return self._cursor_do(work)
+
+    def _modify(self, session: GameSession, change):
+        """잠근 행을 다시 읽어 change(session)을 적용하고 저장, change의 반환값 반환"""
+        def work(cursor):
+            current = self._locked(cursor, session.session_id)
+            result = change(current)
+            cursor.execute("UPDATE game_sessions SET found_at = %s, wrong_clicks = %s, hints_used = %s WHERE id = %s",
+                           (json.dumps(current.found_at or []), current.wrong_clicks, current.hints_used,
+                            current.session_id))
+            return result
+        return self._cursor_do(work)
+
+    def mark_found(self, session: GameSession, difference_id: int, elapsed: float):
+        return self._modify(session, lambda s: _mark_found(s, difference_id, elapsed))
+
+    def add_wrong_click(self, session: GameSession) -> int:
+        return self._modify(session, _add_wrong_click)
+
+    def use_hint(self, session: GameSession, max_hints: int):
+        return self._modify(session, lambda s: _use_hint(s, max_hints))
+
+    def expire(self, now: float = None) -> int:
+        """만료된 세션 행 삭제 후 삭제한 개수 반환"""
+        return self._cursor_do(lambda cursor: cursor.execute(
+            "DELETE FROM game_sessions WHERE expires_at <= %s", (now or time.time(),)))
+
+    def _run(self):
+        while True:
+            time.sleep(self.cleanup_interval)
+            try:
+                self.expire()
+            except Exception as e:
+                print(f"Session cleanup error: {e}")
+
+
+def create_session_store(connect, snapshot_path: Path = None, kind: str = None):
+    """SESSION_STORE 설정에 맞는 세션 저장소"""
+    kind = kind or SESSION_STORE
+    if kind == "db":
+        return DbSessionStore(connect)
+    if kind == "memory":
+        return SessionStore(snapshot_path=snapshot_path)
+    raise ValueError(f"알 수 없는 SESSION_STORE: {kind}")
@@ -0,0 +1,143 @@
+"""
+퍼즐 생성 작업 (업로드/재생성/재편집) 진행 상황
+작업마다 이벤트 파일(JSON 한 줄씩)을 하나 두고, 생성기 서브프로세스에는 PROGRESS_FILE로 그 경로를 넘깁니다.
+서버는 queued/done/failed를, 생성기는 단계별 stage/progress 이벤트를 같은 파일에 덧붙입니다 (generator/progress.py).
+파일이 공유 폴더에 있으므로 작업을 실행한 워커가 아닌 다른 워커도 같은 작업을 SSE로 흘려보낼 수 있습니다.
+이벤트 id는 파일의 줄 번호(1부터)이고, SSE 재접속 시 Last-Event-ID 다음 줄부터 이어서 보냅니다.
+"""
+
+import os
+import json
+import time
+import secrets
+import threading
+from pathlib import Path
+
+from generator.progress import append_event
+
+# 이벤트 파일을 확인하는 주기 (SSE로 구독 중인 작업만, 초)
+JOB_POLL_INTERVAL = 0.2
+# 끝난 작업 이벤트 파일 보관 기간 (초)
+JOB_RETENTION = int(os.getenv("JOB_RETENTION", 24 * 3600))
+TERMINAL_EVENTS = ("done", "failed")
+
+
+class JobError(Exception):
+    """작업 요청 오류 (HTTP 상태 코드 포함)"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class JobStore:
+    def __init__(self, root: Path, retention: int = JOB_RETENTION):
+        self.root = Path(root)
+        self.retention = retention
+
+    def path(self, job_id: str) -> Path:
+        if not job_id.isalnum():
+            raise JobError("Job not found", 404)
+        return self.root / f"{job_id}.jsonl"
+
+    def create(self, kind: str, puzzle_id: str) -> str:
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._purge()
+        job_id = secrets.token_hex(8)
+        append_event(self.path(job_id), "queued", kind=kind, puzzle_id=puzzle_id)
+        return job_id
+
+    def env(self, job_id: str) -> dict:
+        """생성기 서브프로세스 환경변수 (PROGRESS_FILE로 이벤트 파일 전달)"""
+        return {**os.environ, "PROGRESS_FILE": str(self.path(job_id))}
+
+    def run(self, job_id: str, target, background: bool = False):
+        """target() 실행 후 done(result) / failed(error) 기록. background면 스레드에서 실행하고 바로 반환"""
+        def work():
+            try:
+                result = target()
+            except Exception as e:
+                append_event(self.path(job_id), "failed", error=str(e))
+                raise
+            append_event(self.path(job_id), "done", result=result)
+            return result
+
+        if not background:
+            return work()
+
+        def work_logged():
+            try:
+                work()
+            except Exception as e:
+                print(f"⚠️ 생성 작업 {job_id} 실패: {e}")
+        threading.Thread(target=work_logged, name=f"job-{job_id}", daemon=True).start()
+        return None
+
+    def _purge(self):
+        cutoff = time.time() - self.retention
+        for path in self.root.glob("*.jsonl"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except FileNotFoundError:
+                pass
+
+    # ------------------------------------------------------------
+    # 조회 / 구독
+    # ------------------------------------------------------------
+
+    def read(self, job_id: str, line_no: int = 0, offset: int = 0) -> tuple:
+        """offset 바이트(line_no번째 줄 끝)부터 이벤트 [(id, event), ...]와 다음에 읽을 (line_no, offset)"""
+        try:
+            with open(self.path(job_id), "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            raise JobError("Job not found", 404)
+        # 마지막 줄이 아직 쓰는 중이면 다음에 읽음
+        complete = data[:data.rfind(b"\n") + 1]
+        events = [(line_no + i, json.loads(line)) for i, line in enumerate(complete.splitlines(), 1)]
+        return events, (line_no + len(events), offset + len(complete))
+
+    def status(self, job_id: str) -> dict:
+        events = [event for _, event in self.read(job_id)[0]]
+        state = "running"
+        if events[-1]["event"] in TERMINAL_EVENTS:
+            state = events[-1]["event"]
+        elif len(events) == 1:
+            state = "queued"
+        return {"job_id": job_id, "state": state, **{k: events[0][k] for k in ("kind", "puzzle_id")},
+                "events": events}
+
+    def follow(self, job_id: str, after: int = 0, timeout: float = 600, heartbeat: float = 15):
+        """
+        after번째 이후 이벤트를 (id, event)로 하나씩 내보내다가 done/failed에서 끝남.
+        새 이벤트가 없으면 heartbeat초마다 (None, None)을 내보내 연결 유지, timeout이 지나면 종료.
+        """
+        events, (line_no, offset) = self.read(job_id)
+        deadline = time.monotonic() + timeout
+        last_sent = time.monotonic()
+        while True:
+            for event_id, event in events:
+                if event_id <= after:
+                    continue
+                yield event_id, event
+                last_sent = time.monotonic()
+                if event["event"] in TERMINAL_EVENTS:
+                    return
+            if events and events[-1][1]["event"] in TERMINAL_EVENTS:
+                return
+            # 파일 크기만 확인하다가 늘어났을 때만 읽음
+            while True:
+                if time.monotonic() >= deadline:
+                    return
+                time.sleep(JOB_POLL_INTERVAL)
+                try:
+                    if self.path(job_id).stat().st_size > offset:
+                        break
+                except FileNotFoundError:
+                    return
+                if time.monotonic() - last_sent >= heartbeat:
+                    yield None, None
+                    last_sent = time.monotonic()
+            events, (line_no, offset) = self.read(job_id, line_no, offset)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+퍼즐 버전 발행 (내용 해시 파일명 + 원자적 교체)
+새 버전의 파일을 스테이징 폴더에 모두 만든 뒤, 내용 해시를 붙인 이름(original.3fa2c1d94b7e.jpg)으로 옮기고
+마지막에 answer.json을 os.replace로 한 번에 교체합니다.
+해시 파일은 절대 덮어쓰지 않으므로 오래 캐시해도 되고, 교체 도중에도 플레이어는 항상 한 버전의 짝만 보게 됩니다.
+이전 버전 파일은 versions.json에 기록해 두었다가 유예 시간이 지나면 삭제합니다.
+
+사용법 (이전 버전 정리):
+    python3 generator/asset_publish.py gc [퍼즐ID ...] [--grace 초]
+"""
+
+import os
+import re
+import json
+import time
+import fcntl
+import shutil
+import hashlib
+import argparse
+import contextlib
+from pathlib import Path
+
+ASSET_HASH_LENGTH = 12
+# 해시 파일명: <이름>.<해시 12자리>.<확장자>
+HASHED_NAME = re.compile(r"^(?P<stem>[\w.-]+?)\.(?P<hash>[0-9a-f]{12})\.(?P<ext>[A-Za-z0-9]+)$")
+# 이전 버전 파일 보관 시간 (게임 중인 플레이어가 옛 버전을 끝까지 볼 수 있도록)
+VERSION_GRACE_SECONDS = int(os.getenv("VERSION_GRACE_SECONDS", 24 * 60 * 60))
+VERSIONS_FILENAME = "versions.json"
+STAGING_PREFIX = ".staging-"
+# answer.json에서 파일명을 담는 필드
+ASSET_FIELDS = ("original_image", "modified_image", "mask_image", "modified_delta")
+# 해시 없는 이름으로도 접근하는 기존 화면(대시보드 썸네일 등)용 별칭
+LEGACY_ALIASES = {"original_image": "original.jpg", "modified_image": "modified.jpg"}
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()[:ASSET_HASH_LENGTH]
+
+def hashed_name(path: Path) -> str:
+    path = Path(path)
+    return f"{path.stem}.{file_hash(path)}{path.suffix}"
+
+def is_hashed_name(name: str) -> bool:
+    return HASHED_NAME.match(name) is not None
+
+def create_staging(puzzle_dir: Path) -> Path:
+    staging = Path(puzzle_dir) / f"{STAGING_PREFIX}{os.getpid()}-{time.time_ns()}"
+    staging.mkdir(parents=True)
+    return staging
+
+def stage_existing(staging: Path, source: Path, name: str):
+    """이미 발행된 파일을 스테이징에 연결 (하드링크, 안 되면 복사)"""
+    try:
+        os.link(source, staging / name)
+    except OSError:
+        shutil.copy2(source, staging / name)
+
+def referenced_files(puzzle_dir: Path, answer_data: dict) -> set:
+    """answer.json 한 버전이 참조하는 파일 이름들 (델타 매니페스트가 참조하는 아틀라스 포함)"""
+    names = {answer_data[k] for k in ASSET_FIELDS if answer_data.get(k)}
+    if answer_data.get("version"):
+        names.add(f"answer.{answer_data['version']}.json")
+    delta_name = answer_data.get("modified_delta")
+    if delta_name and (Path(puzzle_dir) / delta_name).exists():
+        with open(Path(puzzle_dir) / delta_name, "r", encoding="utf-8") as f:
+            delta = json.load(f)
+        names.update(v for k, v in delta.items() if k in ("base", "atlas"))
+    return names
+
+def write_json_atomic(path: Path, data: dict, indent: int = 2):
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    os.replace(tmp_path, path)
+
+@contextlib.contextmanager
+def file_lock(path: Path):
+    """여러 프로세스(WSGI 워커, 생성기, 감시 데몬)가 같은 파일을 고칠 때 쓰는 배타 잠금 (.<이름>.lock)"""
+    path = Path(path)
+    with open(path.with_name(f".{path.name}.lock"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def publish_version(puzzle_dir: Path, staging: Path, answer_data: dict) -> str:
+    """
+    스테이징 폴더의 파일을 해시 이름으로 옮기고 answer.json을 원자적으로 교체합니다.
+    answer_data의 파일명 필드를 해시 이름으로 바꾸고 version을 기록한 뒤 버전 ID를 반환합니다.
+    """
+    puzzle_dir = Path(puzzle_dir)
+    answer_path = puzzle_dir / "answer.json"
+    previous = None
+    if answer_path.exists():
+        with open(answer_path, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+
+    # 1. 이미지/마스크 등 (JSON 매니페스트는 다른 파일 이름을 참조하므로 나중에)
+    renames = {}
+    staged = sorted(p for p in staging.iterdir() if p.is_file())
+    for path in [p for p in staged if p.suffix != ".json"] + [p for p in staged if p.suffix == ".json"]:
+        if path.suffix == ".json":
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            manifest = {k: renames.get(v, v) if isinstance(v, str) else v for k, v in manifest.items()}
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, separators=(",", ":"))
+        target = puzzle_dir / hashed_name(path)
+        if target.exists():
+            # 같은 내용이 이미 발행되어 있음
+            path.unlink()
+        else:
+            os.replace(path, target)
+        renames[path.name] = target.name
+
+    for key in ASSET_FIELDS:
+        if answer_data.get(key) in renames:
+            answer_data[key] = renames[answer_data[key]]
+
+    # 2. 버전 ID = 파일명이 확정된 정답 데이터의 해시
+    answer_data.pop("version", None)
+    serialized = json.dumps(answer_data, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    version = hashlib.sha256(serialized).hexdigest()[:ASSET_HASH_LENGTH]
+    answer_data["version"] = version
+    snapshot_path = puzzle_dir / f"answer.{version}.json"
+    if not snapshot_path.exists():
+        write_json_atomic(snapshot_path, answer_data)
+
+    # 3. 버전 포인터 교체 (이 시점부터 새 버전)
+    write_json_atomic(answer_path, answer_data)
+    shutil.rmtree(staging, ignore_errors=True)
+
+    for key, alias in LEGACY_ALIASES.items():
+        if answer_data.get(key) and answer_data[key] != alias:
+            if (puzzle_dir / alias).exists() and os.path.samefile(puzzle_dir / alias, puzzle_dir / answer_data[key]):
+                continue
+            alias_tmp = puzzle_dir / f".{alias}.{os.getpid()}.tmp"
+            stage_existing(alias_tmp.parent, puzzle_dir / answer_data[key], alias_tmp.name)
+            os.replace(alias_tmp, puzzle_dir / alias)
+
+    # 4. 이전 버전 파일 목록 기록 후 유예 시간이 지난 것 정리
+    if previous and previous.get("version") != version:
+        retired = referenced_files(puzzle_dir, previous) - referenced_files(puzzle_dir, answer_data)
+        versions = load_versions(puzzle_dir)
+        versions["retired"].append({
+            "version": previous.get("version"),
+            "retired_at": time.time(),
+            "files": sorted(n for n in retired if is_hashed_name(n)),
+        })
+        versions["current"] = version
+        write_json_atomic(puzzle_dir / VERSIONS_FILENAME, versions)
+    collect_garbage(puzzle_dir)
+    return version
+
+def load_versions(puzzle_dir: Path) -> dict:
+    path = Path(puzzle_dir) / VERSIONS_FILENAME
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {"current": None, "retired": []}
+
+def collect_garbage(puzzle_dir: Path, grace_seconds: int = VERSION_GRACE_SECONDS) -> list:
+    """유예 시간이 지난 이전 버전 파일과 중단된 스테이징 폴더 삭제, 삭제한 이름 목록 반환"""
+    puzzle_dir = Path(puzzle_dir)
+    cutoff = time.time() - grace_seconds
+    versions = load_versions(puzzle_dir)
+    answer_path = puzzle_dir / "answer.json"
+    live = set()
+    if answer_path.exists():
+        with open(answer_path, "r", encoding="utf-8") as f:
+            live = referenced_files(puzzle_dir, json.load(f))
+
+    removed = []
+    keep = []
+    for entry in versions["retired"]:
+        if entry["retired_at"] > cutoff:
+            keep.append(entry)
+            continue
+        for name in entry["files"]:
+            path = puzzle_dir / name
+            if name not in live and path.exists():
+                path.unlink()
+                removed.append(name)
+    if len(keep) != len(versions["retired"]):
+        versions["retired"] = keep
+        write_json_atomic(puzzle_dir / VERSIONS_FILENAME, versions)
+
+    for staging in puzzle_dir.glob(f"{STAGING_PREFIX}*"):
+        if staging.is_dir() and staging.stat().st_mtime < cutoff:
+            shutil.rmtree(staging, ignore_errors=True)
+            removed.append(staging.name)
+    return removed
+
+
+if __name__ == "__main__":
+    try:
+        from generate_puzzle import OUTPUT_DIR
+    except ImportError:
+        OUTPUT_DIR = Path(__file__).parent.parent / "puzzles"
+    from puzzle_store import iter_puzzle_dirs, puzzle_path
+
+    parser = argparse.ArgumentParser(description="퍼즐 버전 파일 정리")
+    parser.add_argument("command", choices=["gc"])
+    parser.add_argument("puzzle_ids", nargs="*")
+    parser.add_argument("--grace", type=int, default=VERSION_GRACE_SECONDS, help="이전 버전 보관 시간 (초)")
+    args = parser.parse_args()
+
+    puzzle_ids = args.puzzle_ids or sorted(
+        puzzle_id for puzzle_id, p in iter_puzzle_dirs(OUTPUT_DIR) if (p / "answer.json").exists())
+    total = 0
+    for puzzle_id in puzzle_ids:
+        removed = collect_garbage(puzzle_path(OUTPUT_DIR, puzzle_id), args.grace)
+        total += len(removed)
+        if removed:
+            print(f"🧹 {puzzle_id}: {len(removed)}개 삭제")
+    print(f"✅ 정리 완료: {total}개 파일 삭제")
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+퍼즐 에셋 저장소 (로컬 디스크 / S3 호환 오브젝트 스토리지)
+생성기는 항상 OUTPUT_DIR에 퍼즐을 만들고 발행(asset_publish)한 뒤, 저장소가 원격이면 퍼즐 폴더를 그대로 올립니다.
+서버는 이미지 요청을 저장소 URL(공개 CDN 주소 또는 pre-signed URL)로 리다이렉트하므로
+앱 서버가 이미지 바이트를 직접 내보내지 않고, 여러 서버가 같은 버킷을 공유할 수 있습니다.
+
+ASSET_STORAGE=local(기본) 이면 지금처럼 OUTPUT_DIR의 파일을 그대로 사용합니다.
+ASSET_STORAGE=s3 이면 boto3가 필요합니다 (pip install boto3). MinIO 등은 S3_ENDPOINT_URL로 지정합니다.
+
+사용법 (기존 퍼즐 전체 업로드 / 동기화):
+    python3 generator/asset_storage.py sync [퍼즐ID ...]
+"""
+
+import os
+import json
+import shutil
+import argparse
+import functools
+import mimetypes
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+except ImportError:
+    boto3 = None
+
+try:
+    from .asset_publish import is_hashed_name
+except ImportError:
+    from asset_publish import is_hashed_name
+
+ASSET_STORAGE = os.getenv("ASSET_STORAGE", "local")
+S3_BUCKET = os.getenv("S3_BUCKET", "")
+S3_PREFIX = os.getenv("S3_PREFIX", "puzzles")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+S3_REGION = os.getenv("S3_REGION") or None
+# 버킷 앞에 CDN/공개 주소가 있으면 pre-signed URL 대신 이 주소로 리다이렉트
+S3_PUBLIC_URL = os.getenv("S3_PUBLIC_URL", "").rstrip("/")
+PRESIGN_EXPIRES = int(os.getenv("PRESIGN_EXPIRES", 3600))
+# 동시에 올리는 파일 수 / 큰 파일 멀티파트 기준과 조각 크기
+STORAGE_MAX_WORKERS = int(os.getenv("STORAGE_MAX_WORKERS", 8))
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MUTABLE_CACHE_CONTROL = "no-cache"
+
+
+def cache_control_for(name: str) -> str:
+    """해시 파일명은 내용이 바뀌지 않으므로 오래 캐시, answer.json 등 포인터 파일은 매번 확인"""
+    return IMMUTABLE_CACHE_CONTROL if is_hashed_name(name) else MUTABLE_CACHE_CONTROL
+
+
+class AssetStorage:
+    """저장소 공통 인터페이스. key는 puzzles 폴더 기준 상대 경로 (예: i900/answer.json)"""
+
+    remote = False
+
+    def put_file(self, key: str, path: Path):
+        raise NotImplementedError
+
+    def read_bytes(self, key: str):
+        """파일 내용, 없으면 None"""
+        raise NotImplementedError
+
+    def list_keys(self, prefix: str) -> list:
+        raise NotImplementedError
+
+    def delete(self, keys: list):
+        raise NotImplementedError
+
+    def url(self, key: str):
+        """클라이언트가 직접 받아갈 주소 (None이면 서버가 직접 제공)"""
+        return None
+
+    def read_json(self, key: str):
+        data = self.read_bytes(key)
+        return json.loads(data) if data is not None else None
+
+    def put_files(self, items: list):
+        """[(key, path), ...] 병렬 업로드"""
+        if not items:
+            return
+        with ThreadPoolExecutor(max_workers=min(STORAGE_MAX_WORKERS, len(items))) as pool:
+            for future in [pool.submit(self.put_file, key, path) for key, path in items]:
+                future.result()
+
+
+class LocalStorage(AssetStorage):
+    """OUTPUT_DIR 그대로 사용 (생성기가 이미 이 폴더에 쓰므로 업로드는 같은 경로면 아무 일도 안 함)"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def put_file(self, key: str, path: Path):
+        target = self.root / key
+        if Path(path).absolute() == target.absolute():
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, target)
+
+    def read_bytes(self, key: str):
+        try:
+            return (self.root / key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def list_keys(self, prefix: str) -> list:
+        base = self.root / prefix
+        if not base.exists():
+            return []
+        return sorted(p.relative_to(self.root).as_posix() for p in base.rglob("*") if p.is_file())
+
+    def delete(self, keys: list):
+        for key in keys:
+            (self.root / key).unlink(missing_ok=True)
+
+
+class S3Storage(AssetStorage):
+    """S3 호환 버킷 (AWS S3, MinIO, R2 등). 자격 증명은 boto3 기본 방식(AWS_ACCESS_KEY_ID 등)을 따름"""
+
+    remote = True
+
+    def __init__(self, bucket: str = S3_BUCKET, prefix: str = S3_PREFIX, endpoint_url: str = S3_ENDPOINT_URL,
+                 region: str = S3_REGION, public_url: str = S3_PUBLIC_URL, client=None):
+        if client is None and boto3 is None:
+            raise RuntimeError("ASSET_STORAGE=s3 에는 boto3가 필요합니다 (pip install boto3)")
+        if not bucket:
+            raise RuntimeError("S3_BUCKET이 설정되지 않았습니다")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.public_url = public_url
+        self.client = client or boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+        self.transfer_config = TransferConfig(multipart_threshold=MULTIPART_THRESHOLD,
+                                              multipart_chunksize=MULTIPART_CHUNK_SIZE,
+                                              max_concurrency=STORAGE_MAX_WORKERS)
+
+    def object_key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def put_file(self, key: str, path: Path):
+        # upload_file은 큰 파일을 멀티파트로 나눠 스트리밍 업로드 (메모리에 통째로 올리지 않음)
+        name = Path(key).name
+        extra = {
+            "ContentType": mimetypes.guess_type(name)[0] or "application/octet-stream",
+            "CacheControl": cache_control_for(name),
+        }
+        self.client.upload_file(str(path), self.bucket, self.object_key(key),
+                                ExtraArgs=extra, Config=self.transfer_config)
+
+    def read_bytes(self, key: str):
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self.object_key(key))
+        except self.client.exceptions.NoSuchKey:
+            return None
+        return response["Body"].read()
+
+    def list_keys(self, prefix: str) -> list:
+        keys = []
+        strip = len(self.object_key(""))
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.object_key(prefix)):
+            keys.extend(item["Key"][strip:] for item in page.get("Contents", []))
+        return keys
+
+    def delete(self, keys: list):
+        # DeleteObjects는 한 번에 1000개까지
+        for start in range(0, len(keys), 1000):
+            objects = [{"Key": self.object_key(key)} for key in keys[start:start + 1000]]
+            self.client.delete_objects(Bucket=self.bucket, Delete={"Objects": objects, "Quiet": True})
+
+    def url(self, key: str):
+        if self.public_url:
+            return f"{self.public_url}/{self.object_key(key)}"
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": self.object_key(key)}, ExpiresIn=PRESIGN_EXPIRES)
+
+
+def create_storage(root: Path, kind: str = None) -> AssetStorage:
+    kind = kind or ASSET_STORAGE
+    if kind == "s3":
+        return S3Storage()
+    if kind == "local":
+        return LocalStorage(root)
+    raise ValueError(f"알 수 없는 ASSET_STORAGE: {kind}")
+
+
+@functools.lru_cache(maxsize=None)
+def get_storage(root: Path) -> AssetStorage:
+    """프로세스당 하나의 저장소 객체 (S3 클라이언트 재사용)"""
+    return create_storage(Path(root))
+
+
+def sync_puzzle(storage: AssetStorage, root: Path, puzzle_dir: Path) -> dict:
+    """
+    퍼즐 폴더를 저장소에 맞춤: 없는 해시 파일을 병렬로 올린 뒤 포인터 파일(answer.json 등)을 마지막에 올리고,
+    로컬에서 정리(GC)된 파일은 저장소에서도 삭제합니다. 로컬 저장소면 아무 일도 하지 않습니다.
+    """
+    if not storage.remote:
+        return {"uploaded": 0, "deleted": 0}
+    puzzle_dir = Path(puzzle_dir)
+    prefix = puzzle_dir.relative_to(root).as_posix()
+    existing = set(storage.list_keys(f"{prefix}/"))
+    local = {f"{prefix}/{p.name}": p for p in puzzle_dir.iterdir()
+             if p.is_file() and not p.name.startswith(".")}
+
+    # 해시 파일은 내용이 같으면 이름도 같으므로 이미 있으면 건너뜀
+    assets = [(key, path) for key, path in local.items() if is_hashed_name(path.name) and key not in existing]
+    pointers = [(key, path) for key, path in local.items() if not is_hashed_name(path.name)]
+    storage.put_files(assets)
+    storage.put_files([(key, path) for key, path in pointers if path.name != "answer.json"])
+    if f"{prefix}/answer.json" in local:
+        storage.put_file(f"{prefix}/answer.json", local[f"{prefix}/answer.json"])
+
+    stale = sorted(existing - local.keys())
+    storage.delete(stale)
+    return {"uploaded": len(assets) + len(pointers), "deleted": len(stale)}
+
+
+def fetch_puzzle(storage: AssetStorage, root: Path, puzzle_dir: Path) -> int:
+    """
+    sync_puzzle의 반대: 저장소의 퍼즐 폴더를 로컬로 내려받고 받은 파일 수를 반환합니다.
+    다른 노드가 만든 퍼즐을 이 노드의 생성기로 다시 편집할 때 사용합니다.
+    해시 파일은 로컬에 있으면 건너뛰고 포인터 파일은 항상 새로 받으며, answer.json은 마지막에 교체합니다.
+    로컬 저장소면 아무 일도 하지 않습니다.
+    """
+    if not storage.remote:
+        return 0
+    puzzle_dir = Path(puzzle_dir)
+    prefix = puzzle_dir.relative_to(root).as_posix()
+    names = [key[len(prefix) + 1:] for key in storage.list_keys(f"{prefix}/")]
+    names = [n for n in names if n and "/" not in n
+             and not (is_hashed_name(n) and (puzzle_dir / n).exists())]
+    names.sort(key=lambda n: n == "answer.json")
+    puzzle_dir.mkdir(parents=True, exist_ok=True)
+
+    def fetch(name: str) -> bool:
+        data = storage.read_bytes(f"{prefix}/{name}")
+        if data is None:
+            return False
+        tmp_path = puzzle_dir / f".{name}.{os.getpid()}.tmp"
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, puzzle_dir / name)
+        return True
+
+    pointer = names.pop() if names and names[-1] == "answer.json" else None
+    fetched = 0
+    if names:
+        with ThreadPoolExecutor(max_workers=min(STORAGE_MAX_WORKERS, len(names))) as pool:
+            fetched = sum(pool.map(fetch, names))
+    if pointer:
+        fetched += fetch(pointer)
+    return fetched
+
+
+if __name__ == "__main__":
+    try:
+        from update_manifest import OUTPUT_DIR
+    except ImportError:
+        OUTPUT_DIR = Path(__file__).parent.parent / "puzzles"
+    from puzzle_store import iter_puzzle_dirs, puzzle_path
+
+    parser = argparse.ArgumentParser(description="퍼즐 에셋 저장소 동기화")
+    parser.add_argument("command", choices=["sync"])
+    parser.add_argument("puzzle_ids", nargs="*")
+    args = parser.parse_args()
+
+    storage = get_storage(OUTPUT_DIR)
+    if not storage.remote:
+        print("ASSET_STORAGE=local - 동기화할 원격 저장소가 없습니다.")
+        raise SystemExit(0)
+    puzzle_dirs = [puzzle_path(OUTPUT_DIR, p) for p in args.puzzle_ids] or \
+        [p for _, p in iter_puzzle_dirs(OUTPUT_DIR) if (p / "answer.json").exists()]
+    for puzzle_dir in puzzle_dirs:
+        result = sync_puzzle(storage, OUTPUT_DIR, puzzle_dir)
+        print(f"☁️ {puzzle_dir.name}: {result['uploaded']}개 업로드, {result['deleted']}개 삭제")
+    if (OUTPUT_DIR / "manifest.json").exists():
+        storage.put_file("manifest.json", OUTPUT_DIR / "manifest.json")
+    print("✅ 동기화 완료")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+대용량 사진 리사이즈 벤치마크
+기존 방식(전체 해상도 디코딩 + LANCZOS)과 draft/reduce 축소 디코딩의
+이미지별 처리 시간과 최대 메모리 사용량을 비교합니다.
+
+사용법:
+    python3 generator/bench_resize.py <이미지 폴더> [--max-size 1024]
+"""
+
+import sys
+import time
+import resource
+import argparse
+import multiprocessing
+from pathlib import Path
+from PIL import Image
+
+from generate_puzzle import load_image_for_size
+
+def peak_rss_mb() -> float:
+    """현재 프로세스의 최대 RSS (MB)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 byte 단위
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def legacy_resize(image_path: str, max_size: int) -> Image.Image:
+    """기존 resize_image_if_needed 방식"""
+    with Image.open(image_path) as img:
+        width, height = img.size
+        ratio = min(max_size / width, max_size / height, 1.0)
+        new_size = (int(width * ratio), int(height * ratio))
+        return img.resize(new_size, Image.Resampling.LANCZOS)
+
+def measure(args: tuple) -> tuple:
+    """새 프로세스에서 한 번 실행하고 (초, 추가 메모리 MB, 결과 크기) 반환"""
+    mode, image_path, max_size = args
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "legacy":
+        result = legacy_resize(image_path, max_size)
+    else:
+        result = load_image_for_size(image_path, max_size)
+    result.load()
+    elapsed = time.perf_counter() - start
+    return elapsed, peak_rss_mb() - baseline, result.size
+
+def run_benchmark(image_dir: Path, max_size: int):
+    image_files = sorted(
+        f for f in image_dir.iterdir()
+        if f.suffix.lower() in (".jpg", ".jpeg", ".png") and not f.name.startswith(".")
+    )
+    if not image_files:
+        print(f"❌ {image_dir}에서 이미지를 찾을 수 없습니다.")
+        return
+
+    # 측정마다 새 프로세스를 띄워 최대 RSS가 서로 섞이지 않게 함
+    ctx = multiprocessing.get_context("spawn")
+
+    print(f"{'이미지':<28}{'원본 크기':>12}{'기존(ms)':>10}{'기존(MB)':>10}{'draft(ms)':>11}{'draft(MB)':>11}")
+    totals = {"legacy": [0.0, 0.0], "draft": [0.0, 0.0]}
+    for image_path in image_files:
+        with Image.open(image_path) as img:
+            size_label = f"{img.width}x{img.height}"
+        row = {}
+        for mode in ("legacy", "draft"):
+            with ctx.Pool(1) as pool:
+                elapsed, mem, _ = pool.apply(measure, ((mode, str(image_path), max_size),))
+            row[mode] = (elapsed * 1000, mem)
+            totals[mode][0] += elapsed * 1000
+            totals[mode][1] = max(totals[mode][1], mem)
+        print(f"{image_path.name[:27]:<28}{size_label:>12}"
+              f"{row['legacy'][0]:>10.1f}{row['legacy'][1]:>10.1f}"
+              f"{row['draft'][0]:>11.1f}{row['draft'][1]:>11.1f}")
+
+    count = len(image_files)
+    print(f"\n📊 평균 시간: 기존 {totals['legacy'][0] / count:.1f}ms → draft {totals['draft'][0] / count:.1f}ms")
+    print(f"📊 최대 메모리: 기존 {totals['legacy'][1]:.1f}MB → draft {totals['draft'][1]:.1f}MB")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="대용량 사진 리사이즈 벤치마크")
+    parser.add_argument("image_dir", type=Path)
+    parser.add_argument("--max-size", type=int, default=1024)
+    args = parser.parse_args()
+    run_benchmark(args.image_dir, args.max_size)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+S3 호환 에셋 저장소 점검
+임시 퍼즐을 발행해서 S3Storage로 올리고 다른 폴더로 내려받으며 sync_puzzle/fetch_puzzle 동작을 확인합니다.
+  - 해시 파일/포인터 파일 업로드와 Cache-Control 헤더
+  - MULTIPART_THRESHOLD를 넘는 파일의 멀티파트 업로드
+  - pre-signed URL(또는 S3_PUBLIC_URL)로 내려받기
+  - 로컬에서 정리(GC)된 이전 버전 파일의 원격 삭제
+  - 퍼즐 폴더가 없는 다른 노드에서 fetch_puzzle로 같은 퍼즐 복원
+점검용 객체는 S3_PREFIX 아래 check-<시각>/ 에 만들고 끝나면 지웁니다.
+
+사용법:
+    python3 generator/check_storage.py --moto     # moto 서버를 띄워서 점검 (pip install "moto[server]" boto3)
+    S3_BUCKET=puzzles S3_ENDPOINT_URL=http://localhost:9000 python3 generator/check_storage.py   # MinIO 등
+"""
+
+import os
+import sys
+import time
+import socket
+import logging
+import shutil
+import argparse
+import tempfile
+import urllib.request
+from pathlib import Path
+
+from asset_publish import create_staging, publish_version, collect_garbage, is_hashed_name
+from asset_storage import (S3Storage, S3_BUCKET, MULTIPART_THRESHOLD, IMMUTABLE_CACHE_CONTROL,
+                           MUTABLE_CACHE_CONTROL, sync_puzzle, fetch_puzzle)
+
+MOTO_BUCKET = "puzzle-assets-check"
+
+def start_moto() -> str:
+    """로컬 moto S3 서버를 띄우고 endpoint URL 반환"""
+    from moto.server import ThreadedMotoServer
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False).start()
+    for name in ("AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        os.environ.setdefault(name, "check")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    return f"http://127.0.0.1:{port}"
+
+def publish_sample(puzzle_dir: Path, mask: bytes) -> dict:
+    """멀티파트 크기의 원본 이미지 + 작은 마스크로 퍼즐 한 버전 발행"""
+    staging = create_staging(puzzle_dir)
+    original = staging / "original.jpg"
+    if not (puzzle_dir / "original.jpg").exists():
+        original.write_bytes(os.urandom(MULTIPART_THRESHOLD + 1024 * 1024))
+    else:
+        shutil.copy2(puzzle_dir / "original.jpg", original)
+    (staging / "mask.png").write_bytes(mask)
+    answer_data = {"original_image": "original.jpg", "mask_image": "mask.png", "differences": []}
+    publish_version(puzzle_dir, staging, answer_data)
+    return answer_data
+
+def local_files(puzzle_dir: Path) -> dict:
+    return {p.name: p.read_bytes() for p in puzzle_dir.iterdir() if p.is_file() and not p.name.startswith(".")}
+
+def run_checks(storage: S3Storage, work_dir: Path) -> list:
+    """[(점검 이름, 통과 여부), ...]"""
+    results = []
+    root, other_root = work_dir / "node-a", work_dir / "node-b"
+    puzzle_name = f"check-{time.time_ns()}"
+    puzzle_dir, other_dir = root / puzzle_name, other_root / puzzle_name
+    puzzle_dir.mkdir(parents=True)
+
+    first = publish_sample(puzzle_dir, b"mask-v1")
+    sync_puzzle(storage, root, puzzle_dir)
+    keys = set(storage.list_keys(f"{puzzle_name}/"))
+    results.append(("업로드", keys == {f"{puzzle_name}/{n}" for n in local_files(puzzle_dir)}))
+
+    def head(name: str) -> dict:
+        return storage.client.head_object(Bucket=storage.bucket, Key=storage.object_key(f"{puzzle_name}/{name}"))
+    results.append(("Cache-Control (해시 파일)", head(first["mask_image"]).get("CacheControl") == IMMUTABLE_CACHE_CONTROL))
+    results.append(("Cache-Control (answer.json)", head("answer.json").get("CacheControl") == MUTABLE_CACHE_CONTROL))
+    results.append(("멀티파트 업로드", "-" in head(first["original_image"])["ETag"]))
+
+    with urllib.request.urlopen(storage.url(f"{puzzle_name}/{first['mask_image']}"), timeout=10) as response:
+        results.append(("pre-signed URL 다운로드", response.read() == b"mask-v1"))
+
+    # 새 버전 발행 후 유예 시간 없이 GC → 이전 마스크가 저장소에서도 지워져야 함
+    second = publish_sample(puzzle_dir, b"mask-v2")
+    collect_garbage(puzzle_dir, grace_seconds=0)
+    result = sync_puzzle(storage, root, puzzle_dir)
+    keys = set(storage.list_keys(f"{puzzle_name}/"))
+    results.append(("이전 버전 원격 삭제", result["deleted"] > 0 and f"{puzzle_name}/{first['mask_image']}" not in keys))
+
+    fetched = fetch_puzzle(storage, other_root, other_dir)
+    results.append(("다른 노드로 내려받기", fetched > 0 and local_files(other_dir) == local_files(puzzle_dir)))
+    pointers = [n for n in local_files(other_dir) if not is_hashed_name(n)]
+    results.append(("해시 파일은 다시 받지 않음", fetch_puzzle(storage, other_root, other_dir) == len(pointers)))
+    results.append(("현재 마스크 읽기", storage.read_bytes(f"{puzzle_name}/{second['mask_image']}") == b"mask-v2"))
+
+    storage.delete(storage.list_keys(f"{puzzle_name}/"))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="S3 호환 에셋 저장소 점검")
+    parser.add_argument("--moto", action="store_true", help="로컬 moto S3 서버로 점검 (S3_* 환경변수 무시)")
+    args = parser.parse_args()
+
+    if args.moto:
+        import boto3
+        endpoint_url = start_moto()
+        boto3.client("s3", endpoint_url=endpoint_url).create_bucket(Bucket=MOTO_BUCKET)
+        storage = S3Storage(bucket=MOTO_BUCKET, endpoint_url=endpoint_url, public_url="")
+    else:
+        if not S3_BUCKET:
+            print("S3_BUCKET을 설정하거나 --moto로 실행하세요.")
+            raise SystemExit(2)
+        storage = S3Storage()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        results = run_checks(storage, Path(work_dir))
+    for name, ok in results:
+        print(f"{'✅' if ok else '❌'} {name}")
+    sys.exit(0 if all(ok for _, ok in results) else 1)
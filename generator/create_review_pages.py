@@ -1,9 +1,15 @@
 #!/usr/bin/env python3
 """기존 퍼즐에 대한 검수 페이지 생성"""
 
+import os
 import json
 from pathlib import Path
 
+try:
+    from .puzzle_store import iter_puzzle_dirs
+except ImportError:
+    from puzzle_store import iter_puzzle_dirs
+
 def generate_review_page(puzzle_dir: Path, answer_data: dict):
     """검수용 HTML 페이지 생성"""
     puzzle_id = answer_data["puzzle_id"]
@@ -340,6 +346,8 @@ def generate_review_page(puzzle_dir: Path, answer_data: dict):
         let isResizing = false;
         let currentHandle = null;
         let startX, startY, startLeft, startTop, startWidth, startHeight;
+        // bounding_box는 original 이미지 픽셀 좌표 (타일 모드는 1024보다 큼, 옛 answer.json은 1024 기준)
+        let imageWidth = 1024, imageHeight = 1024;
 
         async function initEditor() {{
             console.log('초기화 시작...');
@@ -349,6 +357,8 @@ def generate_review_page(puzzle_dir: Path, answer_data: dict):
                 
                 answerData = await response.json();
                 differences = answerData.differences;
+                imageWidth = answerData.image_width || 1024;
+                imageHeight = answerData.image_height || 1024;
                 console.log('데이터 로드 완료:', differences.length, '개 차이점');
                 
                 // Update Stats
@@ -438,10 +448,10 @@ def generate_review_page(puzzle_dir: Path, answer_data: dict):
                 {{x1: diff.bounding_box[0], y1: diff.bounding_box[1], x2: diff.bounding_box[2], y2: diff.bounding_box[3]}} : 
                 diff.bounding_box;
             
-            const left = (box.x1 / 1024) * 100;
-            const top = (box.y1 / 1024) * 100;
-            const width = ((box.x2 - box.x1) / 1024) * 100;
-            const height = ((box.y2 - box.y1) / 1024) * 100;
+            const left = (box.x1 / imageWidth) * 100;
+            const top = (box.y1 / imageHeight) * 100;
+            const width = ((box.x2 - box.x1) / imageWidth) * 100;
+            const height = ((box.y2 - box.y1) / imageHeight) * 100;
             
             el.style.left = left + '%';
             el.style.top = top + '%';
@@ -527,22 +537,22 @@ def generate_review_page(puzzle_dir: Path, answer_data: dict):
             const img = document.getElementById('original-img');
             const rect = img.getBoundingClientRect();
             
-            // Convert pixel movement to 1024 scale
-            const dx = (e.clientX - startX) * (1024 / rect.width);
-            const dy = (e.clientY - startY) * (1024 / rect.height);
+            // Convert pixel movement to image pixel scale
+            const dx = (e.clientX - startX) * (imageWidth / rect.width);
+            const dy = (e.clientY - startY) * (imageHeight / rect.height);
             
             let newBox = {{... (Array.isArray(diff.bounding_box) ? 
                 {{x1: diff.bounding_box[0], y1: diff.bounding_box[1], x2: diff.bounding_box[2], y2: diff.bounding_box[3]}} : 
                 diff.bounding_box)}};
 
             if (isDragging) {{
-                const x1 = Math.max(0, Math.min(1024 - startWidth, startLeft + dx));
-                const y1 = Math.max(0, Math.min(1024 - startHeight, startTop + dy));
+                const x1 = Math.max(0, Math.min(imageWidth - startWidth, startLeft + dx));
+                const y1 = Math.max(0, Math.min(imageHeight - startHeight, startTop + dy));
                 newBox = {{ x1, y1, x2: x1 + startWidth, y2: y1 + startHeight }};
             }} else if (isResizing) {{
-                if (currentHandle.includes('e')) newBox.x2 = Math.min(1024, startLeft + startWidth + dx);
+                if (currentHandle.includes('e')) newBox.x2 = Math.min(imageWidth, startLeft + startWidth + dx);
                 if (currentHandle.includes('w')) newBox.x1 = Math.max(0, Math.min(newBox.x2 - 10, startLeft + dx));
-                if (currentHandle.includes('s')) newBox.y2 = Math.min(1024, startTop + startHeight + dy);
+                if (currentHandle.includes('s')) newBox.y2 = Math.min(imageHeight, startTop + startHeight + dy);
                 if (currentHandle.includes('n')) newBox.y1 = Math.max(0, Math.min(newBox.y2 - 10, startTop + dy));
             }}
             
@@ -587,21 +597,25 @@ def generate_review_page(puzzle_dir: Path, answer_data: dict):
 </body>
 </html>"""
     
+    # 임시 파일에 쓴 뒤 교체 (열려 있는 검수 페이지가 반쯤 쓰인 파일을 읽지 않도록)
     review_path = puzzle_dir / "review.html"
-    with open(review_path, "w", encoding="utf-8") as f:
+    tmp_path = puzzle_dir / f".review.html.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
         f.write(html_content)
+    os.replace(tmp_path, review_path)
     
     print(f"✅ 검수 페이지 생성: {review_path}")
     return review_path
 
-# 모든 퍼즐에 대해 검수 페이지 생성
-puzzles_dir = Path("public/puzzles")
-for puzzle_dir in puzzles_dir.iterdir():
-    if puzzle_dir.is_dir() and (puzzle_dir / "answer.json").exists():
-        with open(puzzle_dir / "answer.json", "r", encoding="utf-8") as f:
-            answer_data = json.load(f)
-        review_path = generate_review_page(puzzle_dir, answer_data)
-        print(f"🌐 {puzzle_dir.name}: file://{review_path.absolute()}")
+if __name__ == "__main__":
+    # 모든 퍼즐에 대해 검수 페이지 생성
+    puzzles_dir = Path("public/puzzles")
+    for _, puzzle_dir in iter_puzzle_dirs(puzzles_dir):
+        if (puzzle_dir / "answer.json").exists():
+            with open(puzzle_dir / "answer.json", "r", encoding="utf-8") as f:
+                answer_data = json.load(f)
+            review_path = generate_review_page(puzzle_dir, answer_data)
+            print(f"🌐 {puzzle_dir.name}: file://{review_path.absolute()}")
 
-print(f"\n✨ 모든 검수 페이지 생성이 완료되었습니다.")
-print(f"📊 중앙 관리 대시보드: file://{Path('admin_dashboard.html').absolute()}")
+    print(f"\n✨ 모든 검수 페이지 생성이 완료되었습니다.")
+    print(f"📊 중앙 관리 대시보드: file://{Path('admin_dashboard.html').absolute()}")
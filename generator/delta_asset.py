@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+수정 이미지 델타 에셋
+modified.jpg 전체 대신, 원본과 달라진 타일만 모은 아틀라스 이미지(modified.delta.jpg)와
+타일 위치 목록(modified.delta.json)을 저장합니다. 수정 이미지는 original.jpg 위에 타일을 붙여 복원합니다.
+
+만들 때 실제 수정 이미지 디코딩 결과의 SHA-256(modified_sha256)을 저장하고, verify는 복원 결과를 실제 수정 이미지와 비교합니다.
+검증은 비트 단위가 아니라 허용 오차 기준입니다: 바뀌지 않은 타일은 original.jpg의 디코딩 결과라서 따로 인코딩된
+modified.jpg와 픽셀 값이 조금씩 다르고, 서버가 제공하는 복원 이미지도 다시 인코딩한 JPEG입니다.
+반경 1 블러 후 채널별 최대 차이가 VERIFY_TOLERANCE 이하면 통과이고, bench가 평균/최대 오차를 함께 보여줍니다.
+modified.jpg를 지운(--prune) 퍼즐은 비교할 대상이 없으므로 저장된 복원 결과 해시로 파일 손상만 확인합니다.
+--prune은 해시 파일과 modified.jpg 별칭을 모두 지우고 modified_image를 modified.jpg로 바꾼 새 버전을 발행합니다.
+이 이름은 관리 서버의 /puzzles/<ID>/modified.jpg가 원본 + 델타 타일로 복원해서 제공합니다.
+아틀라스는 4:4:4 JPEG이고 타일 크기가 8의 배수라서 각 타일의 디코딩 결과가 이웃 타일에 영향받지 않습니다.
+
+사용법:
+    python3 generator/delta_asset.py build  [퍼즐ID ...] [--lossless] [--prune]
+    python3 generator/delta_asset.py verify [퍼즐ID ...]
+    python3 generator/delta_asset.py bench  [퍼즐ID ...]
+"""
+
+import json
+import math
+import shutil
+import hashlib
+import argparse
+import numpy as np
+from pathlib import Path
+from PIL import Image, ImageFilter
+
+try:
+    from .asset_publish import create_staging, stage_existing, publish_version
+except ImportError:
+    from asset_publish import create_staging, stage_existing, publish_version
+
+DELTA_FORMAT = "tile-delta-v1"
+DELTA_MANIFEST = "modified.delta.json"
+# 타일 크기 (8의 배수여야 JPEG 블록 경계와 맞음)
+TILE_SIZE = 32
+ATLAS_QUALITY = 90
+# 정리(prune)한 퍼즐의 modified_image (파일 없이 서버가 복원해서 제공)
+PRUNED_MODIFIED_IMAGE = "modified.jpg"
+# 타일 안에서 이 값보다 크게 바뀐 픽셀이 있으면 변경 타일 (블러 후 채널별 최대 차이)
+DELTA_THRESHOLD = 12
+# verify 허용 오차 (복원 결과와 실제 수정 이미지의 블러 후 채널별 최대 차이)
+VERIFY_TOLERANCE = DELTA_THRESHOLD
+
+def changed_tiles(base: Image.Image, target: Image.Image, differences: list, tile_size: int = TILE_SIZE) -> list:
+    """
+    원본과 달라진 타일 좌표 [(tx, ty), ...] 반환.
+    차이점 박스가 있으면 박스(+ 한 타일 여백)에 걸친 타일만 후보로 봅니다.
+    """
+    width, height = base.size
+    a = np.asarray(base.filter(ImageFilter.GaussianBlur(1)), dtype=np.int16)
+    b = np.asarray(target.filter(ImageFilter.GaussianBlur(1)), dtype=np.int16)
+    changed = np.abs(a - b).max(axis=-1) > DELTA_THRESHOLD
+
+    cols, rows = -(-width // tile_size), -(-height // tile_size)
+    padded = np.zeros((rows * tile_size, cols * tile_size), dtype=bool)
+    padded[:height, :width] = changed
+    tile_changed = padded.reshape(rows, tile_size, cols, tile_size).any(axis=(1, 3))
+
+    if differences:
+        allowed = np.zeros_like(tile_changed)
+        for diff in differences:
+            box = diff["bounding_box"]
+            if isinstance(box, dict):
+                box = [box["x1"], box["y1"], box["x2"], box["y2"]]
+            x1, y1, x2, y2 = (int(round(v)) for v in box[:4])
+            allowed[max(0, min(y1, y2) // tile_size - 1):max(y1, y2) // tile_size + 2,
+                    max(0, min(x1, x2) // tile_size - 1):max(x1, x2) // tile_size + 2] = True
+        tile_changed &= allowed
+
+    ys, xs = np.nonzero(tile_changed)
+    return [(int(x), int(y)) for y, x in zip(ys, xs)]
+
+def apply_delta(base: Image.Image, atlas: Image.Image, manifest: dict) -> Image.Image:
+    """원본 위에 아틀라스 타일을 붙여 수정 이미지 복원"""
+    result = base.convert("RGB").copy()
+    tile_size, columns = manifest["tile_size"], manifest["atlas_columns"]
+    for i, (tx, ty) in enumerate(manifest["tiles"]):
+        ax, ay = (i % columns) * tile_size, (i // columns) * tile_size
+        # 이미지 가장자리 타일은 남는 부분을 잘라서 붙임
+        w = min(tile_size, result.width - tx * tile_size)
+        h = min(tile_size, result.height - ty * tile_size)
+        result.paste(atlas.crop((ax, ay, ax + w, ay + h)), (tx * tile_size, ty * tile_size))
+    return result
+
+def reconstruction_error(restored: Image.Image, modified: Image.Image) -> tuple:
+    """(평균 오차, 블러 후 최대 오차) - 채널별 절대 차이"""
+    a = np.asarray(restored.convert("RGB"), dtype=np.int16)
+    b = np.asarray(modified.convert("RGB"), dtype=np.int16)
+    blurred = np.abs(np.asarray(restored.filter(ImageFilter.GaussianBlur(1)), dtype=np.int16)
+                     - np.asarray(modified.filter(ImageFilter.GaussianBlur(1)), dtype=np.int16))
+    return float(np.abs(a - b).mean()), int(blurred.max())
+
+def image_digest(img: Image.Image) -> str:
+    return hashlib.sha256(img.convert("RGB").tobytes()).hexdigest()
+
+def load_answer(puzzle_dir: Path) -> dict:
+    with open(puzzle_dir / "answer.json", "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def build_delta(puzzle_dir: Path, answer_data: dict = None, modified: Image.Image = None,
+                lossless: bool = False, tile_size: int = TILE_SIZE) -> dict:
+    """
+    델타 에셋을 만들고 매니페스트를 반환합니다.
+    modified를 넘기지 않으면 퍼즐 폴더의 modified.jpg를 사용합니다.
+    """
+    puzzle_dir = Path(puzzle_dir)
+    answer_data = answer_data or load_answer(puzzle_dir)
+    base_name = answer_data.get("original_image", "original.jpg")
+    with Image.open(puzzle_dir / base_name) as img:
+        base = img.convert("RGB")
+    if modified is None:
+        with Image.open(puzzle_dir / answer_data.get("modified_image", "modified.jpg")) as img:
+            modified = img.convert("RGB")
+    else:
+        modified = modified.convert("RGB")
+    if modified.size != base.size:
+        modified = modified.resize(base.size, Image.Resampling.LANCZOS)
+
+    tiles = changed_tiles(base, modified, answer_data.get("differences", []), tile_size)
+    columns = max(1, math.ceil(math.sqrt(len(tiles))))
+    rows = max(1, math.ceil(len(tiles) / columns))
+    atlas = Image.new("RGB", (columns * tile_size, rows * tile_size))
+    for i, (tx, ty) in enumerate(tiles):
+        tile = modified.crop((tx * tile_size, ty * tile_size, (tx + 1) * tile_size, (ty + 1) * tile_size))
+        atlas.paste(tile, ((i % columns) * tile_size, (i // columns) * tile_size))
+
+    atlas_name = "modified.delta.png" if lossless else "modified.delta.jpg"
+    if lossless:
+        atlas.save(puzzle_dir / atlas_name, "PNG", optimize=True)
+    else:
+        atlas.save(puzzle_dir / atlas_name, "JPEG", quality=ATLAS_QUALITY, subsampling=0, optimize=True)
+
+    manifest = {
+        "format": DELTA_FORMAT,
+        "base": base_name,
+        "atlas": atlas_name,
+        "width": base.width,
+        "height": base.height,
+        "tile_size": tile_size,
+        "atlas_columns": columns,
+        "tiles": tiles,
+    }
+    # 검증 기준: 실제 수정 이미지의 디코딩 결과 (복원 결과 해시는 modified.jpg를 지운 뒤 파일 손상 확인용)
+    manifest["modified_sha256"] = image_digest(modified)
+    manifest["reconstruction_sha256"] = image_digest(reconstruct(puzzle_dir, manifest))
+    with open(puzzle_dir / DELTA_MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+    return manifest
+
+def manifest_name(puzzle_dir: Path) -> str:
+    """발행된 퍼즐은 answer.json의 modified_delta(해시 이름), 스테이징 폴더 등은 기본 이름"""
+    if (Path(puzzle_dir) / "answer.json").exists():
+        return load_answer(Path(puzzle_dir)).get("modified_delta") or DELTA_MANIFEST
+    return DELTA_MANIFEST
+
+def load_manifest(puzzle_dir: Path) -> dict:
+    with open(Path(puzzle_dir) / manifest_name(puzzle_dir), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def reconstruct(puzzle_dir: Path, manifest: dict = None) -> Image.Image:
+    """퍼즐 폴더의 원본 + 델타 아틀라스로 수정 이미지 복원"""
+    puzzle_dir = Path(puzzle_dir)
+    manifest = manifest or load_manifest(puzzle_dir)
+    with Image.open(puzzle_dir / manifest["base"]) as base, Image.open(puzzle_dir / manifest["atlas"]) as atlas:
+        return apply_delta(base, atlas.convert("RGB"), manifest)
+
+def verify_delta(puzzle_dir: Path, modified_path: Path = None) -> bool:
+    """
+    복원 결과를 실제 수정 이미지(modified_path, 기본은 answer.json의 modified_image)와 비교합니다.
+    비트 단위로 같거나, 블러 후 최대 오차가 VERIFY_TOLERANCE 이하면 통과 (비트 단위 일치는 보장하지 않음).
+    수정 이미지가 없으면(--prune 후) 복원 결과가 만들 때와 같은지만 확인합니다.
+    """
+    puzzle_dir = Path(puzzle_dir)
+    manifest = load_manifest(puzzle_dir)
+    restored = reconstruct(puzzle_dir, manifest)
+    if modified_path is None:
+        modified_path = puzzle_dir / load_answer(puzzle_dir).get("modified_image", "modified.jpg")
+    if not Path(modified_path).exists():
+        return image_digest(restored) == manifest.get("reconstruction_sha256")
+    with Image.open(modified_path) as img:
+        modified = img.convert("RGB")
+    if modified.size != restored.size:
+        modified = modified.resize(restored.size, Image.Resampling.LANCZOS)
+    if image_digest(modified) != manifest.get("modified_sha256"):
+        # 델타를 만든 뒤 수정 이미지가 바뀜 (재편집 등) - 다시 만들어야 함
+        return False
+    return (image_digest(restored) == manifest["modified_sha256"]
+            or reconstruction_error(restored, modified)[1] <= VERIFY_TOLERANCE)
+
+def open_modified(puzzle_dir: Path, answer_data: dict = None) -> Image.Image:
+    """수정 이미지 (정리된 퍼즐은 델타로 복원)"""
+    puzzle_dir = Path(puzzle_dir)
+    answer_data = answer_data or load_answer(puzzle_dir)
+    modified_path = puzzle_dir / answer_data.get("modified_image", "modified.jpg")
+    if not modified_path.exists() and answer_data.get("modified_delta"):
+        return reconstruct(puzzle_dir)
+    with Image.open(modified_path) as img:
+        return img.convert("RGB")
+
+def prune_modified(puzzle_dir: Path) -> bool:
+    """
+    델타로 복원되는 퍼즐의 수정 이미지(해시 파일과 modified.jpg 별칭)를 지웁니다.
+    먼저 modified_image를 PRUNED_MODIFIED_IMAGE로 바꾼 새 버전을 발행하므로 플레이어는 항상 제공되는 이름만 봅니다.
+    델타가 없거나 검증에 실패하면 아무것도 지우지 않고 False를 반환합니다.
+    """
+    puzzle_dir = Path(puzzle_dir)
+    answer_data = load_answer(puzzle_dir)
+    if not answer_data.get("modified_delta") or not verify_delta(puzzle_dir):
+        return False
+    names = {answer_data.get("modified_image", PRUNED_MODIFIED_IMAGE), PRUNED_MODIFIED_IMAGE}
+    answer_data["modified_image"] = PRUNED_MODIFIED_IMAGE
+    publish_version(puzzle_dir, create_staging(puzzle_dir), answer_data)
+    for name in names:
+        (puzzle_dir / name).unlink(missing_ok=True)
+    return True
+
+def delta_bytes(puzzle_dir: Path, manifest: dict) -> int:
+    return (puzzle_dir / manifest["atlas"]).stat().st_size + (puzzle_dir / manifest_name(puzzle_dir)).stat().st_size
+
+if __name__ == "__main__":
+    try:
+        from generate_puzzle import OUTPUT_DIR
+    except ImportError:
+        OUTPUT_DIR = Path(__file__).parent.parent / "puzzles"
+    from puzzle_store import iter_puzzle_dirs, puzzle_path
+    from asset_storage import get_storage, sync_puzzle
+
+    parser = argparse.ArgumentParser(description="수정 이미지 델타 에셋 도구")
+    parser.add_argument("command", choices=["build", "verify", "bench"])
+    parser.add_argument("puzzle_ids", nargs="*")
+    parser.add_argument("--lossless", action="store_true", help="아틀라스를 PNG로 저장")
+    parser.add_argument("--prune", action="store_true", help="검증 후 수정 이미지 삭제 (서버가 복원해서 제공)")
+    args = parser.parse_args()
+
+    puzzle_ids = args.puzzle_ids or sorted(
+        puzzle_id for puzzle_id, p in iter_puzzle_dirs(OUTPUT_DIR) if (p / "answer.json").exists())
+
+    full_total, delta_total = 0, 0
+    for puzzle_id in puzzle_ids:
+        puzzle_dir = puzzle_path(OUTPUT_DIR, puzzle_id)
+        if args.command == "verify":
+            if not (puzzle_dir / manifest_name(puzzle_dir)).exists():
+                print(f"⚠️ {puzzle_id}: 델타 없음, 건너뜀")
+                continue
+            print(f"{'✅' if verify_delta(puzzle_dir) else '❌'} {puzzle_id}")
+            continue
+
+        answer_data = load_answer(puzzle_dir)
+        modified_path = puzzle_dir / answer_data.get("modified_image", "modified.jpg")
+        if not modified_path.exists():
+            print(f"⚠️ {puzzle_id}: modified.jpg 없음, 건너뜀")
+            continue
+        # 스테이징 폴더에 만들어서 build는 새 버전으로 발행하고 bench는 그대로 버림
+        staging = create_staging(puzzle_dir)
+        stage_existing(staging, puzzle_dir / answer_data.get("original_image", "original.jpg"), "original.jpg")
+        answer_data["original_image"] = "original.jpg"
+        with Image.open(modified_path) as img:
+            modified = img.convert("RGB")
+        manifest = build_delta(staging, answer_data, modified, lossless=args.lossless)
+        base_size = (staging / manifest["base"]).stat().st_size
+        full = base_size + modified_path.stat().st_size
+        delta = base_size + delta_bytes(staging, manifest)
+        full_total += full
+        delta_total += delta
+
+        mean_error, max_error = reconstruction_error(
+            reconstruct(staging, manifest), modified.resize((manifest["width"], manifest["height"])))
+        print(f"{puzzle_id}: 타일 {len(manifest['tiles'])}개, {full:,} → {delta:,} bytes "
+              f"({(1 - delta / full) * 100:.1f}% 절감, modified.jpg 대비 평균 오차 {mean_error:.2f}, "
+              f"최대 {max_error}/{VERIFY_TOLERANCE})")
+
+        if args.command == "build":
+            answer_data["modified_delta"] = DELTA_MANIFEST
+            publish_version(puzzle_dir, staging, answer_data)
+            if args.prune and not prune_modified(puzzle_dir):
+                print(f"⚠️ {puzzle_id}: 델타 검증 실패, 수정 이미지를 지우지 않음")
+            sync_puzzle(get_storage(OUTPUT_DIR), OUTPUT_DIR, puzzle_dir)
+        else:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    if full_total:
+        print(f"\n📊 전체: {full_total:,} → {delta_total:,} bytes ({(1 - delta_total / full_total) * 100:.1f}% 절감)")
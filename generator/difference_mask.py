@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+차이점 라벨 마스크
+원본/수정 이미지의 실제 픽셀 차이로 각 픽셀이 몇 번 차이점인지 기록한 축소 라벨 PNG(mask.png)를 만들고,
+클릭 판정을 배열 조회 한 번으로 처리하는 MaskHitTester를 제공합니다.
+
+사용법 (기존 퍼즐에 마스크 생성):
+    python3 generator/difference_mask.py [퍼즐ID ...]
+"""
+
+import io
+import sys
+import json
+import numpy as np
+from pathlib import Path
+from PIL import Image, ImageFilter
+
+# 마스크 축소 배율 (1024px 이미지 → 128px 마스크, 파일 1~3KB)
+MASK_SCALE = 8
+# 픽셀 차이 임계값 (채널별 최대 차이, JPEG 노이즈 제거용 블러 후)
+DIFF_THRESHOLD = 32
+# 박스 밖으로 이만큼(px)까지는 변경 픽셀로 인정
+BOX_MARGIN = 8
+# 클릭 허용 반경 기본값 (px)
+DEFAULT_HIT_RADIUS = 16
+MASK_FILENAME = "mask.png"
+
+def box_to_tuple(box) -> tuple:
+    if isinstance(box, dict):
+        box = [box["x1"], box["y1"], box["x2"], box["y2"]]
+    x1, y1, x2, y2 = (int(round(v)) for v in box[:4])
+    return min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)
+
+def box_area(box) -> int:
+    x1, y1, x2, y2 = box_to_tuple(box)
+    return (x2 - x1) * (y2 - y1)
+
+def build_label_mask(original: Image.Image, modified: Image.Image, differences: list,
+                     scale: int = MASK_SCALE) -> np.ndarray:
+    """
+    픽셀 차이 기반 라벨 마스크 (scale배 축소, uint8, 0 = 차이 없음).
+    각 차이점의 박스 안에서 실제로 바뀐 픽셀만 라벨로 칠하고,
+    바뀐 픽셀이 없는 차이점은 박스 전체를 라벨로 씁니다.
+    """
+    width, height = original.size
+    if modified.size != original.size:
+        modified = modified.resize(original.size, Image.Resampling.LANCZOS)
+    a = np.asarray(original.convert("RGB").filter(ImageFilter.GaussianBlur(1)), dtype=np.int16)
+    b = np.asarray(modified.convert("RGB").filter(ImageFilter.GaussianBlur(1)), dtype=np.int16)
+    changed = np.abs(a - b).max(axis=-1) > DIFF_THRESHOLD
+
+    labels = np.zeros((height, width), dtype=np.uint8)
+    # 큰 박스부터 칠해서 작은 박스가 겹친 부분을 가져가도록 함
+    for diff in sorted(differences, key=lambda d: box_area(d["bounding_box"]), reverse=True):
+        x1, y1, x2, y2 = box_to_tuple(diff["bounding_box"])
+        x1, y1 = max(0, x1 - BOX_MARGIN), max(0, y1 - BOX_MARGIN)
+        x2, y2 = min(width, x2 + BOX_MARGIN), min(height, y2 + BOX_MARGIN)
+        if x2 <= x1 or y2 <= y1:
+            continue
+        region = changed[y1:y2, x1:x2]
+        if region.any():
+            labels[y1:y2, x1:x2][region] = diff["id"]
+        else:
+            labels[y1:y2, x1:x2] = diff["id"]
+
+    # 블록 단위 max-pool로 축소 (얇은 편집도 한 칸 이상 남음)
+    mh, mw = -(-height // scale), -(-width // scale)
+    padded = np.zeros((mh * scale, mw * scale), dtype=np.uint8)
+    padded[:height, :width] = labels
+    return padded.reshape(mh, scale, mw, scale).max(axis=(1, 3))
+
+def write_difference_mask(puzzle_dir: Path, original: Image.Image, modified: Image.Image,
+                          answer_data: dict, scale: int = MASK_SCALE):
+    """mask.png를 저장하고 answer_data에 마스크 정보를 기록"""
+    mask = build_label_mask(original, modified, answer_data["differences"], scale)
+    Image.fromarray(mask, "L").save(puzzle_dir / MASK_FILENAME, "PNG", optimize=True)
+    answer_data["mask_image"] = MASK_FILENAME
+    answer_data["mask_scale"] = scale
+
+def dilate_labels(labels: np.ndarray, radius: int) -> np.ndarray:
+    """라벨을 radius칸만큼 빈 칸(0)으로만 확장 - 이웃 차이점의 영역은 빼앗지 않음"""
+    result = labels.copy()
+    for _ in range(radius):
+        grown = result.copy()
+        for dy, dx in ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)):
+            shifted = np.zeros_like(result)
+            ys = slice(max(0, dy), result.shape[0] + min(0, dy))
+            yd = slice(max(0, -dy), result.shape[0] + min(0, -dy))
+            xs = slice(max(0, dx), result.shape[1] + min(0, dx))
+            xd = slice(max(0, -dx), result.shape[1] + min(0, -dx))
+            shifted[yd, xd] = result[ys, xs]
+            empty = grown == 0
+            grown[empty] = shifted[empty]
+        result = grown
+    return result
+
+
+class MaskHitTester:
+    """
+    클릭 좌표 → 차이점 ID 판정기.
+    로드 시 허용 반경만큼 라벨을 확장해 두므로 판정은 배열 조회 한 번(O(1))입니다.
+    """
+
+    __slots__ = ("labels", "scale", "width", "height")
+
+    def __init__(self, labels: np.ndarray, scale: int, radius: int = DEFAULT_HIT_RADIUS):
+        self.scale = scale
+        self.height, self.width = labels.shape[0] * scale, labels.shape[1] * scale
+        self.labels = dilate_labels(labels, -(-radius // scale))
+
+    @classmethod
+    def from_puzzle(cls, puzzle_dir: Path, answer_data: dict = None, radius: int = DEFAULT_HIT_RADIUS):
+        """퍼즐 폴더의 mask.png로 생성 (마스크가 없는 기존 퍼즐은 bounding box로 대체)"""
+        puzzle_dir = Path(puzzle_dir)
+        if answer_data is None:
+            with open(puzzle_dir / "answer.json", "r", encoding="utf-8") as f:
+                answer_data = json.load(f)
+        mask_path = puzzle_dir / answer_data.get("mask_image", MASK_FILENAME)
+        if mask_path.exists():
+            with Image.open(mask_path) as img:
+                labels = np.array(img.convert("L"))
+            return cls(labels, answer_data.get("mask_scale", MASK_SCALE), radius)
+        return cls.from_boxes(answer_data, radius)
+
+    @classmethod
+    def from_bytes(cls, mask_bytes: bytes, answer_data: dict, radius: int = DEFAULT_HIT_RADIUS):
+        """저장소에서 읽은 mask.png 내용으로 생성 (None이면 bounding box로 대체)"""
+        if mask_bytes is None:
+            return cls.from_boxes(answer_data, radius)
+        with Image.open(io.BytesIO(mask_bytes)) as img:
+            labels = np.array(img.convert("L"))
+        return cls(labels, answer_data.get("mask_scale", MASK_SCALE), radius)
+
+    @classmethod
+    def from_boxes(cls, answer_data: dict, radius: int = DEFAULT_HIT_RADIUS, scale: int = MASK_SCALE):
+        width = answer_data.get("image_width", 1024)
+        height = answer_data.get("image_height", 1024)
+        labels = np.zeros((-(-height // scale), -(-width // scale)), dtype=np.uint8)
+        for diff in sorted(answer_data["differences"], key=lambda d: box_area(d["bounding_box"]), reverse=True):
+            x1, y1, x2, y2 = box_to_tuple(diff["bounding_box"])
+            labels[max(0, y1) // scale:-(-y2 // scale), max(0, x1) // scale:-(-x2 // scale)] = diff["id"]
+        return cls(labels, scale, radius)
+
+    def hit(self, x: float, y: float):
+        """(x, y) 픽셀 좌표에 해당하는 차이점 ID, 없으면 None"""
+        if x < 0 or y < 0 or x >= self.width or y >= self.height:
+            return None
+        label = int(self.labels[int(y) // self.scale, int(x) // self.scale])
+        return label or None
+
+    @property
+    def nbytes(self) -> int:
+        return self.labels.nbytes
+
+
+if __name__ == "__main__":
+    try:
+        from generate_puzzle import OUTPUT_DIR
+    except ImportError:
+        OUTPUT_DIR = Path(__file__).parent.parent / "puzzles"
+    from puzzle_store import iter_puzzle_dirs, puzzle_path
+    from asset_publish import create_staging, publish_version
+    from asset_storage import get_storage, sync_puzzle
+    from delta_asset import open_modified
+
+    puzzle_ids = sys.argv[1:] or sorted(
+        puzzle_id for puzzle_id, p in iter_puzzle_dirs(OUTPUT_DIR) if (p / "answer.json").exists())
+    for puzzle_id in puzzle_ids:
+        puzzle_dir = puzzle_path(OUTPUT_DIR, puzzle_id)
+        with open(puzzle_dir / "answer.json", "r", encoding="utf-8") as f:
+            answer_data = json.load(f)
+        # 마스크가 바뀌면 answer.json 내용도 바뀌므로 answer.json을 직접 고치지 않고 새 버전으로 발행
+        staging = create_staging(puzzle_dir)
+        with Image.open(puzzle_dir / answer_data["original_image"]) as original:
+            write_difference_mask(staging, original, open_modified(puzzle_dir, answer_data), answer_data)
+        publish_version(puzzle_dir, staging, answer_data)
+        sync_puzzle(get_storage(OUTPUT_DIR), OUTPUT_DIR, puzzle_dir)
+        size = (puzzle_dir / answer_data["mask_image"]).stat().st_size
+        print(f"✅ {puzzle_id}: {answer_data['mask_image']} ({size:,} bytes)")
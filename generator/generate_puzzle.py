@@ -8,12 +8,15 @@ import os
 import sys
 import json
 import random
+import argparse
 import base64
 import requests
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from PIL import Image
+from PIL import Image, ImageDraw, ImageFilter
 import io
+import tempfile
 
 # ============================================================
 # 설정
@@ -24,12 +27,73 @@ except ImportError:
     import os
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 
+try:
+    from .region_proposer import propose_regions, propose_modifications, drop_overlapping, format_candidates_for_prompt
+except ImportError:
+    from region_proposer import propose_regions, propose_modifications, drop_overlapping, format_candidates_for_prompt
+
+try:
+    from .procedural_editor import procedural_edit_image
+except ImportError:
+    from procedural_editor import procedural_edit_image
+
+try:
+    from .difference_mask import write_difference_mask
+except ImportError:
+    from difference_mask import write_difference_mask
+
+try:
+    from .delta_asset import build_delta, open_modified, DELTA_MANIFEST
+except ImportError:
+    from delta_asset import build_delta, open_modified, DELTA_MANIFEST
+
+try:
+    from .asset_publish import create_staging, stage_existing, publish_version, write_json_atomic, file_lock
+except ImportError:
+    from asset_publish import create_staging, stage_existing, publish_version, write_json_atomic, file_lock
+try:
+    from .puzzle_store import puzzle_path, relative_path
+except ImportError:
+    from puzzle_store import puzzle_path, relative_path
+try:
+    from .asset_storage import get_storage, sync_puzzle
+except ImportError:
+    from asset_storage import get_storage, sync_puzzle
+try:
+    from .progress import emit, stage
+except ImportError:
+    from progress import emit, stage
+try:
+    from .profiling import profiled, configure as configure_profiling
+except ImportError:
+    from profiling import profiled, configure as configure_profiling
+try:
+    from . import variants
+    from .variants import parse_variants, variant_id, split_variant_id, select_variant
+except ImportError:
+    import variants
+    from variants import parse_variants, variant_id, split_variant_id, select_variant
+
 # Text 분석용 API
 GEMINI_TEXT_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
 
 # 이미지 생성용 API (Gemini 3 Pro Image)
 GEMINI_IMAGE_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-3-pro-image-preview:generateContent"
 
+# 수정 영역 계획 방식
+#   llm    : Gemini 분석 API (기본)
+#   local  : 로컬 영역 제안기만 사용 (API 호출 없음)
+#   hybrid : 로컬 후보 박스를 Gemini 분석 프롬프트에 함께 전달
+PLANNER = os.getenv("PLANNER", "llm")
+
+# 이미지 편집 백엔드 (EDIT_BACKENDS 참고)
+#   gemini : Gemini 이미지 모델 (모델이 없으면 Imagen 3로 재시도)
+#   local  : PIL/NumPy 절차적 편집 (오프라인, 부하 테스트/데모/쉬운 팩용)
+EDIT_BACKEND = os.getenv("EDIT_BACKEND", "gemini")
+
+# modified.jpg와 함께 변경 타일만 담은 델타 에셋(modified.delta.*)도 생성
+DELTA_ASSETS = os.getenv("DELTA_ASSETS") == "1"
+
 # 생성할 차이점 개수 범위
 MIN_DIFFERENCES = 10
 MAX_DIFFERENCES = 10
@@ -67,29 +131,104 @@ def get_image_dimensions(image_path: str) -> tuple:
     with Image.open(image_path) as img:
         return img.size
 
+# EXIF 방향 태그 값 → PIL transpose 방법
+EXIF_ORIENTATION_TAG = 0x0112
+EXIF_TRANSPOSE_METHODS = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+# 1차 축소(draft/reduce) 후 LANCZOS로 마무리할 때 남겨둘 최소 배율
+REDUCING_GAP = 2.0
+
+def get_exif_orientation(img: Image.Image) -> int:
+    """EXIF 방향 값 반환 (없으면 1)"""
+    try:
+        return img.getexif().get(EXIF_ORIENTATION_TAG, 1)
+    except Exception:
+        return 1
+
+def load_image_for_size(image_path: str, max_size: int = 1024) -> Image.Image:
+    """
+    긴 변이 max_size 이하가 되도록 디코딩한 이미지를 반환합니다 (EXIF 방향 적용).
+    JPEG은 draft()로 DCT 단계에서 축소 디코딩하고, PNG 등은 reduce()로 정수배 축소 후
+    LANCZOS로 목표 크기를 맞춥니다.
+    """
+    img = Image.open(image_path)
+    orientation = get_exif_orientation(img)
+    swap_axes = orientation in (5, 6, 7, 8)
+
+    # 목표 크기는 화면에 보이는 방향 기준, 디코딩은 저장된 방향 기준
+    width, height = img.size
+    shown_w, shown_h = (height, width) if swap_axes else (width, height)
+    ratio = min(max_size / shown_w, max_size / shown_h, 1.0)
+    target = (max(1, int(width * ratio)), max(1, int(height * ratio)))
+
+    if ratio < 1.0:
+        if img.format == "JPEG":
+            img.draft(None, (int(target[0] * REDUCING_GAP), int(target[1] * REDUCING_GAP)))
+        elif img.mode not in ("RGB", "RGBA", "L", "LA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+        factor = int(min(img.width / target[0], img.height / target[1]) / REDUCING_GAP)
+        if factor > 1:
+            img = img.reduce(factor)
+        if img.size != target:
+            img = img.resize(target, Image.Resampling.LANCZOS)
+
+    method = EXIF_TRANSPOSE_METHODS.get(orientation)
+    if method is not None:
+        img = img.transpose(method)
+    return img
+
 def resize_image_if_needed(image_path: str, max_size: int = 1024) -> str:
-    """이미지가 너무 크면 리사이즈하고 임시 파일 경로 반환"""
+    """
+    이미지가 너무 크거나 회전되어 있으면 리사이즈/회전하고 임시 파일 경로 반환 (다 쓰면 호출한 쪽에서 삭제).
+    같은 ID의 i1.jpg / i1.png나 같은 원본의 동시 생성이 서로의 파일을 덮어쓰지 않도록 tempfile을 씁니다.
+    """
     with Image.open(image_path) as img:
         width, height = img.size
-        if width > max_size or height > max_size:
-            ratio = min(max_size / width, max_size / height)
-            new_size = (int(width * ratio), int(height * ratio))
-            resized = img.resize(new_size, Image.Resampling.LANCZOS)
-            
-            # 임시 파일로 저장
-            temp_path = str(image_path).replace(".png", "_resized.png").replace(".jpg", "_resized.jpg")
-            resized.save(temp_path, "PNG")
-            print(f"  📐 이미지 리사이즈: {width}x{height} → {new_size[0]}x{new_size[1]}")
-            return temp_path
-    return str(image_path)
+        orientation = get_exif_orientation(img)
+
+    if width <= max_size and height <= max_size and orientation == 1:
+        return str(image_path)
+
+    with load_image_for_size(image_path, max_size) as resized:
+        # 임시 파일로 저장 (분석/생성 API에 PNG로 전달)
+        with tempfile.NamedTemporaryFile(prefix=f"{Path(image_path).stem}_", suffix=".png", delete=False) as tmp:
+            resized.save(tmp, "PNG")
+            temp_path = tmp.name
+        print(f"  📐 이미지 리사이즈: {width}x{height} → {resized.width}x{resized.height}")
+    return temp_path
+
+def save_jpeg_under_limit(img: Image.Image, output_path, max_bytes: int = 1024 * 1024):
+    """JPG로 저장하고 파일 크기가 max_bytes를 넘으면 품질을 낮춰 다시 저장"""
+    rgb = img.convert("RGB")
+    quality = 85
+    rgb.save(output_path, "JPEG", quality=quality, optimize=True)
+    while os.path.getsize(output_path) > max_bytes and quality > 10:
+        quality = max(10, quality - 10)
+        rgb.save(output_path, "JPEG", quality=quality, optimize=True)
+
+def normalize_bounding_box(box) -> tuple:
+    """[x1, y1, x2, y2] 또는 {x1, y1, x2, y2} 형식을 정수 튜플로 변환"""
+    if isinstance(box, dict):
+        box = [box["x1"], box["y1"], box["x2"], box["y2"]]
+    x1, y1, x2, y2 = (int(round(v)) for v in box[:4])
+    return min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)
 
 # ============================================================
 # Gemini API 호출
 # ============================================================
 
-def analyze_image_for_modifications(image_path: str) -> list:
+def analyze_image_for_modifications(image_path: str, candidate_regions: list = None) -> list:
     """
     Gemini를 사용하여 이미지를 분석하고 수정 가능한 영역을 찾습니다.
+    candidate_regions가 있으면 로컬 제안기의 후보 박스 중에서 고르도록 안내합니다.
     """
     print("  🔍 이미지 분석 중...")
     
@@ -97,6 +236,12 @@ def analyze_image_for_modifications(image_path: str) -> list:
     width, height = get_image_dimensions(image_path)
     
     num_differences = random.randint(MIN_DIFFERENCES, MAX_DIFFERENCES)
+    candidate_hint = ""
+    if candidate_regions:
+        candidate_hint = f"""
+아래는 서로 겹치지 않도록 미리 고른 후보 영역입니다 (x1, y1, x2, y2). 가능하면 이 박스들 중에서 골라 그대로 사용하세요:
+{format_candidates_for_prompt(candidate_regions)}
+"""
     
     prompt = f"""이 이미지를 분석하고, 틀린그림찾기 게임을 위해 수정할 수 있는 {num_differences}개의 영역을 찾아주세요.
 
@@ -114,6 +259,7 @@ def analyze_image_for_modifications(image_path: str) -> list:
 - 색상 변경, 작은 객체 추가/제거, 패턴 변경 등이 좋습니다
 - bounding_box 값은 반드시 정수여야 합니다
 
+{candidate_hint}
 JSON 배열로만 응답해주세요. 다른 텍스트 없이 JSON만 출력하세요. """
 
     headers = {"Content-Type": "application/json"}
@@ -166,7 +312,31 @@ JSON 배열로만 응답해주세요. 다른 텍스트 없이 JSON만 출력하
         print(f"  응답: {text[:500]}")
         return []
 
+def plan_modifications(image_path: str) -> list:
+    """PLANNER 설정에 따라 수정 영역 계획 (LLM 결과는 겹치는 영역 제거)"""
+    num_differences = random.randint(MIN_DIFFERENCES, MAX_DIFFERENCES)
+    if PLANNER == "local":
+        print("  🔍 로컬 영역 제안기로 분석 중...")
+        modifications = propose_modifications(image_path, num_differences)
+        print(f"  ✅ {len(modifications)}개의 수정 영역 발견")
+        return modifications
+
+    candidates = None
+    if PLANNER == "hybrid":
+        candidates = propose_regions(image_path, num_differences * 2)
+    return drop_overlapping(analyze_image_for_modifications(image_path, candidates))
+
 def generate_modified_image(image_path: str, modifications: list) -> tuple:
+    """
+    EDIT_BACKEND 설정에 맞는 백엔드로 수정된 이미지를 생성합니다.
+    모든 백엔드는 (base64 이미지 데이터, mime 타입)을 반환하고 실패 시 (None, None)을 반환합니다.
+    """
+    backend = EDIT_BACKENDS.get(EDIT_BACKEND)
+    if backend is None:
+        raise ValueError(f"알 수 없는 EDIT_BACKEND: {EDIT_BACKEND} (가능: {', '.join(EDIT_BACKENDS)})")
+    return backend(image_path, modifications)
+
+def gemini_generate_modified_image(image_path: str, modifications: list) -> tuple:
     """
     Gemini 이미지 생성 모델을 사용하여 수정된 이미지를 생성합니다.
     """
@@ -234,7 +404,8 @@ Generate the edited image with ALL the changes listed above."""
         
         # 모델이 없는 경우 대체 모델 시도
         if "not found" in error_detail.lower():
-            return try_alternative_image_generation(image_path, modifications)
+            with stage("fallback", model="imagen-3"):
+                return try_alternative_image_generation(image_path, modifications)
         return None, None
     
     result = response.json()
@@ -331,72 +502,160 @@ Keep everything else exactly the same."""
     
     return None, None
 
+# 편집 백엔드 목록: 이름 → (image_path, modifications) -> (base64, mime_type)
+EDIT_BACKENDS = {
+    "gemini": gemini_generate_modified_image,
+    "local": procedural_edit_image,
+}
+
 # ============================================================
 # 메인 생성 함수
 # ============================================================
 
-def generate_puzzle_for_image(image_path: Path) -> dict:
+def load_modification_plan(plan_path: str) -> tuple:
+    """
+    저장된 answer.json(또는 DB data 컬럼)의 차이점 목록을 수정 계획 형식으로 변환합니다.
+    관리자가 검수 도구에서 고친 bounding_box는 그대로 유지됩니다.
+    (차이점 목록, bounding_box 기준 이미지 크기) 반환 - 크기 정보가 없는 옛 계획은 None
+    """
+    with open(plan_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    differences = data.get("differences", []) if isinstance(data, dict) else data
+    plan_size = None
+    if isinstance(data, dict) and data.get("image_width") and data.get("image_height"):
+        plan_size = (data["image_width"], data["image_height"])
+    return [
+        {
+            "area_name": diff.get("name") or diff.get("area_name", ""),
+            "description": diff.get("description", ""),
+            "modification": diff["modification"],
+            "bounding_box": diff["bounding_box"],
+            "difficulty": diff.get("difficulty", 3),
+            **({"edit_type": diff["edit_type"]} if diff.get("edit_type") else {})
+        }
+        for diff in differences
+    ], plan_size
+
+def scale_modifications(modifications: list, from_size: tuple, to_size: tuple) -> list:
+    """bounding_box를 from_size 이미지 좌표에서 to_size 이미지 좌표로 환산 (크기가 같으면 그대로)"""
+    if tuple(from_size) == tuple(to_size):
+        return modifications
+    scale_x, scale_y = to_size[0] / from_size[0], to_size[1] / from_size[1]
+    for mod in modifications:
+        x1, y1, x2, y2 = normalize_bounding_box(mod["bounding_box"])
+        mod["bounding_box"] = [round(x1 * scale_x), round(y1 * scale_y),
+                               round(x2 * scale_x), round(y2 * scale_y)]
+    return modifications
+
+def variant_targets(puzzle_id: str, modifications: list, from_plan: bool) -> list:
+    """
+    만들 퍼즐 목록 [(퍼즐 ID, 변형 이름, 차이점 목록), ...] - 기본 퍼즐 + VARIANTS 변형들.
+    변형 ID(예: i5-easy)를 직접 지정하면 그 변형 하나만 만들고, 저장된 계획은 이미 그 변형의 차이점이므로 그대로 사용
+    """
+    base, name = split_variant_id(puzzle_id)
+    if name:
+        return [(puzzle_id, name, modifications if from_plan else select_variant(modifications, name))]
+    return [(puzzle_id, None, modifications)] + [
+        (variant_id(puzzle_id, variant), variant, select_variant(modifications, variant))
+        for variant, _ in parse_variants()
+    ]
+
+def generate_puzzle_for_image(image_path: Path, modifications: list = None, puzzle_id: str = None,
+                              plan_size: tuple = None) -> dict:
     """
     하나의 원본 이미지에서 틀린그림찾기 퍼즐을 생성합니다.
+    modifications를 넘기면 분석 API 호출을 건너뛰고 해당 계획으로 이미지만 다시 생성합니다
+    (plan_size가 작업 이미지 크기와 다르면 좌표를 환산).
+    VARIANTS가 있으면 같은 분석 결과로 난이도별 변형 퍼즐도 함께 만들고, 기본 퍼즐의 answer 데이터를 반환합니다.
     """
+    puzzle_id = puzzle_id or puzzle_id_for_image(image_path)
+    from_plan = bool(modifications)
     print(f"\n{'='*60}")
     print(f"📷 처리 중: {image_path.name}")
     print(f"{'='*60}")
     
     # 이미지 리사이즈 (필요시)
-    processed_path = resize_image_if_needed(str(image_path))
-    
-    # 1단계: 이미지 분석 및 수정 영역 찾기
-    modifications = analyze_image_for_modifications(processed_path)
+    with stage("resize"):
+        processed_path = resize_image_if_needed(str(image_path))
     
-    if not modifications:
-        print("  ⚠️ 수정 영역을 찾지 못했습니다.")
-        return None
+    try:
+        # 1단계: 이미지 분석 및 수정 영역 찾기 (저장된 계획이 있으면 재사용)
+        if modifications:
+            print(f"  ♻️ 저장된 수정 계획 재사용 ({len(modifications)}개), 분석 생략")
+            emit("stage", stage="analyze", status="skipped", count=len(modifications))
+            if plan_size:
+                with Image.open(processed_path) as img:
+                    scale_modifications(modifications, plan_size, img.size)
+        else:
+            with stage("analyze", planner=PLANNER) as result:
+                modifications = plan_modifications(processed_path)
+                result["count"] = len(modifications)
     
-    # 2단계: 수정된 이미지 생성
-    modified_image_data, mime_type = generate_modified_image(processed_path, modifications)
+        if not modifications:
+            print("  ⚠️ 수정 영역을 찾지 못했습니다.")
+            return None
     
-    if not modified_image_data:
-        print("  ⚠️ 이미지 생성에 실패했습니다.")
-        return None
+        # 2단계: 수정된 이미지 생성 (변형이 있으면 같은 리사이즈 이미지로 동시에 요청)
+        targets = variant_targets(puzzle_id, modifications, from_plan)
+        finished = []
+        def edit_target(target):
+            result = generate_modified_image(processed_path, target[2])
+            finished.append(target[0])
+            if len(targets) > 1:
+                emit("progress", stage="generate", done=len(finished), total=len(targets), puzzle_id=target[0])
+            return result
+
+        with stage("generate", backend=EDIT_BACKEND, **({"variants": len(targets)} if len(targets) > 1 else {})), \
+                ThreadPoolExecutor(max_workers=len(targets)) as executor:
+            generated = list(executor.map(edit_target, targets))
     
-    # 3단계: 파일 저장
+        # 3단계: 퍼즐마다 파일 저장
+        answers = {}
+        with Image.open(processed_path) as img:
+            for (target_id, variant, target_mods), (modified_image_data, mime_type) in zip(targets, generated):
+                if not modified_image_data:
+                    print(f"  ⚠️ 이미지 생성에 실패했습니다. ({target_id})")
+                    continue
+                image_data = base64.b64decode(modified_image_data)
+                with Image.open(io.BytesIO(image_data)) as m_img:
+                    answers[target_id] = save_puzzle_output(image_path, img, m_img, target_mods,
+                                                            puzzle_id=target_id, variant=variant)
+        return answers.get(puzzle_id)
+    finally:
+        if processed_path != str(image_path):
+            os.unlink(processed_path)
+
+def puzzle_id_for_image(image_path: Path) -> str:
+    """원본 이미지 경로에서 퍼즐 ID 결정"""
     puzzle_id = image_path.stem
     
     # 재생성 시(original.png인 경우) 부모 폴더명을 ID로 사용
     if puzzle_id == "original" and image_path.parent.name.startswith("i"):
         puzzle_id = image_path.parent.name
-        
-    puzzle_dir = OUTPUT_DIR / puzzle_id
+    return puzzle_id
+
+def save_puzzle_output(image_path: Path, original: Image.Image, modified: Image.Image,
+                       modifications: list, max_bytes: int = 1024 * 1024,
+                       puzzle_id: str = None, variant: str = None) -> dict:
+    """
+    원본/수정 이미지와 answer.json, 검수 페이지를 퍼즐 폴더에 저장.
+    새 파일은 스테이징 폴더에 만든 뒤 해시 파일명으로 한 번에 발행합니다 (asset_publish).
+    """
+    puzzle_id = puzzle_id or puzzle_id_for_image(image_path)
+    puzzle_dir = puzzle_path(OUTPUT_DIR, puzzle_id)
     puzzle_dir.mkdir(parents=True, exist_ok=True)
+    staging = create_staging(puzzle_dir)
     
-    # 원본 이미지 복사 (JPG로 저장, 1MB 이하 유지)
-    original_output = puzzle_dir / "original.jpg"
-    with Image.open(processed_path) as img:
-        img.convert("RGB").save(original_output, "JPEG", quality=85, optimize=True)
-        # 파일 크기 체크 및 재조정 (1MB 미만 보장)
-        while os.path.getsize(original_output) > 1024 * 1024:
-            quality = int(os.path.getsize(original_output) / (1024 * 1024) * 80)
-            img.convert("RGB").save(original_output, "JPEG", quality=max(10, quality), optimize=True)
-            if quality < 10: break
-    
-    # 수정된 이미지 저장
-    modified_output = puzzle_dir / "modified.jpg"
-    image_data = base64.b64decode(modified_image_data)
-    with Image.open(io.BytesIO(image_data)) as m_img:
-        m_img.convert("RGB").save(modified_output, "JPEG", quality=85, optimize=True)
-        while os.path.getsize(modified_output) > 1024 * 1024:
-            quality = int(os.path.getsize(modified_output) / (1024 * 1024) * 80)
-            m_img.convert("RGB").save(modified_output, "JPEG", quality=max(10, quality), optimize=True)
-            if quality < 10: break
-    
-    # 정답 JSON 생성
+    # 정답 JSON 생성 (bounding_box는 original.jpg 픽셀 좌표)
     answer_data = {
         "puzzle_id": puzzle_id,
         "created_at": datetime.now().isoformat(),
         "original_image": "original.jpg",
         "modified_image": "modified.jpg",
+        "image_width": original.width,
+        "image_height": original.height,
         "total_differences": len(modifications),
+        **({"variant": variant, "base_puzzle": split_variant_id(puzzle_id)[0]} if variant else {}),
         "differences": [
             {
                 "id": i + 1,
@@ -404,18 +663,31 @@ def generate_puzzle_for_image(image_path: Path) -> dict:
                 "description": mod["description"],
                 "modification": mod["modification"],
                 "bounding_box": mod["bounding_box"],
-                "difficulty": mod.get("difficulty", 3)
+                "difficulty": mod.get("difficulty", 3),
+                **({"edit_type": mod["edit_type"]} if mod.get("edit_type") else {})
             }
             for i, mod in enumerate(modifications)
         ]
     }
     
-    answer_path = puzzle_dir / "answer.json"
-    with open(answer_path, "w", encoding="utf-8") as f:
-        json.dump(answer_data, f, ensure_ascii=False, indent=2)
+    with stage("encode"):
+        # 원본 이미지 복사 (JPG로 저장, 1MB 이하 유지)
+        save_jpeg_under_limit(original, staging / "original.jpg", max_bytes)
+        
+        # 수정된 이미지 저장
+        save_jpeg_under_limit(modified, staging / "modified.jpg", max_bytes)
+        
+        # 실제 픽셀 차이 기반 라벨 마스크 (클릭 판정용)
+        write_difference_mask(staging, original, modified, answer_data)
+        if DELTA_ASSETS:
+            build_delta(staging, answer_data)
+            answer_data["modified_delta"] = DELTA_MANIFEST
+    
+    with stage("write") as result:
+        version = result["version"] = publish_version(puzzle_dir, staging, answer_data)
     
     print(f"\n  ✅ 퍼즐 생성 완료!")
-    print(f"     📁 저장 위치: {puzzle_dir}")
+    print(f"     📁 저장 위치: {puzzle_dir} (버전 {version})")
     print(f"     🔢 차이점 개수: {len(modifications)}")
     
     # 차이점 목록 출력
@@ -423,11 +695,277 @@ def generate_puzzle_for_image(image_path: Path) -> dict:
     for mod in modifications:
         print(f"     - {mod['area_name']}: {mod['modification']}")
     
-    # 검수 페이지 생성
-    generate_review_page(puzzle_dir, answer_data)
+    with stage("review"):
+        # 검수 페이지 생성
+        generate_review_page(puzzle_dir, answer_data)
+        # 원격 저장소(ASSET_STORAGE=s3)면 발행된 퍼즐 폴더 업로드
+        sync_puzzle(get_storage(OUTPUT_DIR), OUTPUT_DIR, puzzle_dir)
     
     return answer_data
 
+# ============================================================
+# 영역 단위 편집 (부분 재편집 / 타일 생성 공용)
+# ============================================================
+
+# 크롭할 때 bounding box 주변에 붙일 문맥 여백 (박스 크기 대비 비율, 최소 픽셀)
+REEDIT_PADDING_RATIO = 0.5
+REEDIT_MIN_PADDING = 32
+# 합성 경계를 부드럽게 할 페더 폭 (px)
+REEDIT_FEATHER = 12
+# 이미지 모델에 보낼 영역의 최대 크기 (넘으면 축소해서 보내고 결과를 다시 확대)
+REGION_MAX_SIZE = 1024
+
+def context_crop_box(box: tuple, image_size: tuple) -> tuple:
+    """bounding box에 문맥 여백을 더한 크롭 영역 (이미지 경계로 제한)"""
+    width, height = image_size
+    x1, y1, x2, y2 = box
+    pad = max(REEDIT_MIN_PADDING, int(max(x2 - x1, y2 - y1) * REEDIT_PADDING_RATIO))
+    return max(0, x1 - pad), max(0, y1 - pad), min(width, x2 + pad), min(height, y2 + pad)
+
+def clamp_box(box, image_size: tuple) -> tuple:
+    """bounding box를 정수 튜플로 정규화하고 이미지 경계로 제한"""
+    width, height = image_size
+    x1, y1, x2, y2 = normalize_bounding_box(box)
+    x1, x2 = (min(max(0, v), width) for v in (x1, x2))
+    y1, y2 = (min(max(0, v), height) for v in (y1, y2))
+    return x1, y1, x2, y2
+
+def request_region_edit(crop: Image.Image, modification: dict, box: tuple, crop_box: tuple):
+    """
+    크롭 영역 하나와 지시사항 하나만 이미지 모델에 보내고, crop과 같은 크기의 결과 반환.
+    지시사항의 bounding_box는 보내는 크롭 이미지 기준 좌표로 바꿔서 전달합니다.
+    """
+    send = crop
+    if max(crop.size) > REGION_MAX_SIZE:
+        send = crop.copy()
+        send.thumbnail((REGION_MAX_SIZE, REGION_MAX_SIZE), Image.Resampling.LANCZOS)
+    sx, sy = send.width / crop.width, send.height / crop.height
+    modification = {**modification, "bounding_box": [
+        round((box[0] - crop_box[0]) * sx), round((box[1] - crop_box[1]) * sy),
+        round((box[2] - crop_box[0]) * sx), round((box[3] - crop_box[1]) * sy)]}
+
+    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
+        send.save(tmp, "PNG")
+        send_path = tmp.name
+    try:
+        edited_data, _ = generate_modified_image(send_path, [modification])
+    finally:
+        os.unlink(send_path)
+
+    if not edited_data:
+        return None
+    with Image.open(io.BytesIO(base64.b64decode(edited_data))) as img:
+        edited = img.convert("RGB")
+    if edited.size != crop.size:
+        edited = edited.resize(crop.size, Image.Resampling.LANCZOS)
+    return edited
+
+def blend_region(target: Image.Image, edited: Image.Image, crop_box: tuple, box: tuple):
+    """
+    편집 결과 중 박스 + 페더 영역만 target에 합성합니다.
+    여백 안에 있는 다른 차이점은 건드리지 않습니다.
+    """
+    x1, y1, x2, y2 = box
+    half = REEDIT_FEATHER // 2
+    mask = Image.new("L", edited.size, 0)
+    ImageDraw.Draw(mask).rectangle((
+        x1 - crop_box[0] - half,
+        y1 - crop_box[1] - half,
+        x2 - crop_box[0] + half,
+        y2 - crop_box[1] + half,
+    ), fill=255)
+    mask = mask.filter(ImageFilter.GaussianBlur(REEDIT_FEATHER / 2))
+    target.paste(edited, crop_box[:2], mask)
+
+# ============================================================
+# 차이점 하나만 다시 편집
+# ============================================================
+
+def reedit_difference(puzzle_id: str, difference_id: int, instruction: str = None) -> dict:
+    """
+    차이점 하나의 주변만 잘라 이미지 모델에 보내고, 결과를 modified.jpg에 자연스럽게 합성합니다.
+    나머지 차이점은 그대로 유지되며 answer.json의 해당 항목만 갱신됩니다.
+    """
+    puzzle_dir = puzzle_path(OUTPUT_DIR, puzzle_id)
+    answer_path = puzzle_dir / "answer.json"
+    if not answer_path.exists():
+        print(f"  ❌ answer.json을 찾을 수 없습니다: {answer_path}")
+        return None
+
+    with open(answer_path, "r", encoding="utf-8") as f:
+        answer_data = json.load(f)
+
+    diff = next((d for d in answer_data["differences"] if d["id"] == difference_id), None)
+    if diff is None:
+        print(f"  ❌ 차이점 #{difference_id}을 찾을 수 없습니다.")
+        return None
+    if instruction:
+        diff["modification"] = instruction
+
+    print(f"\n✂️ {puzzle_id} 차이점 #{difference_id} 부분 재편집: {diff['name']}")
+
+    with Image.open(puzzle_dir / answer_data.get("original_image", "original.jpg")) as img:
+        original = img.convert("RGB")
+    modified = open_modified(puzzle_dir, answer_data)
+    if modified.size != original.size:
+        modified = modified.resize(original.size, Image.Resampling.LANCZOS)
+
+    # 문맥 여백을 포함한 크롭 영역 (원본에서 잘라 기존의 잘못된 편집은 보내지 않음)
+    box = clamp_box(diff["bounding_box"], original.size)
+    crop_box = context_crop_box(box, original.size)
+    crop = original.crop(crop_box)
+    print(f"  📐 크롭 영역: {crop_box} ({crop.width}x{crop.height}, 전체 {original.width}x{original.height})")
+
+    with stage("generate", difference=difference_id):
+        edited = request_region_edit(crop, {"area_name": diff["name"], "modification": diff["modification"],
+                                            **({"edit_type": diff["edit_type"]} if diff.get("edit_type") else {})},
+                                     box, crop_box)
+    if edited is None:
+        print("  ⚠️ 부분 이미지 생성에 실패했습니다.")
+        return None
+
+    blend_region(modified, edited, crop_box, box)
+    max_bytes = HIRES_MAX_BYTES if max(original.size) > 1024 else 1024 * 1024
+    # 원본은 그대로 연결하고 바뀐 파일만 스테이징에 새로 만든 뒤 새 버전으로 발행
+    staging = create_staging(puzzle_dir)
+    stage_existing(staging, puzzle_dir / answer_data.get("original_image", "original.jpg"), "original.jpg")
+    answer_data["original_image"], answer_data["modified_image"] = "original.jpg", "modified.jpg"
+    with stage("encode"):
+        save_jpeg_under_limit(modified, staging / "modified.jpg", max_bytes)
+        write_difference_mask(staging, original, modified, answer_data)
+        if DELTA_ASSETS or answer_data.get("modified_delta"):
+            build_delta(staging, answer_data)
+            answer_data["modified_delta"] = DELTA_MANIFEST
+
+    answer_data["updated_at"] = datetime.now().isoformat()
+    with stage("write") as result:
+        result["version"] = publish_version(puzzle_dir, staging, answer_data)
+
+    print(f"  ✅ 차이점 #{difference_id} 재편집 완료")
+    with stage("review"):
+        generate_review_page(puzzle_dir, answer_data)
+        sync_puzzle(get_storage(OUTPUT_DIR), OUTPUT_DIR, puzzle_dir)
+    return answer_data
+
+# ============================================================
+# 타일 기반 고해상도 생성
+# ============================================================
+
+# 타일 모드에서 유지할 원본 최대 해상도
+HIRES_MAX_SIZE = int(os.getenv("HIRES_MAX_SIZE", 4096))
+# 고해상도 JPG 파일 크기 상한
+HIRES_MAX_BYTES = 4 * 1024 * 1024
+# 동시에 보낼 타일 요청 수
+TILE_WORKERS = int(os.getenv("TILE_WORKERS", 10))
+
+def generate_tiled_puzzle_for_image(image_path: Path, modifications: list = None, puzzle_id: str = None,
+                                    plan_size: tuple = None) -> dict:
+    """
+    원본 해상도를 유지한 채 퍼즐을 생성합니다.
+    분석은 1024px 미리보기로 하고 좌표를 원본 해상도로 환산한 뒤,
+    차이점 주변 타일만 병렬로 이미지 모델에 보내 원본 위에 합성합니다.
+    저장된 계획은 plan_size(answer.json image_width/height, 없으면 1024px 미리보기) 좌표에서 환산합니다.
+    실패한 타일은 한 번 더 요청하고, 그래도 실패하면 차이점이 빠진 퍼즐을 발행하지 않습니다.
+    VARIANTS 변형은 같은 타일 중 자기 차이점만 다시 합성하므로 이미지 모델 요청이 늘지 않습니다.
+    """
+    puzzle_id = puzzle_id or puzzle_id_for_image(image_path)
+    from_plan = bool(modifications)
+    print(f"\n{'='*60}")
+    print(f"📷 처리 중 (타일 모드): {image_path.name}")
+    print(f"{'='*60}")
+
+    with stage("resize"), load_image_for_size(str(image_path), HIRES_MAX_SIZE) as img:
+        original = img.convert("RGB")
+    print(f"  📐 작업 해상도: {original.width}x{original.height}")
+
+    # 1단계: 미리보기로 분석 후 좌표를 원본 해상도로 환산 (저장된 계획은 계획의 이미지 크기에서 환산)
+    if modifications:
+        print(f"  ♻️ 저장된 수정 계획 재사용 ({len(modifications)}개), 분석 생략")
+        emit("stage", stage="analyze", status="skipped", count=len(modifications))
+        if not plan_size:
+            ratio = min(1, 1024 / max(original.size))
+            plan_size = (round(original.width * ratio), round(original.height * ratio))
+        scale_modifications(modifications, plan_size, original.size)
+    else:
+        preview = original.copy()
+        preview.thumbnail((1024, 1024), Image.Resampling.LANCZOS)
+        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
+            preview.save(tmp, "PNG")
+            preview_path = tmp.name
+        try:
+            with stage("analyze", planner=PLANNER) as result:
+                modifications = plan_modifications(preview_path)
+                result["count"] = len(modifications)
+        finally:
+            os.unlink(preview_path)
+        scale_modifications(modifications, preview.size, original.size)
+
+    if not modifications:
+        print("  ⚠️ 수정 영역을 찾지 못했습니다.")
+        return None
+
+    # 2단계: 차이점별 타일을 병렬 생성 (만들 퍼즐들에 쓰이는 차이점만)
+    targets = variant_targets(puzzle_id, modifications, from_plan)
+    needed = {id(mod) for _, _, target_mods in targets for mod in target_mods}
+    tiles = []
+    outside = set()
+    for mod in (mod for mod in modifications if id(mod) in needed):
+        box = clamp_box(mod["bounding_box"], original.size)
+        if box[2] <= box[0] or box[3] <= box[1]:
+            print(f"  ⚠️ 이미지 밖의 영역, 제외: {mod['area_name']}")
+            outside.add(id(mod))
+            continue
+        crop_box = context_crop_box(box, original.size)
+        tiles.append((mod, box, crop_box, original.crop(crop_box)))
+    print(f"  🧩 타일 {len(tiles)}개 병렬 생성 중 (동시 {TILE_WORKERS}개)...")
+
+    finished = []
+    def edit_tile(tile):
+        edited = request_region_edit(tile[3], tile[0], tile[1], tile[2])
+        # list.append는 스레드 안전, 완료된 타일 수를 진행률로 보고
+        finished.append(edited is not None)
+        emit("progress", stage="generate", done=len(finished), total=len(tiles))
+        return edited
+
+    with stage("generate", backend=EDIT_BACKEND, tiles=len(tiles)) as result, \
+            ThreadPoolExecutor(max_workers=TILE_WORKERS) as executor:
+        results = list(executor.map(edit_tile, tiles))
+        # 실패한 타일만 한 번 더
+        retry = [i for i, edited in enumerate(results) if edited is None]
+        if retry:
+            print(f"  🔁 실패한 타일 {len(retry)}개 다시 요청...")
+            for i, edited in zip(retry, executor.map(lambda i: request_region_edit(tiles[i][3], *tiles[i][:3]), retry)):
+                results[i] = edited
+        result["failed"] = sum(edited is None for edited in results)
+
+    edited_tiles = {}
+    for (mod, box, crop_box, _), edited in zip(tiles, results):
+        if edited is None:
+            print(f"  ❌ 타일 생성 실패: {mod['area_name']}")
+            continue
+        edited_tiles[id(mod)] = (box, crop_box, edited)
+
+    # 3단계: 퍼즐마다 원본 위에 자기 차이점 타일만 합성
+    # (타일이 하나라도 빠진 퍼즐은 발행하지 않음 - 정답에서 조용히 빠지면 검수한 계획과 달라짐)
+    answers = {}
+    for target_id, variant, target_mods in targets:
+        target_mods = [mod for mod in target_mods if id(mod) not in outside]
+        if not target_mods:
+            print(f"  ⚠️ 이미지 생성에 실패했습니다. ({target_id})")
+            continue
+        missing = [mod["area_name"] for mod in target_mods if id(mod) not in edited_tiles]
+        if missing:
+            print(f"  ⚠️ 타일 {len(missing)}개 실패로 발행하지 않습니다. ({target_id}: {', '.join(missing)})")
+            emit("tiles_failed", puzzle_id=target_id, areas=missing)
+            continue
+        modified = original.copy()
+        for mod in target_mods:
+            box, crop_box, edited = edited_tiles[id(mod)]
+            blend_region(modified, edited, crop_box, box)
+        answers[target_id] = save_puzzle_output(image_path, original, modified, target_mods, HIRES_MAX_BYTES,
+                                                puzzle_id=target_id, variant=variant)
+    return answers.get(puzzle_id)
+
 def generate_review_page(puzzle_dir: Path, answer_data: dict):
     """검수용 HTML 페이지 생성"""
     puzzle_id = answer_data["puzzle_id"]
@@ -652,6 +1190,9 @@ def generate_review_page(puzzle_dir: Path, answer_data: dict):
     
     <script>
         const differences = {json.dumps(answer_data['differences'], ensure_ascii=False)};
+        // bounding_box는 original 이미지 픽셀 좌표 (타일 모드는 1024보다 큼)
+        const imageWidth = {answer_data.get('image_width', 1024)};
+        const imageHeight = {answer_data.get('image_height', 1024)};
         
         function drawBoundingBoxes() {{
             const originalImg = document.getElementById('original-img');
@@ -676,8 +1217,8 @@ def generate_review_page(puzzle_dir: Path, answer_data: dict):
                     const height = y2 - y1;
                     
                     // 스케일 계산
-                    const scaleX = originalImg.width / 1024;
-                    const scaleY = originalImg.height / 1024;
+                    const scaleX = originalImg.width / imageWidth;
+                    const scaleY = originalImg.height / imageHeight;
                     
                     // 빨간 사각형 그리기
                     [ctx1, ctx2].forEach(ctx => {{
@@ -743,13 +1284,18 @@ def generate_all_puzzles():
     print(f"📂 출력 폴더: {OUTPUT_DIR}")
     print(f"🖼️  발견된 이미지: {len(image_files)}개")
     
-    # 각 이미지에 대해 퍼즐 생성
+    # 각 이미지에 대해 퍼즐 생성 (VARIANTS 변형 퍼즐도 결과에 포함)
     results = []
     for image_path in sorted(image_files):
         try:
             result = generate_puzzle_for_image(image_path)
             if result:
                 results.append(result)
+                for variant_answer in (puzzle_path(OUTPUT_DIR, variant_id(result["puzzle_id"], name)) / "answer.json"
+                                       for name, _ in parse_variants()):
+                    if variant_answer.exists():
+                        with open(variant_answer, "r", encoding="utf-8") as f:
+                            results.append(json.load(f))
         except Exception as e:
             print(f"  ❌ 오류 발생: {e}")
             import traceback
@@ -759,7 +1305,8 @@ def generate_all_puzzles():
     print("\n" + "="*60)
     print("📊 생성 결과 요약")
     print("="*60)
-    print(f"✅ 성공: {len(results)}/{len(image_files)}개")
+    print(f"✅ 성공: {sum(1 for r in results if not r.get('variant'))}/{len(image_files)}개"
+          f" (변형 포함 퍼즐 {len(results)}개)")
     
     # 전체 퍼즐 목록 JSON 생성
     manifest = {
@@ -769,15 +1316,17 @@ def generate_all_puzzles():
             {
                 "id": r["puzzle_id"],
                 "differences": r["total_differences"],
-                "path": f"puzzles/{r['puzzle_id']}"
+                "path": f"puzzles/{relative_path(r['puzzle_id'])}",
+                **({"variant": r["variant"], "base_puzzle": r["base_puzzle"]} if r.get("variant") else {})
             }
             for r in results
         ]
     }
     
     manifest_path = OUTPUT_DIR / "manifest.json"
-    with open(manifest_path, "w", encoding="utf-8") as f:
-        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    with file_lock(manifest_path):
+        write_json_atomic(manifest_path, manifest)
+    get_storage(OUTPUT_DIR).put_file("manifest.json", manifest_path)
     
     print(f"\n📄 매니페스트 저장: {manifest_path}")
     print("\n✨ 완료!")
@@ -787,12 +1336,61 @@ def generate_all_puzzles():
 # ============================================================
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="틀린그림찾기 문제 생성기")
     # 특정 이미지만 처리하려면 인자로 전달
-    if len(sys.argv) > 1:
-        image_path = Path(sys.argv[1])
-        if image_path.exists():
-            generate_puzzle_for_image(image_path)
-        else:
+    parser.add_argument("image", nargs="?", help="처리할 이미지 (생략 시 IMG 폴더 전체)")
+    parser.add_argument("--plan", help="재사용할 수정 계획 (answer.json 형식) - 분석 단계 생략")
+    parser.add_argument("--planner", choices=["llm", "local", "hybrid"],
+                        help="수정 영역 계획 방식 (환경변수 PLANNER와 동일, 기본 llm)")
+    parser.add_argument("--backend", choices=["gemini", "local"],
+                        help="이미지 편집 백엔드 (환경변수 EDIT_BACKEND와 동일, 기본 gemini)")
+    parser.add_argument("--tiled", action="store_true",
+                        help="원본 해상도 유지 타일 생성 모드 (환경변수 TILED_GENERATION=1과 동일)")
+    parser.add_argument("--reedit", metavar="PUZZLE_ID", help="퍼즐의 차이점 하나만 부분 재편집")
+    parser.add_argument("--difference", type=int, help="--reedit 대상 차이점 ID")
+    parser.add_argument("--instruction", help="--reedit 시 새 수정 지시사항 (생략 시 기존 유지)")
+    parser.add_argument("--puzzle-id", help="출력 퍼즐 ID (기본: 이미지 파일명). 변형 ID(예: i5-easy)면 그 변형만 생성")
+    parser.add_argument("--variants", help="난이도별 변형 (예: easy:5,medium:7, 환경변수 VARIANTS와 동일)")
+    parser.add_argument("--output-dir", help="퍼즐을 만들 폴더 (기본: puzzles, 후보 풀은 IMG/.pool/...)")
+    parser.add_argument("--profile", action="store_true",
+                        help="cProfile/tracemalloc 리포트 작성 (환경변수 PROFILE=1과 동일)")
+    parser.add_argument("--profile-mode", choices=["cprofile", "sample"],
+                        help="프로파일 방식 (환경변수 PROFILE_MODE와 동일, 기본 cprofile)")
+    parser.add_argument("--profile-dir", help="리포트 저장 폴더 (환경변수 PROFILE_DIR와 동일)")
+    args = parser.parse_args()
+    if args.planner:
+        PLANNER = args.planner
+    if args.backend:
+        EDIT_BACKEND = args.backend
+    configure_profiling(enabled=args.profile or None, mode=args.profile_mode, report_dir=args.profile_dir)
+    if args.variants is not None:
+        variants.VARIANTS = args.variants
+    if args.output_dir:
+        OUTPUT_DIR = Path(args.output_dir)
+    try:
+        parse_variants()
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.reedit:
+        if args.difference is None:
+            parser.error("--reedit에는 --difference가 필요합니다")
+        with profiled(f"reedit-{args.reedit}"):
+            if not reedit_difference(args.reedit, args.difference, args.instruction):
+                sys.exit(1)
+    elif args.image:
+        image_path = Path(args.image)
+        if not image_path.exists():
             print(f"❌ 파일을 찾을 수 없습니다: {image_path}")
+            sys.exit(1)
+        modifications, plan_size = load_modification_plan(args.plan) if args.plan else (None, None)
+        tiled = args.tiled or os.getenv("TILED_GENERATION") == "1"
+        generate = generate_tiled_puzzle_for_image if tiled else generate_puzzle_for_image
+        puzzle_id = args.puzzle_id or puzzle_id_for_image(image_path)
+        with profiled(f"generate-{puzzle_id}"):
+            result = generate(image_path, modifications, puzzle_id, plan_size)
+        if not result:
+            sys.exit(1)
     else:
-        generate_all_puzzles()
+        with profiled("generate-all"):
+            generate_all_puzzles()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+로컬 절차적 이미지 편집 백엔드 (PIL/NumPy)
+수정 계획의 각 영역에 색상 변경, 좌우 반전, 패치 기반 객체 제거, 작은 객체 복제를 적용합니다.
+API 호출이 없어 CPU만으로 빠르게 동작하므로 부하 테스트, 데모, 쉬운 난이도 팩에 사용합니다.
+
+사용법 (처리량 측정):
+    python3 generator/procedural_editor.py <이미지> [-n 100]
+"""
+
+import io
+import time
+import base64
+import hashlib
+import argparse
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+# 합성 경계 페더 폭 (px)
+FEATHER = 6
+# 색상 변경 시 Hue 회전량 (0~255 스케일, 약 120도)
+HUE_SHIFT = 85
+# 채도가 낮은 영역은 이 값까지 채도를 올려 색 변화가 보이게 함
+MIN_RECOLOR_SATURATION = 110
+
+# 지시사항 키워드 → 편집 유형 (edit_type이 없는 LLM 계획용)
+EDIT_KEYWORDS = [
+    ("remove", ("제거", "지우", "없애", "사라", "remove", "erase", "delete")),
+    ("mirror", ("반전", "뒤집", "방향", "flip", "mirror")),
+    ("add", ("추가", "생기", "add", "insert")),
+    ("recolor", ("색", "color", "colour")),
+]
+
+def infer_edit_type(modification: dict) -> str:
+    """edit_type이 없으면 지시사항 문구로 편집 유형 추정 (기본은 색상 변경)"""
+    if modification.get("edit_type"):
+        return modification["edit_type"]
+    text = str(modification.get("modification", "")).lower()
+    for edit_type, keywords in EDIT_KEYWORDS:
+        if any(k in text for k in keywords):
+            return edit_type
+    return "recolor"
+
+def feather_mask(size: tuple, ellipse: bool = False) -> Image.Image:
+    """가장자리가 부드러운 합성 마스크"""
+    width, height = size
+    mask = Image.new("L", size, 0)
+    inset = min(FEATHER, width // 4, height // 4)
+    shape = (inset, inset, width - 1 - inset, height - 1 - inset)
+    draw = ImageDraw.Draw(mask)
+    if ellipse:
+        draw.ellipse(shape, fill=255)
+    else:
+        draw.rectangle(shape, fill=255)
+    return mask.filter(ImageFilter.GaussianBlur(inset / 2)) if inset else mask
+
+def clamp_box(box, size: tuple) -> tuple:
+    if isinstance(box, dict):
+        box = [box["x1"], box["y1"], box["x2"], box["y2"]]
+    x1, y1, x2, y2 = (int(round(v)) for v in box[:4])
+    x1, x2 = sorted((min(max(0, x1), size[0]), min(max(0, x2), size[0])))
+    y1, y2 = sorted((min(max(0, y1), size[1]), min(max(0, y2), size[1])))
+    return x1, y1, x2, y2
+
+# ============================================================
+# 편집 연산
+# ============================================================
+
+def recolor(img: Image.Image, box: tuple, rng: np.random.Generator):
+    """영역 안쪽(타원 마스크)의 Hue를 회전"""
+    region = img.crop(box)
+    hsv = np.asarray(region.convert("HSV")).copy()
+    shift = HUE_SHIFT if rng.random() < 0.5 else 256 - HUE_SHIFT
+    hsv[..., 0] = (hsv[..., 0].astype(np.int16) + shift) % 256
+    hsv[..., 1] = np.maximum(hsv[..., 1], MIN_RECOLOR_SATURATION)
+    shifted = Image.fromarray(hsv, "HSV").convert("RGB")
+    img.paste(shifted, box[:2], feather_mask(region.size, ellipse=True))
+
+def mirror(img: Image.Image, box: tuple, rng: np.random.Generator):
+    """영역을 좌우 반전"""
+    region = img.crop(box).transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+    img.paste(region, box[:2], feather_mask(region.size))
+
+def remove_object(img: Image.Image, box: tuple, rng: np.random.Generator):
+    """
+    주변 후보 패치 중 테두리가 가장 비슷한 패치로 영역을 덮어 객체를 지웁니다.
+    후보는 박스 크기만큼 상하좌우/대각선으로 옮긴 위치입니다.
+    """
+    width, height = img.size
+    x1, y1, x2, y2 = box
+    w, h = x2 - x1, y2 - y1
+    arr = np.asarray(img, dtype=np.float32)
+
+    # 대상 영역 바로 바깥 테두리 (얇은 링)와 후보 패치 가장자리를 비교
+    ring = max(2, min(w, h) // 8)
+    ox1, oy1 = max(0, x1 - ring), max(0, y1 - ring)
+    ox2, oy2 = min(width, x2 + ring), min(height, y2 + ring)
+    context = arr[oy1:oy2, ox1:ox2]
+    border = np.ones(context.shape[:2], dtype=bool)
+    border[y1 - oy1:y2 - oy1, x1 - ox1:x2 - ox1] = False
+
+    best, best_cost = None, np.inf
+    for dx, dy in ((-w, 0), (w, 0), (0, -h), (0, h), (-w, -h), (w, -h), (-w, h), (w, h)):
+        cx1, cy1 = x1 + dx, y1 + dy
+        if cx1 - (x1 - ox1) < 0 or cy1 - (y1 - oy1) < 0:
+            continue
+        if cx1 + w + (ox2 - x2) > width or cy1 + h + (oy2 - y2) > height:
+            continue
+        candidate = arr[cy1 - (y1 - oy1):cy1 + h + (oy2 - y2), cx1 - (x1 - ox1):cx1 + w + (ox2 - x2)]
+        cost = float(((candidate - context)[border] ** 2).mean())
+        if cost < best_cost:
+            best, best_cost = (cx1, cy1), cost
+
+    if best is None:
+        # 후보가 없으면 주변 평균색으로 흐리게 채움
+        patch = img.crop(box).filter(ImageFilter.GaussianBlur(max(w, h) / 3))
+    else:
+        patch = img.crop((best[0], best[1], best[0] + w, best[1] + h))
+    img.paste(patch, box[:2], feather_mask(patch.size))
+
+def clone_object(img: Image.Image, box: tuple, rng: np.random.Generator):
+    """이미지의 다른 곳에서 디테일이 많은 작은 패치를 골라 영역 가운데에 복제"""
+    width, height = img.size
+    x1, y1, x2, y2 = box
+    side = max(4, min(x2 - x1, y2 - y1) * 2 // 3)
+    gray = np.asarray(img.convert("L"), dtype=np.float32)
+
+    best, best_var = None, -1.0
+    for _ in range(12):
+        sx = int(rng.integers(0, max(1, width - side)))
+        sy = int(rng.integers(0, max(1, height - side)))
+        # 대상 박스와 겹치는 소스는 제외
+        if sx < x2 and x1 < sx + side and sy < y2 and y1 < sy + side:
+            continue
+        var = float(gray[sy:sy + side, sx:sx + side].var())
+        if var > best_var:
+            best, best_var = (sx, sy), var
+    if best is None:
+        return recolor(img, box, rng)
+
+    patch = img.crop((best[0], best[1], best[0] + side, best[1] + side))
+    px = x1 + (x2 - x1 - side) // 2
+    py = y1 + (y2 - y1 - side) // 2
+    img.paste(patch, (px, py), feather_mask(patch.size, ellipse=True))
+
+EDIT_OPERATIONS = {
+    "recolor": recolor,
+    "mirror": mirror,
+    "remove": remove_object,
+    "add": clone_object,
+}
+
+# ============================================================
+# 백엔드 진입점
+# ============================================================
+
+def apply_modifications(img: Image.Image, modifications: list, seed: int = 0) -> Image.Image:
+    """수정 계획의 영역별로 편집을 적용한 새 이미지 반환"""
+    result = img.convert("RGB")
+    rng = np.random.default_rng(seed)
+    for mod in modifications:
+        box = clamp_box(mod["bounding_box"], result.size)
+        if box[2] - box[0] < 4 or box[3] - box[1] < 4:
+            continue
+        EDIT_OPERATIONS.get(infer_edit_type(mod), recolor)(result, box, rng)
+    return result
+
+def procedural_edit_image(image_path: str, modifications: list) -> tuple:
+    """
+    generate_modified_image와 같은 형식 (base64 데이터, mime 타입)으로 결과 반환.
+    같은 이미지/계획이면 항상 같은 결과가 나오도록 내용 해시로 난수를 고정합니다.
+    """
+    print("  🎨 로컬 절차적 편집 중...")
+    with open(image_path, "rb") as f:
+        seed = int.from_bytes(hashlib.sha1(f.read()).digest()[:4], "big")
+    with Image.open(image_path) as img:
+        edited = apply_modifications(img, modifications, seed)
+    buffer = io.BytesIO()
+    # 바로 다시 디코딩할 중간 결과이므로 압축 없는 BMP로 전달 (PNG 인코딩 비용 절약)
+    edited.save(buffer, "BMP")
+    return base64.b64encode(buffer.getvalue()).decode("utf-8"), "image/bmp"
+
+if __name__ == "__main__":
+    from region_proposer import propose_modifications
+
+    parser = argparse.ArgumentParser(description="절차적 편집 처리량 측정")
+    parser.add_argument("image")
+    parser.add_argument("-n", "--num", type=int, default=100)
+    args = parser.parse_args()
+
+    with Image.open(args.image) as source:
+        source = source.convert("RGB")
+    start = time.perf_counter()
+    for i in range(args.num):
+        apply_modifications(source, propose_modifications(args.image, 10, seed=i), seed=i)
+    elapsed = time.perf_counter() - start
+    print(f"⏱️ {args.num}개 퍼즐 (분석+편집) {elapsed:.1f}초 → 분당 {args.num / elapsed * 60:.0f}개")
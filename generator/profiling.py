@@ -0,0 +1,230 @@
+"""
+선택적 프로파일링 (생성 작업 / 서버 요청)
+PROFILE=1 (또는 generate_puzzle.py --profile, admin_server.py --profile) 일 때만 작업 하나를 cProfile과 tracemalloc으로 감싸고
+끝나면 짧은 리포트(벽시계/CPU 시간, 단계별 시간·메모리, 상위 함수, 상위 할당 위치)를 PROFILE_DIR에 남깁니다.
+꺼져 있으면 profiled()는 플래그 하나만 확인하고 바로 돌아갑니다.
+
+PROFILE_MODE
+    cprofile : 모든 함수 호출을 기록 (정확하지만 호출이 많은 PIL/NumPy 루프는 느려짐)
+    sample   : PROFILE_INTERVAL마다 작업 스레드의 스택을 찍어 셈 (오버헤드가 작고 API 대기 시간도 보임)
+PROFILE_SAMPLE_RATE로 작업/요청의 일부만 프로파일할 수 있습니다 (예: 0.05 = 5%).
+cProfile과 tracemalloc은 프로세스 전체에 하나뿐이므로 동시에 하나의 작업만 프로파일하고 나머지는 건너뜁니다.
+"""
+
+import io
+import os
+import sys
+import time
+import random
+import pstats
+import cProfile
+import threading
+import contextlib
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+try:
+    from . import progress
+except ImportError:
+    import progress
+
+PROFILE = os.getenv("PROFILE") == "1"
+PROFILE_MODE = os.getenv("PROFILE_MODE", "cprofile")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 1.0))
+# sample 모드 스택 수집 주기 (초)
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", 0.005))
+PROFILE_TRACEMALLOC = os.getenv("PROFILE_TRACEMALLOC", "1") == "1"
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR") or Path(__file__).parent.parent / "analytics" / "profiles")
+# 리포트에 남길 상위 함수 / 할당 위치 수
+PROFILE_TOP = 25
+ALLOCATION_TOP = 15
+
+profiling_lock = threading.Lock()
+
+
+def configure(enabled: bool = None, mode: str = None, sample_rate: float = None, report_dir=None):
+    """CLI 옵션으로 환경변수 설정 덮어쓰기"""
+    global PROFILE, PROFILE_MODE, PROFILE_SAMPLE_RATE, PROFILE_DIR
+    if enabled is not None:
+        PROFILE = enabled
+    if mode:
+        PROFILE_MODE = mode
+    if sample_rate is not None:
+        PROFILE_SAMPLE_RATE = sample_rate
+    if report_dir:
+        PROFILE_DIR = Path(report_dir)
+
+
+class StackSampler:
+    """대상 스레드의 스택을 주기적으로 찍어 함수별 샘플 수를 셈 (self = 맨 위 프레임, total = 스택에 있던 프레임)"""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.self_counts = Counter()
+        self.total_counts = Counter()
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            self.self_counts[self._label(frame.f_code)] += 1
+            seen = set()
+            while frame is not None:
+                label = self._label(frame.f_code)
+                if label not in seen:
+                    seen.add(label)
+                    self.total_counts[label] += 1
+                frame = frame.f_back
+
+    @staticmethod
+    def _label(code) -> str:
+        return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+    def report(self, top: int = PROFILE_TOP) -> str:
+        lines = [f"{self.samples} samples every {self.interval * 1000:g} ms", "",
+                 f"{'total%':>7} {'self%':>7}  function"]
+        for label, count in self.total_counts.most_common(top):
+            lines.append(f"{count * 100 / max(self.samples, 1):6.1f}% "
+                         f"{self.self_counts[label] * 100 / max(self.samples, 1):6.1f}%  {label}")
+        return "\n".join(lines)
+
+
+class JobProfile:
+    """작업 하나의 프로파일 (progress.stage 이벤트로 단계별 벽시계/CPU/메모리도 기록)"""
+
+    def __init__(self, name: str, mode: str = None, trace_memory: bool = None):
+        self.name = name
+        self.mode = mode or PROFILE_MODE
+        self.trace_memory = PROFILE_TRACEMALLOC if trace_memory is None else trace_memory
+        self.profiler = cProfile.Profile() if self.mode == "cprofile" else None
+        self.sampler = StackSampler(threading.get_ident()) if self.mode == "sample" else None
+        self.stages = []
+        self.open_stages = {}
+
+    def _measure(self) -> tuple:
+        memory = tracemalloc.get_traced_memory()[0] if self.trace_memory else 0
+        return time.perf_counter(), time.process_time(), memory
+
+    def on_stage(self, name: str, status: str):
+        if status == "start":
+            if self.trace_memory:
+                tracemalloc.reset_peak()
+            self.open_stages[name] = (len(self.open_stages),) + self._measure()
+            return
+        started = self.open_stages.pop(name, None)
+        if started is None:
+            return
+        depth, started = started[0], started[1:]
+        wall, cpu, memory = self._measure()
+        self.stages.append({
+            "stage": name, "status": status, "depth": depth,
+            "wall_ms": (wall - started[0]) * 1000, "cpu_ms": (cpu - started[1]) * 1000,
+            "alloc_kb": (memory - started[2]) / 1024,
+            "peak_kb": tracemalloc.get_traced_memory()[1] / 1024 if self.trace_memory else 0,
+        })
+
+    def start(self):
+        if self.trace_memory:
+            tracemalloc.start()
+        self.started = self._measure()
+        if self.profiler:
+            self.profiler.enable()
+        if self.sampler:
+            self.sampler.start()
+
+    def stop(self):
+        if self.profiler:
+            self.profiler.disable()
+        if self.sampler:
+            self.sampler.stop()
+        self.finished = self._measure()
+        self.peak = tracemalloc.get_traced_memory()[1] if self.trace_memory else 0
+        self.snapshot = tracemalloc.take_snapshot() if self.trace_memory else None
+        if self.trace_memory:
+            tracemalloc.stop()
+
+    def report(self) -> str:
+        wall = self.finished[0] - self.started[0]
+        cpu = self.finished[1] - self.started[1]
+        lines = [
+            f"# profile: {self.name} (mode={self.mode}, {datetime.now().isoformat(timespec='seconds')})",
+            f"wall {wall:.3f}s  cpu {cpu:.3f}s  (cpu/wall {cpu * 100 / max(wall, 1e-9):.0f}%)"
+            + (f"  peak traced {self.peak / 1024 / 1024:.1f} MB" if self.trace_memory else ""),
+        ]
+        if self.stages:
+            lines += ["", "## stages", f"{'stage':<12} {'status':<7} {'wall ms':>9} {'cpu ms':>9} {'alloc KB':>10} {'peak KB':>10}"]
+            for s in self.stages:
+                lines.append(f"{'  ' * s['depth'] + s['stage']:<12} {s['status']:<7} {s['wall_ms']:9.0f} {s['cpu_ms']:9.0f} "
+                             f"{s['alloc_kb']:10.0f} {s['peak_kb']:10.0f}")
+            # 단계 밖(서버 DB 반영, 서브프로세스 대기 등)에서 쓴 시간
+            other = wall * 1000 - sum(s["wall_ms"] for s in self.stages if s["depth"] == 0)
+            lines.append(f"{'(other)':<12} {'':<7} {other:9.0f}")
+
+        lines += ["", "## top functions"]
+        if self.profiler:
+            out = io.StringIO()
+            stats = pstats.Stats(self.profiler, stream=out)
+            stats.sort_stats("cumulative").print_stats(PROFILE_TOP)
+            lines.append(out.getvalue().strip())
+        else:
+            lines.append(self.sampler.report())
+
+        if self.snapshot is not None:
+            lines += ["", "## allocations (still held at end, by line)"]
+            for stat in self.snapshot.statistics("lineno")[:ALLOCATION_TOP]:
+                frame = stat.traceback[0]
+                lines.append(f"{stat.size / 1024:10.0f} KB {stat.count:8} blocks  "
+                             f"{Path(frame.filename).name}:{frame.lineno}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, report_dir: Path) -> Path:
+        report_dir = Path(report_dir)
+        report_dir.mkdir(parents=True, exist_ok=True)
+        stem = f"{self.name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        path = report_dir / f"{stem}.txt"
+        path.write_text(self.report(), encoding="utf-8")
+        if self.profiler:
+            # snakeviz / pstats로 자세히 볼 수 있도록 원본 통계도 저장
+            self.profiler.dump_stats(report_dir / f"{stem}.prof")
+        return path
+
+
+@contextlib.contextmanager
+def profiled(name: str, report_dir=None):
+    """
+    PROFILE이 켜져 있고 샘플링에 걸리면 블록을 프로파일하고 리포트를 씀. 아니면 None을 넘기고 아무것도 안 함.
+        with profiled(f"generate-{puzzle_id}"):
+            ...
+    """
+    if not PROFILE or random.random() >= PROFILE_SAMPLE_RATE or not profiling_lock.acquire(blocking=False):
+        yield None
+        return
+    profile = JobProfile(name)
+    progress.observers.append(profile.on_stage)
+    try:
+        profile.start()
+        try:
+            yield profile
+        finally:
+            profile.stop()
+            path = profile.write(report_dir or PROFILE_DIR)
+            print(f"  🔬 프로파일 리포트: {path}")
+            progress.emit("profile", report=str(path))
+    finally:
+        progress.observers.remove(profile.on_stage)
+        profiling_lock.release()
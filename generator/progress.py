@@ -0,0 +1,62 @@
+"""
+생성 진행 이벤트
+생성기 단계(resize, analyze, generate, fallback, encode, write, review)의 시작/끝을 JSON 한 줄씩 남깁니다.
+관리 서버는 작업마다 PROGRESS_FILE 환경변수로 이벤트 파일을 넘기고, 그 파일을 SSE로 흘려보냅니다.
+PROGRESS_FILE이 없으면 (CLI 단독 실행) 아무것도 하지 않습니다.
+
+이벤트 예:
+    {"t": 1760000000.12, "event": "stage", "stage": "analyze", "status": "start"}
+    {"t": 1760000004.56, "event": "stage", "stage": "analyze", "status": "done", "elapsed_ms": 4440, "count": 10}
+    {"t": 1760000010.00, "event": "progress", "stage": "generate", "done": 3, "total": 10}
+"""
+
+import os
+import json
+import time
+import contextlib
+
+PROGRESS_FILE = os.getenv("PROGRESS_FILE", "")
+# 단계 시작/끝을 함께 받을 함수들 (stage_name, status) - 프로파일러가 단계별 CPU/메모리를 재는 데 사용
+observers = []
+
+
+def append_event(path, event: str, **fields):
+    """이벤트 한 줄 추가 (O_APPEND 한 번의 write라 타일 스레드/서버와 줄이 섞이지 않음)"""
+    line = json.dumps({"t": round(time.time(), 3), "event": event, **fields}, ensure_ascii=False, default=str) + "\n"
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line.encode("utf-8"))
+    finally:
+        os.close(fd)
+
+
+def emit(event: str, **fields):
+    if PROGRESS_FILE:
+        append_event(PROGRESS_FILE, event, **fields)
+
+
+def notify_observers(name: str, status: str):
+    for observer in observers:
+        observer(name, status)
+
+
+@contextlib.contextmanager
+def stage(name: str, **fields):
+    """
+    단계 시작/끝 이벤트. with 블록 안에서 결과 필드를 채우면 done 이벤트에 같이 실립니다.
+        with stage("analyze") as result:
+            result["count"] = len(modifications)
+    """
+    emit("stage", stage=name, status="start", **fields)
+    notify_observers(name, "start")
+    started = time.perf_counter()
+    result = {}
+    try:
+        yield result
+    except Exception as e:
+        notify_observers(name, "failed")
+        emit("stage", stage=name, status="failed", elapsed_ms=round((time.perf_counter() - started) * 1000),
+             error=str(e))
+        raise
+    notify_observers(name, "done")
+    emit("stage", stage=name, status="done", elapsed_ms=round((time.perf_counter() - started) * 1000), **result)
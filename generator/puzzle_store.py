@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+퍼즐 폴더 배치 + 스캔 인덱스
+퍼즐이 수만 개로 늘어도 한 폴더에 몰리지 않도록 ID 해시 앞 두 글자로 하위 폴더를 나눕니다
+(puzzles/3f/i900). PUZZLE_LAYOUT=flat(기본)이면 기존처럼 puzzles/i900을 씁니다.
+
+스캔 인덱스(SQLite)는 퍼즐별 경로, answer.json의 mtime/크기와 주요 필드를 저장해 두고,
+다시 스캔할 때 mtime/크기가 바뀐 answer.json만 읽습니다. 업로드 원본 이미지 위치도 함께 기록합니다.
+
+사용법:
+    python3 generator/puzzle_store.py migrate sharded|flat [--dry-run]
+    python3 generator/puzzle_store.py scan
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+
+PUZZLE_LAYOUT = os.getenv("PUZZLE_LAYOUT", "flat")
+SHARD_PREFIX_LENGTH = 2
+INDEX_FILENAME = ".puzzle_index.sqlite3"
+
+
+def shard_prefix(puzzle_id: str) -> str:
+    return hashlib.sha1(puzzle_id.encode("utf-8")).hexdigest()[:SHARD_PREFIX_LENGTH]
+
+def relative_path(puzzle_id: str, layout: str = None) -> str:
+    """puzzles 폴더 기준 상대 경로 (manifest의 path 필드용)"""
+    if (layout or PUZZLE_LAYOUT) == "sharded":
+        return f"{shard_prefix(puzzle_id)}/{puzzle_id}"
+    return puzzle_id
+
+def puzzle_path(root: Path, puzzle_id: str, layout: str = None) -> Path:
+    """퍼즐 폴더 경로. layout을 지정하지 않으면 이전 배치에 남은 폴더도 찾아줌 (마이그레이션 도중 대비)"""
+    path = Path(root) / relative_path(puzzle_id, layout)
+    if layout is None and not path.exists():
+        other = Path(root) / relative_path(puzzle_id, "flat" if PUZZLE_LAYOUT == "sharded" else "sharded")
+        if other.exists():
+            return other
+    return path
+
+def is_shard_dir(name: str) -> bool:
+    return len(name) == SHARD_PREFIX_LENGTH and all(c in "0123456789abcdef" for c in name)
+
+def iter_puzzle_dirs(root: Path):
+    """(퍼즐 ID, 폴더) 목록 - 평면/샤드 배치 모두 인식"""
+    root = Path(root)
+    if not root.exists():
+        return
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            if is_shard_dir(entry.name) and not os.path.exists(os.path.join(entry.path, "answer.json")):
+                with os.scandir(entry.path) as shard:
+                    for sub in shard:
+                        if sub.is_dir() and not sub.name.startswith("."):
+                            yield sub.name, Path(sub.path)
+            else:
+                yield entry.name, Path(entry.path)
+
+def migrate(root: Path, layout: str, dry_run: bool = False) -> int:
+    """모든 퍼즐 폴더를 layout 배치로 옮기고 옮긴 개수 반환 (같은 파일시스템 안의 rename이라 빠름)"""
+    moved = 0
+    for puzzle_id, current in list(iter_puzzle_dirs(root)):
+        if not (current / "answer.json").exists():
+            continue
+        target = puzzle_path(root, puzzle_id, layout)
+        if current == target:
+            continue
+        if target.exists():
+            print(f"⚠️ {puzzle_id}: 대상 폴더가 이미 있어 건너뜀 ({target})")
+            continue
+        print(f"  {current.relative_to(root)} → {target.relative_to(root)}")
+        if not dry_run:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.rename(current, target)
+        moved += 1
+    return moved
+
+
+class ScanIndex:
+    """answer.json 스캔 결과를 보관하는 SQLite 인덱스"""
+
+    def __init__(self, root: Path, db_path: Path = None):
+        self.root = Path(root)
+        self.db_path = Path(db_path) if db_path else self.root / INDEX_FILENAME
+        self.local = threading.local()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS puzzles (
+                    id TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    total_differences INTEGER,
+                    version TEXT,
+                    created_at TEXT,
+                    variant TEXT,
+                    base_puzzle TEXT
+                );
+                CREATE TABLE IF NOT EXISTS sources (
+                    id TEXT PRIMARY KEY,
+                    path TEXT NOT NULL
+                );
+            """)
+            # 변형 퍼즐 컬럼이 없던 이전 인덱스 파일
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(puzzles)")}
+            for column in ("variant", "base_puzzle"):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE puzzles ADD COLUMN {column} TEXT")
+
+    def connect(self) -> sqlite3.Connection:
+        """스레드별 연결 (Flask 요청 스레드에서도 사용)"""
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+        return conn
+
+    def _store(self, conn, puzzle_id: str, directory: Path, stat):
+        with open(directory / "answer.json", "r", encoding="utf-8") as f:
+            data = json.load(f)
+        row = (puzzle_id, directory.relative_to(self.root).as_posix(), stat.st_mtime_ns, stat.st_size,
+               data.get("total_differences"), data.get("version"), data.get("created_at"),
+               data.get("variant"), data.get("base_puzzle"))
+        conn.execute("INSERT OR REPLACE INTO puzzles (id, path, mtime_ns, size, total_differences, version, created_at,"
+                     " variant, base_puzzle) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+
+    def refresh(self) -> dict:
+        """폴더를 스캔해서 바뀐 answer.json만 다시 읽고, 사라진 퍼즐은 삭제 (바뀐/삭제된 ID 목록 반환)"""
+        conn = self.connect()
+        known = {row["id"]: (row["path"], row["mtime_ns"], row["size"])
+                 for row in conn.execute("SELECT id, path, mtime_ns, size FROM puzzles")}
+        seen, updated = set(), []
+        with conn:
+            for puzzle_id, directory in iter_puzzle_dirs(self.root):
+                try:
+                    stat = os.stat(directory / "answer.json")
+                except FileNotFoundError:
+                    continue
+                seen.add(puzzle_id)
+                path = directory.relative_to(self.root).as_posix()
+                if known.get(puzzle_id) == (path, stat.st_mtime_ns, stat.st_size):
+                    continue
+                self._store(conn, puzzle_id, directory, stat)
+                updated.append(puzzle_id)
+            removed = sorted(known.keys() - seen)
+            conn.executemany("DELETE FROM puzzles WHERE id = ?", [(puzzle_id,) for puzzle_id in removed])
+        return {"scanned": len(seen), "updated": sorted(updated), "removed": removed}
+
+    def refresh_puzzle(self, puzzle_id: str):
+        """퍼즐 하나만 다시 확인하고 인덱스 행 반환 (퍼즐이 사라졌으면 삭제 후 None)"""
+        conn = self.connect()
+        directory = puzzle_path(self.root, puzzle_id)
+        with conn:
+            try:
+                stat = os.stat(directory / "answer.json")
+            except FileNotFoundError:
+                conn.execute("DELETE FROM puzzles WHERE id = ?", (puzzle_id,))
+                return None
+            row = conn.execute("SELECT path, mtime_ns, size FROM puzzles WHERE id = ?", (puzzle_id,)).fetchone()
+            if row is None or tuple(row) != (directory.relative_to(self.root).as_posix(), stat.st_mtime_ns, stat.st_size):
+                self._store(conn, puzzle_id, directory, stat)
+        return dict(conn.execute("SELECT * FROM puzzles WHERE id = ?", (puzzle_id,)).fetchone())
+
+    def rows(self) -> list:
+        return [dict(row) for row in self.connect().execute("SELECT * FROM puzzles ORDER BY id")]
+
+    def lookup(self, puzzle_id: str):
+        """퍼즐 폴더 경로 (인덱스에 없으면 None)"""
+        row = self.connect().execute("SELECT path FROM puzzles WHERE id = ?", (puzzle_id,)).fetchone()
+        return self.root / row["path"] if row else None
+
+    def find_source(self, upload_dir: Path, puzzle_id: str):
+        """
+        업로드 원본 이미지 경로 - 기록이 없거나 파일이 사라졌을 때만 업로드 폴더를 다시 스캔.
+        파일 이름과 ID가 다른 기록(변형 퍼즐 i5-easy → IMG/i5.png 등)은 파일이 남아 있으면 스캔 후에도 유지합니다.
+        """
+        conn = self.connect()
+        row = conn.execute("SELECT path FROM sources WHERE id = ?", (puzzle_id,)).fetchone()
+        if row and Path(row["path"]).exists():
+            return Path(row["path"])
+        sources = {}
+        with os.scandir(upload_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.startswith("."):
+                    sources.setdefault(os.path.splitext(entry.name)[0], entry.path)
+        with conn:
+            recorded = conn.execute("SELECT id, path FROM sources").fetchall()
+            sources = {**{r["id"]: r["path"] for r in recorded if os.path.exists(r["path"])}, **sources}
+            conn.execute("DELETE FROM sources")
+            conn.executemany("INSERT INTO sources VALUES (?, ?)", sources.items())
+        return Path(sources[puzzle_id]) if puzzle_id in sources else None
+
+    def record_source(self, puzzle_id: str, path: Path):
+        with self.connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?)", (puzzle_id, str(path)))
+
+
+if __name__ == "__main__":
+    try:
+        from generate_puzzle import OUTPUT_DIR
+    except ImportError:
+        OUTPUT_DIR = Path(__file__).parent.parent / "puzzles"
+
+    parser = argparse.ArgumentParser(description="퍼즐 폴더 배치 / 스캔 인덱스 도구")
+    parser.add_argument("command", choices=["migrate", "scan"])
+    parser.add_argument("layout", nargs="?", choices=["flat", "sharded"], default="sharded")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        moved = migrate(OUTPUT_DIR, args.layout, args.dry_run)
+        print(f"✅ {moved}개 퍼즐 {'이동 예정' if args.dry_run else '이동 완료'} ({args.layout})")
+        if not args.dry_run and args.layout != PUZZLE_LAYOUT:
+            print(f"⚠️ .env의 PUZZLE_LAYOUT={args.layout} 로 바꿔야 서버/생성기가 새 배치를 사용합니다.")
+    else:
+        print(ScanIndex(OUTPUT_DIR).refresh())
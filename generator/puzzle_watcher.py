@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+퍼즐 폴더 감시 데몬
+answer.json이 바뀌면 (생성기, 서버 저장, 관리자가 직접 편집) 그 퍼즐의 manifest 항목과 review.html만 다시 만듭니다.
+watchdog이 설치되어 있으면 OS 파일 이벤트(inotify 등)를, 없으면 answer.json stat 비교(폴링)를 사용합니다.
+같은 퍼즐에 이벤트가 몰리면 잠깐 모았다가(디바운스) 한 번만 처리합니다.
+
+사용법:
+    pip install watchdog   # 선택 (없으면 폴링)
+    python3 generator/puzzle_watcher.py [--poll]
+"""
+
+import os
+import json
+import time
+import argparse
+import threading
+from pathlib import Path
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+try:
+    from .puzzle_store import ScanIndex, is_shard_dir, puzzle_path
+    from .update_manifest import manifest_entry, write_manifest
+    from .create_review_pages import generate_review_page
+    from .asset_storage import get_storage, sync_puzzle
+    from .asset_publish import file_lock
+except ImportError:
+    from puzzle_store import ScanIndex, is_shard_dir, puzzle_path
+    from update_manifest import manifest_entry, write_manifest
+    from create_review_pages import generate_review_page
+    from asset_storage import get_storage, sync_puzzle
+    from asset_publish import file_lock
+
+# 마지막 이벤트 후 이 시간 동안 조용하면 처리 (초)
+WATCH_DEBOUNCE = float(os.getenv("WATCH_DEBOUNCE", 0.3))
+# 폴링 모드 stat 주기 (초)
+WATCH_POLL_INTERVAL = float(os.getenv("WATCH_POLL_INTERVAL", 0.5))
+FILE_EVENTS = ("created", "deleted", "moved", "modified", "closed")
+DIRECTORY_EVENTS = ("created", "deleted", "moved")
+
+
+def puzzle_id_for_path(root: Path, path: str, is_directory: bool = False):
+    """이벤트 경로 → 퍼즐 ID. answer.json이나 퍼즐 폴더 자체가 아니면 None (이미지, 임시 파일, 스테이징 등)"""
+    try:
+        parts = Path(path).relative_to(root).parts
+    except ValueError:
+        return None
+    if not parts or any(part.startswith(".") for part in parts):
+        return None
+    if len(parts) > 1 and is_shard_dir(parts[0]):
+        parts = parts[1:]
+    if len(parts) == 2 and parts[1] == "answer.json":
+        return parts[0]
+    if len(parts) == 1 and is_directory and not is_shard_dir(parts[0]):
+        return parts[0]
+    return None
+
+
+class PuzzleEventHandler(FileSystemEventHandler):
+    def __init__(self, watcher: "PuzzleWatcher"):
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        # 읽기(opened/closed_no_write)는 무시하고, 폴더 수정 이벤트는 안의 파일(review.html 등)이 바뀔 때마다 오므로 무시
+        if event.event_type not in (DIRECTORY_EVENTS if event.is_directory else FILE_EVENTS):
+            return
+        for path in (event.src_path, getattr(event, "dest_path", None)):
+            if path:
+                puzzle_id = puzzle_id_for_path(self.watcher.root, os.fsdecode(path), event.is_directory)
+                if puzzle_id:
+                    self.watcher.notify(puzzle_id)
+
+
+class PuzzleWatcher:
+    """바뀐 퍼즐을 디바운스해서 manifest 항목 + review.html을 다시 만드는 데몬"""
+
+    def __init__(self, root: Path, debounce: float = WATCH_DEBOUNCE,
+                 poll_interval: float = WATCH_POLL_INTERVAL, polling: bool = False):
+        self.root = Path(root).absolute()
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.polling = polling or Observer is None
+        self.index = ScanIndex(self.root)
+        self.pending = {}
+        self.condition = threading.Condition()
+        self.observer = None
+        self.threads = []
+        self.rebuilds = 0
+
+    def start(self):
+        # 감시를 시작하기 전에 꺼져 있는 동안 바뀐 퍼즐부터 반영
+        scan = self.index.refresh()
+        if scan["updated"] or scan["removed"] or not (self.root / "manifest.json").exists():
+            self.rebuild(scan["updated"] + scan["removed"])
+
+        self.threads.append(threading.Thread(target=self._run, name="puzzle-watch-rebuild", daemon=True))
+        if self.polling:
+            self.threads.append(threading.Thread(target=self._poll, name="puzzle-watch-poll", daemon=True))
+        else:
+            self.observer = Observer()
+            self.observer.schedule(PuzzleEventHandler(self), str(self.root), recursive=True)
+            self.observer.start()
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join()
+
+    def notify(self, puzzle_id: str):
+        """퍼즐 변경 알림 - 마지막 알림 후 debounce 초가 지나면 처리"""
+        with self.condition:
+            self.pending[puzzle_id] = time.monotonic() + self.debounce
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while True:
+                    now = time.monotonic()
+                    due = [p for p, deadline in self.pending.items() if deadline <= now]
+                    if due:
+                        for puzzle_id in due:
+                            del self.pending[puzzle_id]
+                        break
+                    self.condition.wait(min(self.pending.values()) - now if self.pending else None)
+            try:
+                self.rebuild(due)
+            except Exception as e:
+                print(f"⚠️ 감시 재생성 실패 ({', '.join(due)}): {e}")
+
+    def _poll(self):
+        while True:
+            time.sleep(self.poll_interval)
+            scan = self.index.refresh()
+            for puzzle_id in scan["updated"] + scan["removed"]:
+                self.notify(puzzle_id)
+
+    def rebuild(self, puzzle_ids: list):
+        """퍼즐들의 인덱스/review.html을 갱신하고 manifest 해당 항목만 바꿔서 교체"""
+        rows = {}
+        for puzzle_id in puzzle_ids:
+            rows[puzzle_id] = row = self.index.refresh_puzzle(puzzle_id)
+            if row is None:
+                continue
+            puzzle_dir = puzzle_path(self.root, puzzle_id)
+            with open(puzzle_dir / "answer.json", "r", encoding="utf-8") as f:
+                generate_review_page(puzzle_dir, json.load(f))
+            sync_puzzle(get_storage(self.root), self.root, puzzle_dir)
+
+        # 읽고 고쳐 쓰는 동안 서버/다른 도구가 manifest를 덮어쓰지 않도록 잠금
+        manifest_path = self.root / "manifest.json"
+        with file_lock(manifest_path):
+            if manifest_path.exists():
+                with open(manifest_path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+            else:
+                manifest = {"puzzles": [manifest_entry(row) for row in self.index.rows()]}
+            # 서버(sync_db_to_manifest)가 쓴 status/recommended 등 다른 필드는 그대로 둠
+            entries = {entry["id"]: entry for entry in manifest.pop("puzzles", [])}
+            for puzzle_id, row in rows.items():
+                if row is None:
+                    if entries.pop(puzzle_id, None) is not None:
+                        print(f"🗑️ {puzzle_id}: manifest에서 제거")
+                    continue
+                entries.setdefault(puzzle_id, {}).update(manifest_entry(row))
+
+            manifest.pop("generated_at", None)
+            manifest.pop("total_puzzles", None)
+            write_manifest(self.root, [entries[k] for k in sorted(entries)], manifest)
+        self.rebuilds += 1
+
+if __name__ == "__main__":
+    try:
+        from update_manifest import OUTPUT_DIR
+    except ImportError:
+        OUTPUT_DIR = Path(__file__).parent.parent / "puzzles"
+
+    parser = argparse.ArgumentParser(description="퍼즐 폴더 감시 (manifest / 검수 페이지 자동 갱신)")
+    parser.add_argument("--poll", action="store_true", help="watchdog 대신 폴링 사용")
+    parser.add_argument("--debounce", type=float, default=WATCH_DEBOUNCE)
+    args = parser.parse_args()
+
+    watcher = PuzzleWatcher(OUTPUT_DIR, debounce=args.debounce, polling=args.poll).start()
+    print(f"👀 감시 중: {watcher.root} ({'폴링' if watcher.polling else 'watchdog'})")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        watcher.stop()
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+로컬 수정 영역 제안기 (NumPy)
+엣지 밀도/색 대비 기반 saliency와 SLIC 방식 슈퍼픽셀로 후보 영역을 만들고,
+격자 공간 인덱스로 서로 떨어진 N개의 영역을 골라 템플릿 기반 수정 지시사항을 생성합니다.
+분석 API 호출 없이 수십 ms 안에 끝나며, 단독 플래너 또는 LLM 분석용 후보 박스로 사용합니다.
+
+사용법:
+    python3 generator/region_proposer.py <이미지> [-n 10] [--seed 0]
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import numpy as np
+from PIL import Image
+
+# 분석용 축소 해상도 (긴 변)
+ANALYSIS_SIZE = 192
+# 슈퍼픽셀 개수와 SLIC 파라미터
+NUM_SEGMENTS = 200
+SLIC_COMPACTNESS = 12.0
+SLIC_ITERATIONS = 5
+# 영역 한 변의 크기 범위 (이미지 긴 변 대비)
+MIN_REGION_FRAC = 0.06
+MAX_REGION_FRAC = 0.2
+# 영역 사이 최소 간격 (이미지 긴 변 대비)
+MIN_SPACING_FRAC = 0.03
+# 가장자리에 붙은 영역 제외 폭 (이미지 긴 변 대비)
+BORDER_MARGIN_FRAC = 0.02
+
+# 색상 이름 (Hue 범위 시작 각도 → 이름)
+HUE_NAMES = [
+    (0, "빨간"), (20, "주황"), (45, "노란"), (70, "초록"), (160, "하늘"),
+    (200, "파란"), (255, "보라"), (290, "분홍"), (340, "빨간"),
+]
+RECOLOR_TARGETS = {
+    "빨간": "파란색", "주황": "보라색", "노란": "초록색", "초록": "빨간색", "하늘": "주황색",
+    "파란": "노란색", "보라": "초록색", "분홍": "하늘색", "흰": "검은색", "회색": "빨간색", "검은": "흰색",
+}
+ADD_OBJECTS = ["작은 별", "나비", "꽃 한 송이", "빨간 공", "작은 새", "하트 모양", "나뭇잎", "작은 구름"]
+POSITION_NAMES = [
+    ["왼쪽 위", "위쪽 가운데", "오른쪽 위"],
+    ["왼쪽", "가운데", "오른쪽"],
+    ["왼쪽 아래", "아래쪽 가운데", "오른쪽 아래"],
+]
+
+# ============================================================
+# 이미지 특징
+# ============================================================
+
+def rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """sRGB (0~255) → CIE Lab"""
+    c = rgb.astype(np.float32) / 255.0
+    c = np.where(c > 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+    xyz = c @ np.array([
+        [0.4124, 0.2126, 0.0193],
+        [0.3576, 0.7152, 0.1192],
+        [0.1805, 0.0722, 0.9505],
+    ], dtype=np.float32)
+    xyz /= np.array([0.9505, 1.0, 1.089], dtype=np.float32)
+    f = np.where(xyz > 0.008856, np.cbrt(xyz), 7.787 * xyz + 16 / 116)
+    return np.stack([
+        116 * f[..., 1] - 16,
+        500 * (f[..., 0] - f[..., 1]),
+        200 * (f[..., 1] - f[..., 2]),
+    ], axis=-1)
+
+def box_blur(arr: np.ndarray, radius: int) -> np.ndarray:
+    """적분 영상으로 계산한 박스 블러"""
+    padded = np.pad(arr, radius + 1, mode="edge")
+    integral = padded.cumsum(0).cumsum(1)
+    size = 2 * radius + 1
+    total = (integral[size:, size:] - integral[:-size, size:]
+             - integral[size:, :-size] + integral[:-size, :-size])
+    return total[:arr.shape[0], :arr.shape[1]] / (size * size)
+
+def normalize(arr: np.ndarray) -> np.ndarray:
+    span = arr.max() - arr.min()
+    return (arr - arr.min()) / span if span > 0 else np.zeros_like(arr)
+
+def compute_saliency(lab: np.ndarray) -> tuple:
+    """(saliency, 엣지 강도) 맵 반환 - 엣지 밀도와 전역 색 대비의 평균"""
+    gy, gx = np.gradient(lab[..., 0])
+    edges = normalize(np.hypot(gx, gy))
+    radius = max(1, lab.shape[1] // 48)
+    edge_density = normalize(box_blur(edges, radius))
+    contrast = normalize(np.linalg.norm(lab - lab.reshape(-1, 3).mean(0), axis=-1))
+    return 0.5 * edge_density + 0.5 * box_blur(contrast, radius), edges
+
+def slic_superpixels(lab: np.ndarray, n_segments: int = NUM_SEGMENTS,
+                     compactness: float = SLIC_COMPACTNESS, iterations: int = SLIC_ITERATIONS) -> np.ndarray:
+    """단순화한 SLIC: 격자 초기화 후 각 중심의 2S 창 안에서만 k-means 할당"""
+    h, w, _ = lab.shape
+    step = max(2, int(np.sqrt(h * w / n_segments)))
+    ys, xs = np.meshgrid(np.arange(step // 2, h, step), np.arange(step // 2, w, step), indexing="ij")
+    centers = np.stack([ys.ravel(), xs.ravel()], axis=1).astype(np.float32)
+    colors = lab[ys.ravel(), xs.ravel()].astype(np.float32)
+    k = len(centers)
+
+    yy, xx = np.mgrid[0:h, 0:w].astype(np.float32)
+    labels = np.zeros((h, w), dtype=np.int32)
+    distances = np.empty((h, w), dtype=np.float32)
+    spatial_weight = (compactness / step) ** 2
+
+    for _ in range(iterations):
+        distances.fill(np.inf)
+        for i in range(k):
+            cy, cx = centers[i]
+            y0, y1 = max(0, int(cy) - step), min(h, int(cy) + step + 1)
+            x0, x1 = max(0, int(cx) - step), min(w, int(cx) + step + 1)
+            d = ((lab[y0:y1, x0:x1] - colors[i]) ** 2).sum(-1)
+            d += spatial_weight * ((yy[y0:y1, x0:x1] - cy) ** 2 + (xx[y0:y1, x0:x1] - cx) ** 2)
+            window = distances[y0:y1, x0:x1]
+            better = d < window
+            window[better] = d[better]
+            labels[y0:y1, x0:x1][better] = i
+
+        flat = labels.ravel()
+        counts = np.bincount(flat, minlength=k).astype(np.float32)
+        valid = counts > 0
+        centers[valid, 0] = np.bincount(flat, yy.ravel(), k)[valid] / counts[valid]
+        centers[valid, 1] = np.bincount(flat, xx.ravel(), k)[valid] / counts[valid]
+        for c in range(3):
+            colors[valid, c] = np.bincount(flat, lab[..., c].ravel(), k)[valid] / counts[valid]
+
+    return labels
+
+# ============================================================
+# 후보 영역
+# ============================================================
+
+def color_name(rgb: np.ndarray) -> str:
+    """평균 RGB의 대략적인 한글 색 이름"""
+    r, g, b = (rgb / 255.0).tolist()
+    high, low = max(r, g, b), min(r, g, b)
+    saturation = 0 if high == 0 else (high - low) / high
+    if saturation < 0.2:
+        if high > 0.8:
+            return "흰"
+        return "검은" if high < 0.25 else "회색"
+    if high == r:
+        hue = (60 * (g - b) / (high - low)) % 360
+    elif high == g:
+        hue = 60 * (b - r) / (high - low) + 120
+    else:
+        hue = 60 * (r - g) / (high - low) + 240
+    name = HUE_NAMES[0][1]
+    for start, label in HUE_NAMES:
+        if hue >= start:
+            name = label
+    return name
+
+def fit_box(cy: float, cx: float, y0: int, x0: int, y1: int, x1: int,
+            min_side: int, max_side: int, height: int, width: int) -> tuple:
+    """슈퍼픽셀 경계 박스를 [min_side, max_side] 크기로 맞추고 중심 기준으로 이미지 안에 넣음"""
+    def fit(lo, hi, center, limit):
+        side = min(max(hi - lo, min_side), max_side, limit)
+        start = min(max(0, int(round(center - side / 2))), limit - side)
+        return start, start + side
+    bx0, bx1 = fit(x0, x1, cx, width)
+    by0, by1 = fit(y0, y1, cy, height)
+    return bx0, by0, bx1, by1
+
+def propose_regions(image_path: str, num_regions: int = 10) -> list:
+    """
+    서로 떨어진 후보 영역 목록 반환 (원본 이미지 픽셀 좌표).
+    각 항목: {"bounding_box", "score", "color", "colorfulness", "edge_density", "position"}
+    """
+    with Image.open(image_path) as img:
+        width, height = img.size
+        img.draft("RGB", (ANALYSIS_SIZE * 2, ANALYSIS_SIZE * 2))
+        small = img.convert("RGB")
+        small.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE), Image.Resampling.BILINEAR)
+    rgb = np.asarray(small, dtype=np.float32)
+    h, w, _ = rgb.shape
+    scale_x, scale_y = width / w, height / h
+
+    lab = rgb_to_lab(rgb)
+    saliency, edges = compute_saliency(lab)
+    labels = slic_superpixels(lab)
+
+    # 슈퍼픽셀별 통계 (bincount로 한 번에 계산)
+    k = labels.max() + 1
+    flat = labels.ravel()
+    counts = np.bincount(flat, minlength=k).astype(np.float32)
+    yy, xx = np.mgrid[0:h, 0:w]
+    safe = np.maximum(counts, 1)
+    mean_y = np.bincount(flat, yy.ravel(), k) / safe
+    mean_x = np.bincount(flat, xx.ravel(), k) / safe
+    mean_sal = np.bincount(flat, saliency.ravel(), k) / safe
+    mean_edge = np.bincount(flat, edges.ravel(), k) / safe
+    mean_rgb = np.stack([np.bincount(flat, rgb[..., c].ravel(), k) / safe for c in range(3)], axis=1)
+    chroma = np.hypot(lab[..., 1], lab[..., 2])
+    mean_chroma = np.bincount(flat, chroma.ravel(), k) / safe
+    y_min = np.full(k, h); y_max = np.zeros(k, dtype=np.int64)
+    x_min = np.full(k, w); x_max = np.zeros(k, dtype=np.int64)
+    np.minimum.at(y_min, flat, yy.ravel()); np.maximum.at(y_max, flat, yy.ravel() + 1)
+    np.minimum.at(x_min, flat, xx.ravel()); np.maximum.at(x_max, flat, xx.ravel() + 1)
+
+    long_side = max(w, h)
+    min_side = max(2, int(long_side * MIN_REGION_FRAC))
+    max_side = max(min_side, int(long_side * MAX_REGION_FRAC))
+    margin = long_side * BORDER_MARGIN_FRAC
+
+    candidates = []
+    for i in np.flatnonzero(counts):
+        box = fit_box(mean_y[i], mean_x[i], y_min[i], x_min[i], y_max[i], x_max[i],
+                      min_side, max_side, h, w)
+        if box[0] < margin or box[1] < margin or box[2] > w - margin or box[3] > h - margin:
+            continue
+        candidates.append({
+            "bounding_box": [int(box[0] * scale_x), int(box[1] * scale_y),
+                             int(box[2] * scale_x), int(box[3] * scale_y)],
+            "score": float(mean_sal[i]),
+            "color": color_name(mean_rgb[i]),
+            "colorfulness": float(mean_chroma[i]),
+            "edge_density": float(mean_edge[i]),
+            "position": POSITION_NAMES[min(2, int(3 * mean_y[i] / h))][min(2, int(3 * mean_x[i] / w))],
+        })
+
+    candidates.sort(key=lambda c: c["score"], reverse=True)
+    spacing = int(max(width, height) * MIN_SPACING_FRAC)
+    selected = select_separated(candidates, num_regions, spacing, (width, height))
+    if len(selected) < num_regions:
+        # 후보가 부족하면 간격 조건만 절반으로 완화
+        selected = select_separated(candidates, num_regions, spacing // 2, (width, height))
+    return selected
+
+# ============================================================
+# 공간 인덱스
+# ============================================================
+
+class BoxGrid:
+    """격자 해시 공간 인덱스 - 박스가 걸친 칸에만 등록하고 주변 칸만 검사"""
+
+    def __init__(self, cell_size: int):
+        self.cell_size = max(1, cell_size)
+        self.cells = {}
+
+    def _cells(self, box: tuple):
+        x0, y0, x1, y1 = box
+        for gx in range(int(x0) // self.cell_size, int(x1) // self.cell_size + 1):
+            for gy in range(int(y0) // self.cell_size, int(y1) // self.cell_size + 1):
+                yield gx, gy
+
+    def intersects(self, box: tuple) -> bool:
+        x0, y0, x1, y1 = box
+        for cell in self._cells(box):
+            for ox0, oy0, ox1, oy1 in self.cells.get(cell, ()):
+                if x0 < ox1 and ox0 < x1 and y0 < oy1 and oy0 < y1:
+                    return True
+        return False
+
+    def insert(self, box: tuple):
+        for cell in self._cells(box):
+            self.cells.setdefault(cell, []).append(box)
+
+def select_separated(candidates: list, count: int, spacing: int, image_size: tuple) -> list:
+    """점수 순으로 훑으며 이미 고른 영역과 spacing 이내로 붙는 후보는 건너뜀"""
+    grid = BoxGrid(int(max(image_size) * MAX_REGION_FRAC) + spacing)
+    selected = []
+    for cand in candidates:
+        x0, y0, x1, y1 = cand["bounding_box"]
+        expanded = (x0 - spacing, y0 - spacing, x1 + spacing, y1 + spacing)
+        if grid.intersects(expanded):
+            continue
+        grid.insert((x0, y0, x1, y1))
+        selected.append(cand)
+        if len(selected) == count:
+            break
+    return selected
+
+def drop_overlapping(modifications: list, max_overlap: float = 0.1) -> list:
+    """
+    LLM이 제안한 영역 중 앞선 영역과 겹치는 것을 제거합니다.
+    겹친 면적이 작은 박스 면적의 max_overlap 비율을 넘으면 겹친 것으로 봅니다.
+    """
+    kept, boxes = [], []
+    for mod in modifications:
+        box = mod.get("bounding_box")
+        if isinstance(box, dict):
+            box = [box["x1"], box["y1"], box["x2"], box["y2"]]
+        try:
+            x0, y0, x1, y1 = (float(v) for v in box[:4])
+        except (TypeError, ValueError):
+            continue
+        area = max(1.0, (x1 - x0) * (y1 - y0))
+        overlapping = False
+        for ox0, oy0, ox1, oy1 in boxes:
+            inter = max(0, min(x1, ox1) - max(x0, ox0)) * max(0, min(y1, oy1) - max(y0, oy0))
+            if inter > max_overlap * min(area, (ox1 - ox0) * (oy1 - oy0)):
+                overlapping = True
+                break
+        if overlapping:
+            print(f"  ⚠️ 다른 영역과 겹쳐 제외: {mod.get('area_name', '')}")
+            continue
+        boxes.append((x0, y0, x1, y1))
+        kept.append(mod)
+    return kept
+
+# ============================================================
+# 수정 지시사항 템플릿
+# ============================================================
+
+def build_modification(region: dict, edit_type: str, rng: random.Random) -> dict:
+    """후보 영역 하나를 분석 API와 같은 형식의 수정 계획으로 변환"""
+    color, position = region["color"], region["position"]
+    if edit_type == "recolor":
+        target = RECOLOR_TARGETS[color]
+        area_name = f"{position}의 {color} 부분"
+        modification = f"{position}에 있는 {color}색 물체의 색을 {target}으로 바꾸세요"
+    elif edit_type == "remove":
+        area_name = f"{position}의 물체"
+        modification = f"{position}에 있는 물체를 지우고 주변 배경으로 자연스럽게 채우세요"
+    elif edit_type == "mirror":
+        area_name = f"{position}의 물체 방향"
+        modification = f"{position}에 있는 물체를 좌우로 뒤집으세요"
+    else:
+        obj = rng.choice(ADD_OBJECTS)
+        area_name = f"{position}의 {obj}"
+        modification = f"{position}의 빈 곳에 {obj}을(를) 추가하세요"
+    return {
+        "area_name": area_name,
+        "description": f"{position}의 {color}색 영역",
+        "modification": modification,
+        "bounding_box": region["bounding_box"],
+        "edit_type": edit_type,
+    }
+
+def propose_modifications(image_path: str, num_differences: int = 10, seed: int = None) -> list:
+    """로컬 분석만으로 analyze_image_for_modifications와 같은 형식의 수정 계획 생성"""
+    rng = random.Random(seed)
+    regions = propose_regions(image_path, num_differences)
+    if not regions:
+        return []
+
+    # 특징에 맞는 수정 유형을 고르되, 같은 유형이 몰리지 않도록 사용 횟수로 균형
+    used = {"recolor": 0, "remove": 0, "mirror": 0, "add": 0}
+    modifications = []
+    for region in regions:
+        eligible = ["add"]
+        if region["colorfulness"] > 15:
+            eligible.append("recolor")
+        if region["edge_density"] > 0.15:
+            eligible += ["remove", "mirror"]
+        edit_type = min(eligible, key=lambda t: (used[t], rng.random()))
+        used[edit_type] += 1
+        mod = build_modification(region, edit_type, rng)
+        # 같은 위치/색 이름이 반복되면 번호를 붙여 구분
+        same = sum(1 for m in modifications if m["area_name"].startswith(mod["area_name"]))
+        if same:
+            mod["area_name"] += f" {same + 1}"
+        modifications.append(mod)
+
+    # saliency가 높은(눈에 띄는) 영역일수록 쉬움
+    order = sorted(range(len(regions)), key=lambda i: regions[i]["score"], reverse=True)
+    for rank, i in enumerate(order):
+        modifications[i]["difficulty"] = 1 + int(4 * rank / max(1, len(order) - 1))
+    return modifications
+
+def format_candidates_for_prompt(regions: list) -> str:
+    """LLM 분석 프롬프트에 넣을 후보 박스 목록"""
+    return "\n".join(
+        f"- [{', '.join(str(v) for v in r['bounding_box'])}] {r['position']}, {r['color']}색"
+        for r in regions
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로컬 수정 영역 제안기")
+    parser.add_argument("image")
+    parser.add_argument("-n", "--num", type=int, default=10)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = propose_modifications(args.image, args.num, args.seed)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    print(f"⏱️ {len(result)}개 영역, {elapsed:.1f}ms", file=sys.stderr)
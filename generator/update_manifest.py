@@ -1,38 +1,53 @@
 import json
-import os
 from pathlib import Path
 from datetime import datetime
 
+try:
+    from .puzzle_store import ScanIndex
+    from .asset_publish import write_json_atomic, file_lock
+    from .asset_storage import get_storage
+except ImportError:
+    from puzzle_store import ScanIndex
+    from asset_publish import write_json_atomic, file_lock
+    from asset_storage import get_storage
+
 BASE_DIR = Path(__file__).parent.parent.absolute()
 OUTPUT_DIR = BASE_DIR / "puzzles"
 if not OUTPUT_DIR.exists():
     OUTPUT_DIR = BASE_DIR / "public" / "puzzles"
 
-def update_manifest():
-    puzzles = []
-    for puzzle_id in sorted(os.listdir(OUTPUT_DIR)):
-        puzzle_path = OUTPUT_DIR / puzzle_id
-        if puzzle_path.is_dir():
-            answer_path = puzzle_path / "answer.json"
-            if answer_path.exists():
-                with open(answer_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    puzzles.append({
-                        "id": data["puzzle_id"],
-                        "differences": data["total_differences"],
-                        "path": f"puzzles/{data['puzzle_id']}"
-                    })
-    
+def manifest_entry(row: dict) -> dict:
+    """스캔 인덱스 행 → manifest 항목"""
+    return {
+        "id": row["id"],
+        "differences": row["total_differences"],
+        "path": f"puzzles/{row['path']}",
+        **({"variant": row["variant"], "base_puzzle": row["base_puzzle"]} if row.get("variant") else {})
+    }
+
+def write_manifest(output_dir: Path, puzzles: list, extra: dict = None):
+    """
+    manifest.json 저장 (임시 파일에 쓴 뒤 교체하므로 읽는 쪽은 항상 완성된 파일을 봄).
+    다른 프로세스와 겹치지 않도록 호출하는 쪽에서 file_lock(manifest.json)을 잡고 불러야 합니다.
+    """
     manifest = {
+        **(extra or {}),
         "generated_at": datetime.now().isoformat(),
         "total_puzzles": len(puzzles),
         "puzzles": puzzles
     }
+    write_json_atomic(Path(output_dir) / "manifest.json", manifest)
+    get_storage(Path(output_dir)).put_file("manifest.json", Path(output_dir) / "manifest.json")
+
+def update_manifest():
+    # 스캔 인덱스가 바뀐 answer.json만 다시 읽음
+    index = ScanIndex(OUTPUT_DIR)
+    scan = index.refresh()
+    puzzles = [manifest_entry(row) for row in index.rows()]
+    with file_lock(OUTPUT_DIR / "manifest.json"):
+        write_manifest(OUTPUT_DIR, puzzles)
     
-    with open(OUTPUT_DIR / "manifest.json", "w", encoding="utf-8") as f:
-        json.dump(manifest, f, ensure_ascii=False, indent=2)
-    
-    print(f"Manifest updated with {len(puzzles)} puzzles.")
+    print(f"Manifest updated with {len(puzzles)} puzzles ({len(scan['updated'])} re-read, {len(scan['removed'])} removed).")
 
 if __name__ == "__main__":
     update_manifest()
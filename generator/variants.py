@@ -0,0 +1,54 @@
+"""
+난이도별 변형 퍼즐 (한 번의 분석으로 여러 퍼즐)
+VARIANTS="easy:5,medium:7" 이면 기본 퍼즐(분석한 차이점 전부) 외에 <ID>-easy(5개), <ID>-medium(7개) 퍼즐을 함께 만듭니다.
+앞에 적은 변형일수록 쉬운(difficulty 숫자가 작은) 차이점을 고릅니다. 기본 퍼즐이 가장 어려운 변형입니다.
+리사이즈/분석은 한 번만 하고, 변형별 이미지 편집은 동시에 요청합니다 (타일 모드는 같은 타일을 다시 합성).
+"""
+
+import os
+
+VARIANTS = os.getenv("VARIANTS", "")
+
+
+def parse_variants(spec: str = None) -> list:
+    """'easy:5,medium:7' → [('easy', 5), ('medium', 7)]"""
+    spec = VARIANTS if spec is None else spec
+    variants = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, count = item.partition(":")
+        if not name.isalnum() or not count.isdigit() or int(count) < 1:
+            raise ValueError(f"잘못된 VARIANTS 항목: {item} (예: easy:5,medium:7)")
+        variants.append((name, int(count)))
+    return variants
+
+
+def variant_id(puzzle_id: str, name: str) -> str:
+    return f"{puzzle_id}-{name}"
+
+
+def variant_ids(puzzle_id: str, spec: str = None) -> list:
+    """기본 퍼즐과 함께 만들어지는 변형 퍼즐 ID 목록"""
+    return [variant_id(puzzle_id, name) for name, _ in parse_variants(spec)]
+
+
+def split_variant_id(puzzle_id: str, spec: str = None) -> tuple:
+    """'i5-easy' → ('i5', 'easy'), 변형이 아니면 (puzzle_id, None)"""
+    base, _, name = puzzle_id.rpartition("-")
+    if base and name in dict(parse_variants(spec)):
+        return base, name
+    return puzzle_id, None
+
+
+def select_variant(modifications: list, name: str, spec: str = None) -> list:
+    """
+    변형에 들어갈 차이점 고르기: 변형 순서에 따라 목표 난이도(첫 번째 1 → 기본 퍼즐 5 쪽)를 정하고
+    difficulty가 목표에 가까운 것부터 count개 (원래 순서 유지)
+    """
+    variants = parse_variants(spec)
+    names = [n for n, _ in variants]
+    count = dict(variants)[name]
+    target = 1 + 4 * names.index(name) / len(variants)
+    ranked = sorted(range(len(modifications)),
+                    key=lambda i: (abs(modifications[i].get("difficulty", 3) - target), i))
+    chosen = sorted(ranked[:count])
+    return [modifications[i] for i in chosen]
@@ -0,0 +1,23 @@
+"""
+gunicorn 설정 (pre-fork 워커 N개)
+    gunicorn -c gunicorn.conf.py wsgi:app
+요청이 아무 워커로나 가도 되도록 워커 간 상태는 공유 저장소를 거칩니다.
+  - 게임 세션: game_sessions 테이블 (SESSION_STORE=memory는 WEB_CONCURRENCY=1에서만)
+  - 리더보드: LEADERBOARD_TTL마다 scores 테이블에서 다시 읽음
+  - 정답 데이터 캐시: 변경 피드(puzzle_changes)를 구독해서 다른 워커의 변경도 무효화
+"""
+
+import os
+import multiprocessing
+
+bind = os.getenv("BIND", "127.0.0.1:8001")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+# 워커 하나 안에서도 생성기 실행 같은 긴 요청이 다른 요청을 막지 않도록 스레드 사용
+worker_class = "gthread"
+threads = int(os.getenv("WEB_THREADS", 4))
+# 퍼즐 생성(/upload, /regenerate)은 수 분 걸릴 수 있음
+timeout = int(os.getenv("WEB_TIMEOUT", 600))
+# 앱은 워커마다 fork 뒤에 import (DB 연결, 캐시, 백그라운드 스레드를 워커별로 만듦)
+preload_app = False
+# 종료 시 atexit 저장(클릭 버퍼, 통계, 세션 스냅샷)이 끝날 때까지 대기
+graceful_timeout = 30
@@ -0,0 +1,239 @@
+"""
+리더보드 (퍼즐별 / 일별 Top-K)
+상위 K개 기록만 정렬된 리스트로 메모리에 들고 있어 조회는 O(K)이고,
+점수 저장은 대기열에 모았다가 백그라운드 스레드가 여러 행을 한 번에 INSERT 합니다 (write-behind).
+보드는 처음 사용할 때 DB에서 읽어 채우고 (DB를 읽지 못하면 캐시하지 않고 다음 조회 때 다시 읽음),
+다른 워커가 저장한 기록도 보이도록 LEADERBOARD_TTL이 지나면 scores 테이블에서 다시 읽습니다.
+이 워커가 아직 저장하지 못한 기록은 다시 읽은 보드에도 반영합니다.
+"""
+
+import os
+
+import time
+import atexit
+import bisect
+import threading
+from datetime import datetime, timedelta
+
+LEADERBOARD_SIZE = 100
+FLUSH_INTERVAL = 5.0
+FLUSH_SIZE = 500
+# DB 장애로 쌓인 미저장 기록 상한 (넘으면 오래된 것부터 버림)
+MAX_PENDING = 100_000
+# 보드를 scores 테이블에서 다시 읽는 주기 (초) - 다른 워커의 기록은 저장 주기 + 이 시간 안에 보임
+LEADERBOARD_TTL = float(os.getenv("LEADERBOARD_TTL", 10))
+
+CREATE_SCORES_TABLE = """
+CREATE TABLE IF NOT EXISTS scores (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    puzzle_id VARCHAR(64) NOT NULL,
+    player VARCHAR(64) NOT NULL,
+    score INT NOT NULL,
+    elapsed INT NOT NULL,
+    wrong_clicks INT NOT NULL DEFAULT 0,
+    hints_used INT NOT NULL DEFAULT 0,
+    all_found TINYINT(1) NOT NULL DEFAULT 0,
+    created_at DATETIME NOT NULL,
+    INDEX idx_scores_puzzle (puzzle_id, score),
+    INDEX idx_scores_created (created_at, score)
+)
+"""
+
+INSERT_SCORE = ("INSERT INTO scores (puzzle_id, player, score, elapsed, wrong_clicks, hints_used, all_found, created_at) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)")
+
+
+class TopK:
+    """
+    점수 내림차순(동점이면 빠른 기록, 먼저 낸 기록 우선) 상위 K개. 플레이어당 최고 기록 하나만 유지합니다.
+    """
+
+    __slots__ = ("k", "keys", "entries", "players")
+
+    def __init__(self, k: int = LEADERBOARD_SIZE):
+        self.k = k
+        self.keys = []
+        self.entries = []
+        self.players = {}
+
+    def add(self, player: str, score: int, elapsed: int, created_at: str):
+        """기록 추가 후 순위(1부터) 반환, 순위권 밖이면 None"""
+        key = (-score, elapsed, created_at)
+        previous = self.players.get(player)
+        if previous is not None:
+            if previous <= key:
+                return None
+            index = bisect.bisect_left(self.keys, previous)
+            del self.keys[index], self.entries[index]
+        if len(self.keys) >= self.k and key >= self.keys[-1]:
+            return None
+
+        index = bisect.bisect_left(self.keys, key)
+        self.keys.insert(index, key)
+        self.entries.insert(index, {"player": player, "score": score, "elapsed": elapsed, "created_at": created_at})
+        self.players[player] = key
+        if len(self.keys) > self.k:
+            self.keys.pop()
+            dropped = self.entries.pop()
+            del self.players[dropped["player"]]
+        return index + 1
+
+    def top(self, limit: int = None) -> list:
+        entries = self.entries[:limit] if limit else self.entries
+        return [{"rank": i + 1, **e} for i, e in enumerate(entries)]
+
+
+class Leaderboard:
+    """퍼즐별/일별 Top-K 보드 + write-behind 저장"""
+
+    def __init__(self, connect, k: int = LEADERBOARD_SIZE, flush_interval: float = FLUSH_INTERVAL,
+                 flush_size: int = FLUSH_SIZE, ttl: float = LEADERBOARD_TTL):
+        self.connect = connect
+        self.k = k
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.ttl = ttl
+        # 키 → (보드, 읽은 시각)
+        self.puzzle_boards = {}
+        self.daily_boards = {}
+        self.pending = []
+        # 저장 중인 기록 (커밋 전에 보드를 다시 읽어도 빠지지 않도록)
+        self.flushing = []
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.table_ready = False
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="leaderboard-flush", daemon=True)
+            self.thread.start()
+            atexit.register(self.flush)
+        return self
+
+    def _ensure_table(self, cursor):
+        if not self.table_ready:
+            cursor.execute(CREATE_SCORES_TABLE)
+            self.table_ready = True
+
+    # ------------------------------------------------------------
+    # 보드 로드 (처음 사용할 때, 이후 LEADERBOARD_TTL마다)
+    # ------------------------------------------------------------
+
+    def _load(self, where: str, params: tuple) -> tuple:
+        """(보드, DB에서 읽었는지) - 읽지 못한 빈 보드는 캐시하면 안 됨"""
+        board = TopK(self.k)
+        try:
+            conn = self.connect()
+            with conn.cursor() as cursor:
+                self._ensure_table(cursor)
+                # 플레이어 중복을 고려해 K보다 넉넉히 읽음
+                cursor.execute(f"SELECT player, score, elapsed, created_at FROM scores WHERE {where} "
+                               f"ORDER BY score DESC, elapsed ASC LIMIT %s", (*params, self.k * 4))
+                for row in cursor.fetchall():
+                    board.add(row["player"], row["score"], row["elapsed"], row["created_at"].isoformat())
+            conn.close()
+        except Exception as e:
+            print(f"Leaderboard load error: {e}")
+            return board, False
+        return board, True
+
+    def _board(self, boards: dict, key: str, where: str, params: tuple, matches) -> TopK:
+        """캐시된 보드 (없거나 TTL이 지났으면 다시 읽고, DB를 읽지 못하면 이전 보드를 계속 사용)"""
+        now = time.monotonic()
+        with self.lock:
+            cached = boards.get(key)
+        if cached is not None and now - cached[1] < self.ttl:
+            return cached[0]
+        board, loaded = self._load(where, params)
+        if not loaded:
+            return cached[0] if cached is not None else board
+        with self.lock:
+            for row in self.flushing + self.pending:
+                if matches(row):
+                    board.add(row[1], row[2], row[3], row[7].isoformat())
+            boards[key] = (board, now)
+        return board
+
+    def puzzle_board(self, puzzle_id: str) -> TopK:
+        return self._board(self.puzzle_boards, puzzle_id, "puzzle_id = %s", (puzzle_id,),
+                           lambda row: row[0] == puzzle_id)
+
+    def daily_board(self, day: str) -> TopK:
+        start = datetime.strptime(day, "%Y-%m-%d")
+        board = self._board(self.daily_boards, day, "created_at >= %s AND created_at < %s",
+                            (start, start + timedelta(days=1)), lambda row: start <= row[7] < start + timedelta(days=1))
+        with self.lock:
+            # 지난 날짜 보드는 최근 7일치만 메모리에 유지
+            for old_day in sorted(self.daily_boards)[:-7]:
+                del self.daily_boards[old_day]
+        return board
+
+    # ------------------------------------------------------------
+    # 기록 / 조회
+    # ------------------------------------------------------------
+
+    def record(self, puzzle_id: str, player: str, result: dict) -> dict:
+        """채점 결과(scoring.score_play)를 보드에 반영하고 저장 대기열에 추가"""
+        now = datetime.now().replace(microsecond=0)
+        created_at = now.isoformat()
+        score, elapsed = result["finalScore"], result["elapsedTime"]
+        puzzle_board = self.puzzle_board(puzzle_id)
+        daily_board = self.daily_board(now.strftime("%Y-%m-%d"))
+        with self.lock:
+            puzzle_rank = puzzle_board.add(player, score, elapsed, created_at)
+            daily_rank = daily_board.add(player, score, elapsed, created_at)
+            self.pending.append((puzzle_id, player, score, elapsed, result["wrongClicks"],
+                                 result["hintsUsed"], int(result["allFound"]), now))
+            if len(self.pending) > MAX_PENDING:
+                del self.pending[:len(self.pending) - MAX_PENDING]
+            full = len(self.pending) >= self.flush_size
+        if full:
+            self.wakeup.set()
+        return {"puzzle_rank": puzzle_rank, "daily_rank": daily_rank}
+
+    def top_puzzle(self, puzzle_id: str, limit: int = None) -> list:
+        board = self.puzzle_board(puzzle_id)
+        with self.lock:
+            return board.top(limit)
+
+    def top_daily(self, day: str = None, limit: int = None) -> list:
+        board = self.daily_board(day or datetime.now().strftime("%Y-%m-%d"))
+        with self.lock:
+            return board.top(limit)
+
+    # ------------------------------------------------------------
+    # write-behind 저장
+    # ------------------------------------------------------------
+
+    def _run(self):
+        while True:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        with self.flush_lock:
+            with self.lock:
+                rows, self.pending = self.pending, []
+                self.flushing = rows
+            if not rows:
+                return 0
+            try:
+                conn = self.connect()
+                with conn.cursor() as cursor:
+                    self._ensure_table(cursor)
+                    cursor.executemany(INSERT_SCORE, rows)
+                conn.commit()
+                conn.close()
+            except Exception as e:
+                print(f"Leaderboard flush error ({len(rows)} rows kept): {e}")
+                with self.lock:
+                    self.pending[:0] = rows
+                    self.flushing = []
+                time.sleep(1)
+                return 0
+            with self.lock:
+                self.flushing = []
+            return len(rows)
@@ -0,0 +1,348 @@
+"""
+퍼즐 후보 미리 생성 풀
+IMG 폴더에 원본 이미지가 들어오면 (업로드 포함) 백그라운드에서 퍼즐 후보를 미리 만들어 둡니다.
+/upload 와 /regenerate 는 같은 원본(내용 해시 기준)의 후보가 있으면 생성기를 기다리지 않고 그 후보를 바로 발행합니다.
+후보를 쓰고 나면 다음 재생성에 대비해 다시 채웁니다.
+
+후보는 원본당 POOL_PER_IMAGE개, 전체 POOL_MAX_CANDIDATES개까지만 두고
+(최근에 들어온 원본부터 채움), POOL_MAX_AGE가 지났거나 원본이 사라졌거나 설정(VARIANTS 등)이 바뀐 후보는 버립니다.
+생성/사용/폐기 수와 생성에 쓴 시간을 stats.json에 모아 쓰지 못하고 버린 생성량을 확인할 수 있습니다.
+
+이미지 API 할당량을 쓰므로 기본은 꺼져 있습니다 (PREGEN_POOL=1).
+최근 POOL_IDLE_SECONDS 안에 사용자 생성 요청이 있었으면 미리 생성하지 않고,
+POOL_HOURS(예: 1-7)가 있으면 그 시간대에만 생성합니다. 여러 워커 중 한 프로세스만 채웁니다 (파일 잠금).
+"""
+
+import os
+import json
+import time
+import fcntl
+import shutil
+import hashlib
+import secrets
+import threading
+import subprocess
+from pathlib import Path
+from datetime import datetime
+
+from generator.asset_publish import create_staging, publish_version, write_json_atomic, file_lock, is_hashed_name
+from generator.create_review_pages import generate_review_page
+from generator.asset_storage import get_storage, sync_puzzle
+from generator.puzzle_store import puzzle_path, iter_puzzle_dirs
+from generator import variants
+
+PREGEN_POOL = os.getenv("PREGEN_POOL") == "1"
+POOL_PER_IMAGE = int(os.getenv("POOL_PER_IMAGE", 1))
+POOL_MAX_CANDIDATES = int(os.getenv("POOL_MAX_CANDIDATES", 20))
+POOL_MAX_AGE = int(os.getenv("POOL_MAX_AGE", 7 * 24 * 3600))
+# 사용자 생성 요청 후 이 시간 동안은 미리 생성하지 않음 (할당량/CPU 양보, 초)
+POOL_IDLE_SECONDS = int(os.getenv("POOL_IDLE_SECONDS", 60))
+# 미리 생성할 시간대 (현지 시각 시작-끝, 비우면 항상)
+POOL_HOURS = os.getenv("POOL_HOURS", "")
+# IMG 폴더 확인 주기 (초)
+POOL_SCAN_INTERVAL = float(os.getenv("POOL_SCAN_INTERVAL", 5))
+# 수정된 지 이 시간이 안 된 원본은 아직 쓰는 중일 수 있으므로 건너뜀 (업로드가 예약한 빈 파일 등, 초)
+POOL_SETTLE_SECONDS = float(os.getenv("POOL_SETTLE_SECONDS", 30))
+
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg")
+# 후보 안의 퍼즐 ID (발행할 때 실제 ID로 바꿈, 변형은 candidate-easy 등)
+CANDIDATE_ID = "candidate"
+READY_FILENAME = "ready.json"
+STATS_KEYS = ("generated", "failed", "used", "wasted", "hits", "misses",
+              "generated_seconds", "used_seconds", "wasted_seconds")
+
+
+def candidate_options() -> dict:
+    """후보를 만들 때의 설정 - 발행할 때 지금 설정과 다르면 쓰지 않고 버림"""
+    return {
+        "variants": variants.VARIANTS,
+        "planner": os.getenv("PLANNER", "llm"),
+        "backend": os.getenv("EDIT_BACKEND", "gemini"),
+    }
+
+
+class PregenPool:
+    def __init__(self, source_dir: Path, pool_dir: Path, puzzles_root: Path,
+                 per_image: int = POOL_PER_IMAGE, max_candidates: int = POOL_MAX_CANDIDATES,
+                 max_age: int = POOL_MAX_AGE, enabled: bool = PREGEN_POOL):
+        self.source_dir = Path(source_dir)
+        self.pool_dir = Path(pool_dir)
+        self.puzzles_root = Path(puzzles_root)
+        self.per_image = per_image
+        self.max_candidates = max_candidates
+        self.max_age = max_age
+        self.enabled = enabled
+        self.keys = {}
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.enabled and self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="pregen-pool", daemon=True)
+            self.thread.start()
+        return self
+
+    # ------------------------------------------------------------
+    # 원본 / 후보 목록
+    # ------------------------------------------------------------
+
+    def source_key(self, source: Path) -> str:
+        """원본 내용 해시 (같은 이미지를 다시 올려도 같은 후보를 씀) - 크기/수정 시각이 같으면 다시 읽지 않음"""
+        stat = os.stat(source)
+        cache_key = (str(source), stat.st_size, stat.st_mtime_ns)
+        if cache_key not in self.keys:
+            digest = hashlib.sha256()
+            with open(source, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+            self.keys[cache_key] = digest.hexdigest()[:16]
+        return self.keys[cache_key]
+
+    def sources(self, settle: float = POOL_SETTLE_SECONDS) -> list:
+        """
+        IMG 폴더 원본 이미지 (최근 것부터).
+        빈 파일이나 settle초 안에 수정된 파일은 업로드가 예약만 했거나 아직 쓰는 중이므로 뺍니다.
+        """
+        settled = time.time() - settle
+        paths = []
+        for p in self.source_dir.iterdir():
+            if (not p.is_file() or p.suffix.lower() not in IMAGE_SUFFIXES
+                    or p.name.startswith(".") or "_resized" in p.name):
+                continue
+            stat = p.stat()
+            if stat.st_size > 0 and (not settle or stat.st_mtime <= settled):
+                paths.append((stat.st_mtime, p))
+        return [p for _, p in sorted(paths, reverse=True)]
+
+    def candidates(self, key: str = None) -> list:
+        """완성된 후보 폴더 (오래된 것부터). key가 없으면 전체"""
+        pattern = f"{key}/*/{READY_FILENAME}" if key else f"*/*/{READY_FILENAME}"
+        ready = [p for p in self.pool_dir.glob(pattern)
+                 if not p.parent.name.startswith(".") and not p.parent.parent.name.startswith(".")]
+        return [p.parent for p in sorted(ready, key=lambda p: p.stat().st_mtime)]
+
+    @staticmethod
+    def _meta(candidate: Path) -> dict:
+        try:
+            with open(candidate / READY_FILENAME, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    # ------------------------------------------------------------
+    # 사용 (요청 스레드)
+    # ------------------------------------------------------------
+
+    def take(self, source: Path):
+        """원본의 후보 하나를 꺼냄 (다른 워커와 겹치지 않도록 rename으로 가져감). 없으면 None"""
+        if not self.enabled:
+            return None
+        key = self.source_key(source)
+        options = candidate_options()
+        taken_dir = self.pool_dir / ".taken"
+        taken_dir.mkdir(parents=True, exist_ok=True)
+        for candidate in self.candidates(key):
+            target = taken_dir / f"{key}-{candidate.name}"
+            try:
+                os.rename(candidate, target)
+            except OSError:
+                continue
+            meta = self._meta(target)
+            if meta.get("options") != options:
+                self._discard(target, meta)
+                continue
+            self._count(used=1, hits=1, used_seconds=meta.get("seconds", 0))
+            return target
+        self._count(misses=1)
+        return None
+
+    def promote(self, candidate: Path, puzzle_id: str) -> list:
+        """
+        후보를 puzzles/<puzzle_id> 새 버전으로 발행 (변형 후보는 <puzzle_id>-<변형>), 발행한 퍼즐 ID 목록 반환.
+        해시 파일명은 내용이 같으면 이름도 같으므로 그대로 연결하고 answer.json만 새로 씁니다.
+        """
+        published = []
+        storage = get_storage(self.puzzles_root)
+        for candidate_id, source_dir in sorted(iter_puzzle_dirs(candidate)):
+            if not (source_dir / "answer.json").exists():
+                continue
+            target_id = puzzle_id + candidate_id[len(CANDIDATE_ID):]
+            with open(source_dir / "answer.json", "r", encoding="utf-8") as f:
+                answer_data = json.load(f)
+            answer_data["puzzle_id"] = target_id
+            answer_data["created_at"] = datetime.now().isoformat()
+            if answer_data.get("base_puzzle"):
+                answer_data["base_puzzle"] = puzzle_id
+
+            puzzle_dir = puzzle_path(self.puzzles_root, target_id)
+            puzzle_dir.mkdir(parents=True, exist_ok=True)
+            for path in source_dir.iterdir():
+                target = puzzle_dir / path.name
+                if is_hashed_name(path.name) and not path.name.startswith("answer.") and not target.exists():
+                    try:
+                        os.link(path, target)
+                    except OSError:
+                        shutil.copy2(path, target)
+            publish_version(puzzle_dir, create_staging(puzzle_dir), answer_data)
+            generate_review_page(puzzle_dir, answer_data)
+            sync_puzzle(storage, self.puzzles_root, puzzle_dir)
+            published.append(target_id)
+        shutil.rmtree(candidate, ignore_errors=True)
+        # 다음 재생성에 대비해 다시 채움
+        self.wakeup.set()
+        return sorted(published, key=lambda p: (p != puzzle_id, p))
+
+    def notify_activity(self):
+        """사용자 생성 요청 시작 - 다른 워커도 알 수 있게 파일 수정 시각으로 기록"""
+        if self.enabled:
+            self.pool_dir.mkdir(parents=True, exist_ok=True)
+            (self.pool_dir / ".activity").touch()
+            self.wakeup.set()
+
+    # ------------------------------------------------------------
+    # 채우기 / 버리기 (백그라운드)
+    # ------------------------------------------------------------
+
+    def _window_open(self) -> bool:
+        if POOL_HOURS:
+            start, end = (int(h) for h in POOL_HOURS.split("-"))
+            hour = datetime.now().hour
+            if not (start <= hour < end if start <= end else hour >= start or hour < end):
+                return False
+        try:
+            idle = time.time() - (self.pool_dir / ".activity").stat().st_mtime
+        except FileNotFoundError:
+            return True
+        return idle >= POOL_IDLE_SECONDS
+
+    def _run(self):
+        while True:
+            self.wakeup.wait(POOL_SCAN_INTERVAL)
+            self.wakeup.clear()
+            try:
+                # 하나 만들 때마다 다시 확인 (그 사이 사용자 요청이 오면 멈춤)
+                while self.fill_once():
+                    pass
+            except Exception as e:
+                print(f"⚠️ 후보 풀 채우기 실패: {e}")
+
+    def fill_once(self) -> bool:
+        """후보가 모자란 원본 하나에 후보를 하나 만듦. 만들었으면 True"""
+        if not self._window_open():
+            return False
+        self.pool_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.pool_dir / ".fill.lock", "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            # 쓰는 중인 원본의 후보도 버리지 않도록 정리는 전체 원본 기준, 생성은 다 쓰인 원본만
+            self.evict()
+            total = len(self.candidates())
+            for source in self.sources():
+                if total >= self.max_candidates:
+                    return False
+                key = self.source_key(source)
+                if len(self.candidates(key)) < self.per_image:
+                    return self.generate(source, key)
+        return False
+
+    def generate(self, source: Path, key: str) -> bool:
+        work_dir = self.pool_dir / key / f".tmp-{secrets.token_hex(4)}"
+        work_dir.mkdir(parents=True)
+        # 후보는 원격 저장소에 올리지 않고, 사용자 작업의 진행 이벤트 파일에도 쓰지 않음
+        env = {k: v for k, v in os.environ.items() if k != "PROGRESS_FILE"}
+        env["ASSET_STORAGE"] = "local"
+        command = ["python3", "generator/generate_puzzle.py", str(source),
+                   "--output-dir", str(work_dir), "--puzzle-id", CANDIDATE_ID]
+        print(f"🫙 후보 미리 생성: {source.name}")
+        started = time.monotonic()
+        result = subprocess.run(command, env=env, stdout=subprocess.DEVNULL,
+                                cwd=Path(__file__).parent)
+        seconds = round(time.monotonic() - started, 1)
+        if result.returncode != 0 or not (puzzle_path(work_dir, CANDIDATE_ID) / "answer.json").exists():
+            shutil.rmtree(work_dir, ignore_errors=True)
+            self._count(failed=1, generated_seconds=seconds, wasted_seconds=seconds)
+            return False
+        write_json_atomic(work_dir / READY_FILENAME, {
+            "source": str(source), "created_at": datetime.now().isoformat(),
+            "seconds": seconds, "options": candidate_options(),
+        })
+        os.rename(work_dir, work_dir.with_name(f"{int(time.time())}-{secrets.token_hex(4)}"))
+        self._count(generated=1, generated_seconds=seconds)
+        return True
+
+    def evict(self, sources: list = None) -> int:
+        """원본이 사라졌거나 오래됐거나 설정이 바뀐 후보, 원본당/전체 개수를 넘는 오래된 후보를 버림"""
+        live_keys = {self.source_key(p) for p in (self.sources(settle=0) if sources is None else sources)}
+        options = candidate_options()
+        cutoff = time.time() - self.max_age
+        evicted = 0
+        by_key = {}
+        for candidate in self.candidates():
+            meta = self._meta(candidate)
+            key = candidate.parent.name
+            if key not in live_keys or meta.get("options") != options or (candidate / READY_FILENAME).stat().st_mtime < cutoff:
+                self._discard(candidate, meta)
+                evicted += 1
+                continue
+            by_key.setdefault(key, []).append(candidate)
+
+        remaining = []
+        for candidates in by_key.values():
+            for candidate in candidates[:-self.per_image] if len(candidates) > self.per_image else []:
+                self._discard(candidate, self._meta(candidate))
+                evicted += 1
+            remaining += candidates[-self.per_image:]
+        for candidate in sorted(remaining, key=lambda p: (p / READY_FILENAME).stat().st_mtime)[:max(0, len(remaining) - self.max_candidates)]:
+            self._discard(candidate, self._meta(candidate))
+            evicted += 1
+
+        # 중단된 생성 / 발행하다 남은 폴더
+        for leftover in list(self.pool_dir.glob("*/.tmp-*")) + list(self.pool_dir.glob(".taken/*")):
+            if leftover.stat().st_mtime < time.time() - 3600:
+                shutil.rmtree(leftover, ignore_errors=True)
+        for key_dir in self.pool_dir.iterdir():
+            if key_dir.is_dir() and not key_dir.name.startswith(".") and not any(key_dir.iterdir()):
+                key_dir.rmdir()
+        return evicted
+
+    def _discard(self, candidate: Path, meta: dict):
+        shutil.rmtree(candidate, ignore_errors=True)
+        self._count(wasted=1, wasted_seconds=meta.get("seconds", 0))
+
+    # ------------------------------------------------------------
+    # 통계 (여러 워커가 같이 쓰므로 잠그고 더함)
+    # ------------------------------------------------------------
+
+    def _count(self, **deltas):
+        if not self.enabled:
+            return
+        self.pool_dir.mkdir(parents=True, exist_ok=True)
+        stats_path = self.pool_dir / "stats.json"
+        with file_lock(stats_path):
+            stats = self._read_stats()
+            for key, value in deltas.items():
+                stats[key] = round(stats.get(key, 0) + value, 1)
+            write_json_atomic(stats_path, stats)
+
+    def _read_stats(self) -> dict:
+        try:
+            with open(self.pool_dir / "stats.json", "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {key: 0 for key in STATS_KEYS}
+
+    def stats(self) -> dict:
+        stats = {key: 0 for key in STATS_KEYS}
+        stats.update(self._read_stats())
+        finished = stats["used"] + stats["wasted"]
+        return {
+            "enabled": self.enabled,
+            "candidates": len(self.candidates()) if self.pool_dir.exists() else 0,
+            "per_image": self.per_image,
+            "max_candidates": self.max_candidates,
+            **stats,
+            # 다 쓰거나 버린 후보 중 실제로 쓴 비율
+            "use_rate": round(stats["used"] / finished, 3) if finished else None,
+        }
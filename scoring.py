@@ -0,0 +1,96 @@
+"""
+서버 점수 계산
+game_logic.js의 점수 규칙(난이도별 점수, 힌트 패널티, 남은 시간 보너스)을 서버에서 그대로 적용합니다.
+클라이언트가 보낸 점수는 믿지 않고, 클릭 기록을 퍼즐 데이터(클릭 판정 마스크)로 다시 채점합니다.
+"""
+
+# game_logic.js scorePoints와 같은 값 (answer.json 난이도 1~5 → easy/medium/hard)
+SCORE_POINTS = {"easy": 10, "medium": 15, "hard": 20}
+HINT_PENALTY = 10
+MAX_HINTS = 2
+TIME_LIMIT = 120
+# 남은 시간 6초당 1점, 최대 20점
+TIME_BONUS_STEP = 6
+MAX_TIME_BONUS = 20
+# 연속 발견 사이 최소 간격 (초) - 사람이 낼 수 없는 속도의 자동 클릭 거절
+MIN_FIND_INTERVAL = 0.3
+# 한 판의 최대 클릭 기록 수 (제한 시간 동안 초당 5번) - 채점 요청 하나가 오래 걸리지 않도록
+MAX_CLICKS = TIME_LIMIT * 5
+
+
+class ScoreError(Exception):
+    """채점할 수 없는 플레이 기록"""
+
+
+def difficulty_label(difficulty) -> str:
+    if isinstance(difficulty, str):
+        return difficulty if difficulty in SCORE_POINTS else "medium"
+    difficulty = int(difficulty or 3)
+    if difficulty <= 2:
+        return "easy"
+    return "medium" if difficulty == 3 else "hard"
+
+def difference_points(answer_data: dict) -> dict:
+    """차이점 ID → 점수"""
+    return {d["id"]: SCORE_POINTS[difficulty_label(d.get("difficulty"))]
+            for d in answer_data.get("differences", [])}
+
+def time_bonus(elapsed_seconds: float, time_limit: int = TIME_LIMIT) -> int:
+    if elapsed_seconds > time_limit:
+        return 0
+    return min(MAX_TIME_BONUS, int(time_limit - int(elapsed_seconds)) // TIME_BONUS_STEP)
+
+def score_play(answer_data: dict, hit_tester, clicks: list, hints_used: int = 0,
+               elapsed_seconds: float = None, time_limit: int = TIME_LIMIT) -> dict:
+    """
+    클릭 기록 [{x, y, t}, ...] (t = 시작부터 경과 초)을 다시 채점해서 endGame()과 같은 형식의 결과 반환.
+    시간 제한이 지난 클릭은 무시하고, 너무 빠른 연속 발견이 있으면 ScoreError.
+    """
+    if not 0 <= int(hints_used) <= MAX_HINTS:
+        raise ScoreError(f"hints_used는 0~{MAX_HINTS} 사이여야 합니다")
+    if len(clicks) > MAX_CLICKS:
+        raise ScoreError(f"클릭 기록은 최대 {MAX_CLICKS}개까지 보낼 수 있습니다")
+    points = difference_points(answer_data)
+    found = {}
+    wrong_clicks = 0
+    last_find = None
+    last_t = 0.0
+    for click in clicks:
+        try:
+            x, y, t = float(click["x"]), float(click["y"]), float(click["t"])
+        except (KeyError, TypeError, ValueError):
+            raise ScoreError(f"잘못된 클릭 기록: {click!r}")
+        if t < last_t:
+            raise ScoreError("클릭 기록의 시간이 순서대로가 아닙니다")
+        last_t = t
+        if t > time_limit:
+            break
+        difference_id = hit_tester.hit(x, y)
+        if difference_id in points and difference_id not in found:
+            if last_find is not None and t - last_find < MIN_FIND_INTERVAL:
+                raise ScoreError("비정상적으로 빠른 발견 기록입니다")
+            found[difference_id] = t
+            last_find = t
+        elif difference_id is None:
+            wrong_clicks += 1
+
+    elapsed = last_t if elapsed_seconds is None else max(float(elapsed_seconds), last_t)
+    return final_result(points, found, wrong_clicks, hints_used, elapsed, time_limit)
+
+def final_result(points: dict, found: dict, wrong_clicks: int, hints_used: int,
+                 elapsed: float, time_limit: int = TIME_LIMIT) -> dict:
+    """발견한 차이점 {ID: 발견 시각}으로 endGame()과 같은 형식의 최종 결과 계산"""
+    all_found = len(found) == len(points)
+    base_score = sum(points[d] for d in found) - HINT_PENALTY * int(hints_used)
+    # 클라이언트와 달리 시간 보너스는 모두 찾았을 때만 (바로 포기해도 보너스를 받는 문제 방지)
+    bonus = time_bonus(elapsed, time_limit) if all_found else 0
+    return {
+        "finalScore": base_score + bonus,
+        "baseScore": base_score,
+        "timeBonus": bonus,
+        "elapsedTime": int(elapsed),
+        "wrongClicks": wrong_clicks,
+        "hintsUsed": int(hints_used),
+        "allFound": all_found,
+        "found": found,
+    }
@@ -126,6 +126,8 @@ const App: React.FC = () => {
                         onImageClick={checkClick}
                         gameState={gameState}
                         wrongEffect={wrongEffect}
+                        imageWidth={puzzleData?.image_width}
+                        imageHeight={puzzleData?.image_height}
                     />
                 )}
             </main>
@@ -8,6 +8,9 @@ interface GameBoardProps {
     onImageClick: (x: number, y: number) => void;
     gameState: string;
     wrongEffect: { x: number, y: number } | null;
+    // bounding_box 좌표계 = 원본 이미지 픽셀 (answer.json image_width/height, 옛 퍼즐은 1024)
+    imageWidth?: number;
+    imageHeight?: number;
 }
 
 const GameBoard: React.FC<GameBoardProps> = ({
@@ -16,7 +19,9 @@ const GameBoard: React.FC<GameBoardProps> = ({
     differences,
     onImageClick,
     gameState,
-    wrongEffect
+    wrongEffect,
+    imageWidth = 1024,
+    imageHeight = 1024
 }) => {
     const [aspectRatio, setAspectRatio] = React.useState<number>(1); // Default to square
 
@@ -47,9 +52,9 @@ const GameBoard: React.FC<GameBoardProps> = ({
             return;
         }
 
-        // Scale to 1024x1024 coordinates based on actual image dimensions
-        const scaledX = (x / imgRect.width) * 1024;
-        const scaledY = (y / imgRect.height) * 1024;
+        // Scale to answer.json pixel coordinates based on actual image dimensions
+        const scaledX = (x / imgRect.width) * imageWidth;
+        const scaledY = (y / imgRect.height) * imageHeight;
 
         console.log('Image size:', imgRect.width, imgRect.height);
         console.log('Click position:', x, y);
@@ -66,11 +71,11 @@ const GameBoard: React.FC<GameBoardProps> = ({
                 ? diff.bounding_box
                 : { x1: diff.bounding_box[0], y1: diff.bounding_box[1], x2: diff.bounding_box[2], y2: diff.bounding_box[3] };
 
-            // Percentage based on 1024x1024
-            const left = (box.x1 / 1024) * 100;
-            const top = (box.y1 / 1024) * 100;
-            const width = ((box.x2 - box.x1) / 1024) * 100;
-            const height = ((box.y2 - box.y1) / 1024) * 100;
+            // Percentage based on answer.json pixel coordinates
+            const left = (box.x1 / imageWidth) * 100;
+            const top = (box.y1 / imageHeight) * 100;
+            const width = ((box.x2 - box.x1) / imageWidth) * 100;
+            const height = ((box.y2 - box.y1) / imageHeight) * 100;
 
             return (
                 <div
@@ -96,8 +101,8 @@ const GameBoard: React.FC<GameBoardProps> = ({
 
     const renderWrongEffect = () => {
         if (!wrongEffect) return null;
-        const leftPercent = (wrongEffect.x / 1024) * 100;
-        const topPercent = (wrongEffect.y / 1024) * 100;
+        const leftPercent = (wrongEffect.x / imageWidth) * 100;
+        const topPercent = (wrongEffect.y / imageHeight) * 100;
 
         return (
             <motion.div
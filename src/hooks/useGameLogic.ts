@@ -16,6 +16,9 @@ export interface PuzzleData {
     original_image: string;
     modified_image: string;
     total_differences: number;
+    // bounding_box 좌표계 (원본 이미지 픽셀, 없으면 1024)
+    image_width?: number;
+    image_height?: number;
     differences: Difference[];
 }
 
@@ -126,7 +129,7 @@ export const useGameLogic = () => {
             setOriginalImage(`puzzles/${puzzleId}/${data.original_image}`);
             setModifiedImage(`puzzles/${puzzleId}/${data.modified_image}`);
 
-            // 차이점 데이터 정규화 (1024x1024 기준 좌표 사용)
+            // 차이점 데이터 정규화 (원본 이미지 픽셀 좌표, image_width/height 기준)
             const normalizedDiffs = data.differences.map((d: any) => ({
                 ...d,
                 bounding_box: normalizeBoundingBox(d.bounding_box),
@@ -195,7 +198,8 @@ export const useGameLogic = () => {
 
         console.log('Click coordinates:', { x, y });
 
-        const tolerance = 80; // increased tolerance for finer click detection
+        // increased tolerance for finer click detection (80px at 1024, scaled for high-resolution puzzles)
+        const tolerance = 80 * (puzzleData?.image_width || 1024) / 1024;
         const foundIdx = differences.findIndex(d => {
             const box = normalizeBoundingBox(d.bounding_box);
             const inBounds = !d.found &&
@@ -236,7 +240,7 @@ export const useGameLogic = () => {
             setTimeout(() => setWrongEffect(null), 2000);
             return false;
         }
-    }, [differences, gameState]);
+    }, [differences, gameState, puzzleData]);
 
     const playSuccessSound = () => {
         try {
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 저장소 루트의 모듈(admin_server, change_feed ...)과 generator 패키지를 import 할 수 있도록
+sys.path.insert(0, str(Path(__file__).parent.parent))
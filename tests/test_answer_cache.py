@@ -0,0 +1,76 @@
+import gzip
+import json
+import threading
+
+from answer_cache import AnswerCache, CachedAnswer
+
+def answer(puzzle_id, size=10):
+    return {"puzzle_id": puzzle_id, "differences": [{"id": i} for i in range(size)]}
+
+def test_read_through_and_hit_rate():
+    loads = []
+    cache = AnswerCache(lambda pid: loads.append(pid) or answer(pid))
+    first = cache.get("p1")
+    assert cache.get("p1") is first
+    assert loads == ["p1"]
+    assert json.loads(gzip.decompress(first.gzipped)) == answer("p1")
+    assert cache.metrics()["hit_rate"] == 0.5
+
+def test_missing_puzzle_is_not_cached():
+    loads = []
+    cache = AnswerCache(lambda pid: loads.append(pid))
+    assert cache.get("gone") is None
+    assert cache.get("gone") is None
+    assert len(loads) == 2
+
+def test_evicts_least_recently_used_by_bytes():
+    entry_bytes = CachedAnswer(answer("p1")).nbytes
+    cache = AnswerCache(answer, max_bytes=entry_bytes * 2)
+    cache.get("p1")
+    cache.get("p2")
+    cache.get("p1")
+    cache.get("p3")
+    assert list(cache.entries) == ["p1", "p3"]
+    assert cache.metrics()["evictions"] == 1
+
+def test_invalidation_during_load_is_not_cached():
+    """loader가 읽는 도중 무효화되면 그 결과(이전 내용일 수 있음)는 캐시하지 않음"""
+    loading, release = threading.Event(), threading.Event()
+    versions = iter(["old", "new"])
+
+    def loader(pid):
+        data = {**answer(pid), "version": next(versions)}
+        if data["version"] == "old":
+            loading.set()
+            release.wait(2)
+        return data
+
+    cache = AnswerCache(loader)
+    results = []
+    reader = threading.Thread(target=lambda: results.append(cache.get("p1")))
+    reader.start()
+    loading.wait(2)
+    cache.invalidate("p1")
+    release.set()
+    reader.join()
+
+    assert results[0].data["version"] == "old"
+    assert "p1" not in cache.entries
+    assert cache.get("p1").data["version"] == "new"
+
+def test_invalidate_all_during_load_is_not_cached():
+    loading, release = threading.Event(), threading.Event()
+
+    def loader(pid):
+        loading.set()
+        release.wait(2)
+        return answer(pid)
+
+    cache = AnswerCache(loader)
+    reader = threading.Thread(target=cache.get, args=("p1",))
+    reader.start()
+    loading.wait(2)
+    cache.invalidate()
+    release.set()
+    reader.join()
+    assert cache.entries == {}
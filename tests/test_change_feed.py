@@ -0,0 +1,96 @@
+import time
+
+from change_feed import ChangeFeed
+
+def change(seq, puzzle_id="p1"):
+    return {"seq": seq, "puzzle_id": puzzle_id, "action": "saved"}
+
+class FakeLog:
+    """커밋된 변경만 보이는 puzzle_changes 대신 (seq 순서와 커밋 순서가 다를 수 있음)"""
+
+    def __init__(self):
+        self.committed = {}
+        self.polls = 0
+
+    def commit(self, seq):
+        self.committed[seq] = change(seq)
+
+    def fetch(self, since, limit=500, until=None):
+        self.polls += 1
+        seqs = sorted(s for s in self.committed if s > since and (until is None or s <= until))
+        return [self.committed[s] for s in seqs[:limit]]
+
+def make_feed(log, **kwargs):
+    feed = ChangeFeed(connect=None, **kwargs)
+    feed.fetch = log.fetch
+    feed.head = lambda: 0
+    return feed
+
+def test_contiguous_holds_back_after_gap():
+    feed = make_feed(FakeLog(), gap_timeout=60)
+    feed.latest_seq = 1
+    assert [c["seq"] for c in feed._contiguous([change(2), change(4), change(5)])] == [2]
+    assert feed.gap_since is not None
+    feed.latest_seq = 2
+    assert [c["seq"] for c in feed._contiguous([change(3), change(4)])] == [3, 4]
+    assert feed.gap_since is None
+
+def test_contiguous_skips_gap_after_timeout():
+    """롤백으로 영원히 빈 seq는 CHANGE_GAP_TIMEOUT 뒤 건너뜀"""
+    feed = make_feed(FakeLog(), gap_timeout=0.05)
+    feed.latest_seq = 1
+    assert feed._contiguous([change(3)]) == []
+    time.sleep(0.06)
+    assert [c["seq"] for c in feed._contiguous([change(3)])] == [3]
+
+def test_wait_delivers_in_seq_order_when_commits_reorder():
+    log = FakeLog()
+    feed = make_feed(log, poll_interval=0.01, gap_timeout=5)
+    log.commit(1)
+    assert [c["seq"] for c in feed.wait(0, timeout=1)] == [1]
+
+    log.commit(3)
+    assert feed.wait(1, timeout=0.1) == []
+    log.commit(2)
+    feed.notify()
+    assert [c["seq"] for c in feed.wait(1, timeout=1)] == [2, 3]
+
+def test_subscriber_receives_other_workers_changes():
+    log = FakeLog()
+    feed = make_feed(log, poll_interval=0.01, idle_poll_interval=0.02)
+    received = []
+    feed.latest_seq = 0
+    feed.subscribe(received.append)
+    log.commit(1)
+    deadline = time.monotonic() + 2
+    while not received and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [c["seq"] for c in received] == [1]
+
+def test_idle_subscriber_backs_off():
+    """대기자가 없으면 빈 조회마다 주기가 두 배로 늘어 idle_poll_interval에서 멈춤"""
+    feed = make_feed(FakeLog(), poll_interval=0.5, idle_poll_interval=4)
+    feed.listeners.append(lambda c: None)
+    timeouts = []
+    for _ in range(6):
+        timeouts.append(feed._next_timeout())
+        feed._backoff(False)
+    assert timeouts == [0.5, 1, 2, 4, 4, 4]
+
+    feed._backoff(True)
+    assert feed._next_timeout() == 0.5
+    feed.waiters = 1
+    feed._backoff(False)
+    assert feed._next_timeout() == 0.5
+
+def test_no_waiters_or_listeners_sleeps_until_woken():
+    assert make_feed(FakeLog())._next_timeout() is None
+
+def test_idle_poller_polls_rarely():
+    log = FakeLog()
+    feed = make_feed(log, poll_interval=0.01, idle_poll_interval=0.2)
+    feed.latest_seq = 0
+    feed.subscribe(lambda c: None)
+    time.sleep(0.6)
+    # 0.01초 주기로 계속 조회했다면 60번 가까이
+    assert log.polls < 10
@@ -0,0 +1,50 @@
+import pytest
+
+from click_ingest import ClickIngestor, ClickIngestError
+
+SIZES = {"p1": (64, 32)}
+
+def make_ingestor(tmp_path, sizes=SIZES):
+    return ClickIngestor(tmp_path, size_resolver=sizes.get, is_known=lambda pid: True)
+
+def test_flush_writes_segment_and_heatmap(tmp_path):
+    ingestor = make_ingestor(tmp_path)
+    assert ingestor.submit([{"x": 1, "y": 1, "hit": True}, {"x": 40, "y": 20}], "p1") == 2
+    assert ingestor.flush() == 2
+
+    heatmap = ingestor.heatmap("p1").to_dict()
+    assert (heatmap["width"], heatmap["height"]) == (64, 32)
+    assert (heatmap["total_hits"], heatmap["total_misses"]) == (1, 1)
+    lines = next(tmp_path.glob("clicks-*.csv")).read_text().splitlines()
+    assert len(lines) == 3
+
+def test_events_for_missing_puzzle_are_dropped(tmp_path):
+    """size_resolver가 None을 돌려주는 (삭제된) 퍼즐의 이벤트는 버리고 나머지만 기록"""
+    ingestor = make_ingestor(tmp_path)
+    ingestor.submit([{"puzzle_id": "p1", "x": 1, "y": 1}, {"puzzle_id": "gone", "x": 1, "y": 1},
+                     {"puzzle_id": "gone", "x": 2, "y": 2}])
+    assert ingestor.flush() == 1
+    assert ingestor.stats["dropped"] == 2
+    assert ingestor.heatmap("gone") is None
+    segment = next(tmp_path.glob("clicks-*.csv")).read_text()
+    assert "gone" not in segment
+
+def test_only_missing_puzzle_events(tmp_path):
+    ingestor = make_ingestor(tmp_path)
+    ingestor.submit([{"x": 1, "y": 1}], "gone")
+    assert ingestor.flush() == 0
+    assert not list(tmp_path.glob("clicks-*.csv"))
+
+def test_replay_restores_heatmaps(tmp_path):
+    ingestor = make_ingestor(tmp_path)
+    ingestor.submit([{"x": 1, "y": 1, "hit": True}, {"x": 2, "y": 2}], "p1")
+    ingestor.flush()
+
+    restored = make_ingestor(tmp_path)
+    heatmap = restored.heatmap("p1").to_dict()
+    assert (heatmap["total_hits"], heatmap["total_misses"]) == (1, 1)
+
+def test_unknown_puzzle_rejected(tmp_path):
+    ingestor = ClickIngestor(tmp_path, is_known=lambda pid: pid == "p1")
+    with pytest.raises(ClickIngestError):
+        ingestor.submit([{"x": 1, "y": 1}], "other")
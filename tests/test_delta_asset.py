@@ -0,0 +1,132 @@
+import io
+import json
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from generator.asset_publish import create_staging, publish_version
+from generator.delta_asset import (DELTA_MANIFEST, PRUNED_MODIFIED_IMAGE, VERIFY_TOLERANCE, build_delta,
+                                   reconstruct, reconstruction_error, verify_delta, prune_modified,
+                                   open_modified, load_answer)
+
+SIZE = 256
+BOX = [96, 96, 160, 150]
+
+def sample_images():
+    """부드러운 그라디언트 원본 + 사각형 하나를 칠한 수정 이미지"""
+    x, y = np.meshgrid(np.linspace(0, 255, SIZE), np.linspace(0, 255, SIZE))
+    original = Image.fromarray(np.dstack([x, y, (x + y) / 2]).astype(np.uint8), "RGB")
+    modified = original.copy()
+    ImageDraw.Draw(modified).rectangle(BOX, fill=(200, 30, 40))
+    return original, modified
+
+def publish_puzzle(puzzle_dir, with_delta=True):
+    """생성기처럼 스테이징에 원본/수정 이미지(+ 델타)를 만들고 한 버전 발행"""
+    puzzle_dir.mkdir(parents=True, exist_ok=True)
+    original, modified = sample_images()
+    staging = create_staging(puzzle_dir)
+    original.save(staging / "original.jpg", "JPEG", quality=95)
+    modified.save(staging / "modified.jpg", "JPEG", quality=95)
+    answer_data = {
+        "original_image": "original.jpg",
+        "modified_image": "modified.jpg",
+        "image_width": SIZE,
+        "image_height": SIZE,
+        "differences": [{"id": 1, "name": "box", "bounding_box": BOX}],
+    }
+    if with_delta:
+        build_delta(staging, answer_data)
+        answer_data["modified_delta"] = DELTA_MANIFEST
+    publish_version(puzzle_dir, staging, answer_data)
+    return answer_data
+
+def decode(data):
+    with Image.open(io.BytesIO(data)) as img:
+        return np.asarray(img.convert("RGB"), dtype=np.int16)
+
+def test_reconstruct_round_trip(tmp_path):
+    answer_data = publish_puzzle(tmp_path / "p1")
+    puzzle_dir = tmp_path / "p1"
+    manifest = json.loads((puzzle_dir / answer_data["modified_delta"]).read_text())
+
+    assert manifest["tiles"]
+    assert verify_delta(puzzle_dir)
+    restored = np.asarray(reconstruct(puzzle_dir), dtype=np.int16)
+    with Image.open(puzzle_dir / answer_data["modified_image"]) as img:
+        modified = np.asarray(img.convert("RGB"), dtype=np.int16)
+    assert restored.shape == modified.shape
+    assert np.abs(restored - modified).mean() < 2
+
+def test_verify_uses_tolerance_not_bit_exact(tmp_path):
+    """바뀌지 않은 타일은 original.jpg에서 오므로 비트 단위로는 다르지만 허용 오차 안이면 통과"""
+    answer_data = publish_puzzle(tmp_path / "p1")
+    puzzle_dir = tmp_path / "p1"
+    with Image.open(puzzle_dir / answer_data["modified_image"]) as img:
+        modified = img.convert("RGB")
+    restored = reconstruct(puzzle_dir)
+    mean_error, max_error = reconstruction_error(restored, modified)
+    assert restored.tobytes() != modified.tobytes()
+    assert 0 < max_error <= VERIFY_TOLERANCE
+    assert verify_delta(puzzle_dir)
+
+def test_verify_fails_when_modified_image_changes(tmp_path):
+    answer_data = publish_puzzle(tmp_path / "p1")
+    path = tmp_path / "p1" / answer_data["modified_image"]
+    with Image.open(path) as img:
+        changed = img.convert("RGB")
+    ImageDraw.Draw(changed).ellipse([10, 10, 60, 60], fill=(0, 255, 0))
+    changed.save(path, "JPEG", quality=95)
+    assert not verify_delta(tmp_path / "p1")
+
+def test_prune_removes_hashed_file_and_alias(tmp_path):
+    answer_data = publish_puzzle(tmp_path / "p1")
+    puzzle_dir = tmp_path / "p1"
+    hashed = answer_data["modified_image"]
+    assert (puzzle_dir / hashed).exists() and (puzzle_dir / "modified.jpg").exists()
+
+    assert prune_modified(puzzle_dir)
+    pruned = load_answer(puzzle_dir)
+    assert pruned["modified_image"] == PRUNED_MODIFIED_IMAGE
+    assert pruned["version"] != answer_data["version"]
+    assert not (puzzle_dir / hashed).exists()
+    assert not (puzzle_dir / "modified.jpg").exists()
+    assert (puzzle_dir / f"answer.{pruned['version']}.json").exists()
+    assert verify_delta(puzzle_dir)
+    assert open_modified(puzzle_dir).size == (SIZE, SIZE)
+
+def test_prune_without_delta_keeps_files(tmp_path):
+    answer_data = publish_puzzle(tmp_path / "p1", with_delta=False)
+    assert not prune_modified(tmp_path / "p1")
+    assert (tmp_path / "p1" / answer_data["modified_image"]).exists()
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    import admin_server
+    monkeypatch.setattr(admin_server, "PUZZLES_DIR", tmp_path)
+    admin_server.delta_images.clear()
+    return admin_server.app.test_client()
+
+def test_client_loads_pruned_modified_image(tmp_path, client):
+    """클라이언트가 요청하는 puzzles/<ID>/<modified_image>가 정리 후에도 복원 이미지로 제공됨"""
+    publish_puzzle(tmp_path / "p1")
+    with Image.open(tmp_path / "p1" / "modified.jpg") as img:
+        expected = np.asarray(img.convert("RGB"), dtype=np.int16)
+    assert prune_modified(tmp_path / "p1")
+
+    answer_data = load_answer(tmp_path / "p1")
+    response = client.get(f"/puzzles/p1/{answer_data['modified_image']}")
+    assert response.status_code == 200
+    assert response.mimetype == "image/jpeg"
+    assert np.abs(decode(response.data) - expected).mean() < 2
+
+    original = client.get(f"/puzzles/p1/{answer_data['original_image']}")
+    assert original.status_code == 200
+    original.close()
+
+def test_client_loads_unpruned_modified_image(tmp_path, client):
+    answer_data = publish_puzzle(tmp_path / "p1")
+    response = client.get(f"/puzzles/p1/{answer_data['modified_image']}")
+    assert response.status_code == 200
+    assert response.data == (tmp_path / "p1" / answer_data["modified_image"]).read_bytes()
+    response.close()
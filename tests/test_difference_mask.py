@@ -0,0 +1,58 @@
+import numpy as np
+from PIL import Image, ImageDraw
+
+from generator.difference_mask import MaskHitTester, build_label_mask, write_difference_mask, MASK_SCALE
+
+def sample_puzzle():
+    original = Image.new("RGB", (256, 256), (120, 140, 160))
+    modified = original.copy()
+    draw = ImageDraw.Draw(modified)
+    # 1번: 박스 안 일부만 실제로 바뀜, 2번: 1번 박스 안의 작은 박스
+    draw.ellipse([40, 40, 80, 80], fill=(250, 20, 20))
+    draw.rectangle([150, 150, 170, 170], fill=(0, 0, 0))
+    differences = [
+        {"id": 1, "bounding_box": [20, 20, 200, 200]},
+        {"id": 2, "bounding_box": [148, 148, 172, 172]},
+        {"id": 3, "bounding_box": {"x1": 220, "y1": 10, "x2": 240, "y2": 30}},
+    ]
+    return original, modified, {"image_width": 256, "image_height": 256, "differences": differences}
+
+def test_labels_follow_changed_pixels():
+    original, modified, answer_data = sample_puzzle()
+    labels = build_label_mask(original, modified, answer_data["differences"])
+    assert labels.shape == (256 // MASK_SCALE, 256 // MASK_SCALE)
+    assert labels[60 // MASK_SCALE, 60 // MASK_SCALE] == 1
+    # 1번 박스 안이지만 바뀌지 않은 곳
+    assert labels[120 // MASK_SCALE, 120 // MASK_SCALE] == 0
+    # 작은 박스가 겹친 부분을 가져감
+    assert labels[160 // MASK_SCALE, 160 // MASK_SCALE] == 2
+    # 바뀐 픽셀이 없는 차이점은 박스 전체
+    assert labels[20 // MASK_SCALE, 230 // MASK_SCALE] == 3
+
+def test_hit_tester_radius_and_bounds():
+    original, modified, answer_data = sample_puzzle()
+    labels = build_label_mask(original, modified, answer_data["differences"])
+    tester = MaskHitTester(labels, MASK_SCALE, radius=16)
+    assert tester.hit(60, 60) == 1
+    assert tester.hit(160, 160) == 2
+    # 반경 안의 빗나간 클릭은 인정, 먼 곳은 None
+    assert tester.hit(60, 90) == 1
+    assert tester.hit(120, 120) is None
+    assert tester.hit(-1, 10) is None
+    assert tester.hit(256, 10) is None
+
+def test_from_bytes_matches_written_mask(tmp_path):
+    original, modified, answer_data = sample_puzzle()
+    write_difference_mask(tmp_path, original, modified, answer_data)
+    data = (tmp_path / answer_data["mask_image"]).read_bytes()
+    from_file = MaskHitTester.from_puzzle(tmp_path, answer_data)
+    from_bytes = MaskHitTester.from_bytes(data, answer_data)
+    assert np.array_equal(from_file.labels, from_bytes.labels)
+    assert from_bytes.hit(60, 60) == 1
+
+def test_without_mask_falls_back_to_boxes():
+    _, _, answer_data = sample_puzzle()
+    tester = MaskHitTester.from_bytes(None, answer_data, radius=0)
+    assert tester.hit(120, 120) == 1
+    assert tester.hit(160, 160) == 2
+    assert tester.hit(5, 250) is None
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from find_stats import FindStatsStore, FindTimeSketch
+from generator.asset_publish import create_staging, publish_version
+
+def test_sketch_quantiles_within_relative_error():
+    sketch = FindTimeSketch()
+    for seconds in range(1, 101):
+        sketch.add(seconds)
+    assert sketch.count == 100
+    assert sketch.quantile(0.5) == pytest.approx(50, rel=0.06)
+    assert sketch.quantile(0.9) == pytest.approx(90, rel=0.06)
+    assert FindTimeSketch().quantile(0.5) is None
+
+def test_summary_find_rate():
+    store = FindStatsStore()
+    store.record_play("p1", {1: 4.0, 2: 10.0})
+    store.record_play("p1", {"1": 6.0})
+    summary = store.summary("p1")
+    assert summary["plays"] == 2
+    assert summary["differences"]["1"]["find_rate"] == 1.0
+    assert summary["differences"]["2"]["find_rate"] == 0.5
+
+def test_workers_merge_on_save(tmp_path):
+    """워커마다 자기 플레이만 더해서 저장하므로 서로 덮어쓰지 않음"""
+    path = tmp_path / "find_stats.json"
+    first, second = FindStatsStore(path), FindStatsStore(path)
+    first.record_play("p1", {1: 5.0})
+    second.record_play("p1", {1: 7.0})
+    first.save()
+    second.save()
+    first.save()
+    assert FindStatsStore(path).summary("p1")["plays"] == 2
+    assert first.summary("p1")["plays"] == 2
+
+def test_calibrate_publishes_new_version(tmp_path):
+    puzzle_dir = tmp_path / "p1"
+    puzzle_dir.mkdir()
+    publish_version(puzzle_dir, create_staging(puzzle_dir),
+                    {"differences": [{"id": 1, "difficulty": 5}, {"id": 2, "difficulty": 1}]})
+    store = FindStatsStore()
+    for _ in range(3):
+        store.record_play("p1", {1: 2.0})
+    assert store.calibrate(lambda pid: tmp_path / pid, min_plays=3) == ["p1"]
+
+    answer_data = json.loads((puzzle_dir / "answer.json").read_text())
+    first, second = answer_data["differences"]
+    assert (first["difficulty"], first["llm_difficulty"], first["find_rate"]) == (1, 5, 1.0)
+    assert (second["difficulty"], second["find_rate"]) == (5, 0.0)
+    assert (puzzle_dir / f"answer.{answer_data['version']}.json").exists()
+    assert store.calibrate(lambda pid: tmp_path / pid, min_plays=3) == []
@@ -0,0 +1,68 @@
+import time
+import threading
+
+import pytest
+
+from game_sessions import SessionStore, SessionError
+
+def test_use_hint_stops_at_max_under_concurrency():
+    store = SessionStore(ttl=60, tick=5)
+    session = store.create("p1")
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.use_hint(session, 3))) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(r for r in results if r is not None) == [0, 1, 2]
+    assert session.hints_used == 3
+
+def test_mark_found_only_counts_first_time():
+    store = SessionStore(ttl=60, tick=5)
+    session = store.create("p1")
+    assert store.mark_found(session, 1, 2.0) == 1
+    assert store.mark_found(session, 1, 3.0) is None
+    assert store.mark_found(session, 2, 4.0) == 2
+    assert store.add_wrong_click(session) == 1
+
+def test_remove_twice_is_404():
+    store = SessionStore(ttl=60, tick=5)
+    session = store.create("p1")
+    assert store.remove(session.session_id) is session
+    with pytest.raises(SessionError) as error:
+        store.remove(session.session_id)
+    assert error.value.status == 404
+
+def test_expire_drops_sessions_after_ttl():
+    store = SessionStore(ttl=10, tick=5)
+    session = store.create("p1")
+    assert store.expire(time.time() + 30) == 1
+    with pytest.raises(SessionError):
+        store.get(session.session_id)
+
+def test_snapshot_merges_workers(tmp_path):
+    """워커마다 같은 스냅샷을 복원하고, 종료할 때 세션 ID 기준으로 합침"""
+    path = tmp_path / "sessions.json"
+    first, second = SessionStore(ttl=60, tick=5, snapshot_path=path), SessionStore(ttl=60, tick=5, snapshot_path=path)
+    a, b = first.create("p1"), second.create("p2")
+    first.save_snapshot()
+    second.save_snapshot()
+
+    restored = SessionStore(ttl=60, tick=5, snapshot_path=path)
+    restored.load_snapshot()
+    assert {restored.get(a.session_id).puzzle_id, restored.get(b.session_id).puzzle_id} == {"p1", "p2"}
+    assert path.exists()
+
+@pytest.fixture
+def server(monkeypatch):
+    import admin_server
+    monkeypatch.setattr(admin_server, "game_sessions", SessionStore(ttl=60, tick=5))
+    return admin_server
+
+def test_click_on_missing_puzzle_is_404(server, monkeypatch):
+    """세션이 살아 있는 동안 퍼즐이 지워지거나 옮겨져도 500이 아니라 404"""
+    monkeypatch.setattr(server, "get_puzzle_points", lambda puzzle_id: {1: 100})
+    monkeypatch.setattr(server, "get_hit_tester", lambda puzzle_id: None)
+    session = server.game_sessions.create("gone")
+    response = server.app.test_client().post(f"/sessions/{session.session_id}/click", json={"x": 1, "y": 2})
+    assert response.status_code == 404
@@ -0,0 +1,103 @@
+import os
+import json
+import time
+
+import pytest
+
+from pregen_pool import PregenPool, READY_FILENAME, candidate_options
+
+OLD = time.time() - 3600
+
+def add_source(pool, name, data=b"image", mtime=OLD):
+    path = pool.source_dir / name
+    path.write_bytes(data)
+    os.utime(path, (mtime, mtime))
+    return path
+
+def add_candidate(pool, source, name, seconds=10, options=None, mtime=None):
+    candidate = pool.pool_dir / pool.source_key(source) / name
+    candidate.mkdir(parents=True)
+    (candidate / READY_FILENAME).write_text(json.dumps(
+        {"source": str(source), "seconds": seconds, "options": options or candidate_options()}))
+    if mtime:
+        os.utime(candidate / READY_FILENAME, (mtime, mtime))
+    return candidate
+
+@pytest.fixture
+def pool(tmp_path):
+    (tmp_path / "IMG").mkdir()
+    return PregenPool(tmp_path / "IMG", tmp_path / "IMG" / ".pool", tmp_path / "puzzles",
+                      per_image=1, max_candidates=2, max_age=24 * 3600, enabled=True)
+
+def test_sources_skip_empty_and_unsettled_files(pool):
+    """업로드가 예약만 한 빈 파일과 막 쓰인 파일은 후보를 만들지 않음"""
+    settled = add_source(pool, "1.jpg")
+    add_source(pool, "2.jpg", data=b"")
+    fresh = add_source(pool, "3.jpg", mtime=time.time())
+    add_source(pool, "1_resized.jpg")
+    assert pool.sources() == [settled]
+    assert set(pool.sources(settle=0)) == {settled, fresh}
+
+def test_fill_once_ignores_reserved_upload(pool, monkeypatch):
+    add_source(pool, "1.jpg", data=b"")
+    add_source(pool, "2.jpg", mtime=time.time())
+    generated = []
+    monkeypatch.setattr(pool, "generate", lambda source, key: generated.append(source) or True)
+    assert not pool.fill_once()
+    assert generated == []
+
+def test_fill_once_generates_for_settled_source(pool, monkeypatch):
+    source = add_source(pool, "1.jpg")
+    generated = []
+    monkeypatch.setattr(pool, "generate", lambda source, key: generated.append(source) or True)
+    assert pool.fill_once()
+    assert generated == [source]
+
+def test_fill_paused_after_activity(pool, monkeypatch):
+    add_source(pool, "1.jpg")
+    monkeypatch.setattr(pool, "generate", lambda source, key: pytest.fail("paused"))
+    pool.notify_activity()
+    assert not pool.fill_once()
+
+def test_take_counts_hits_and_misses(pool):
+    source = add_source(pool, "1.jpg")
+    add_candidate(pool, source, "a", seconds=12)
+    taken = pool.take(source)
+    assert taken is not None and taken.parent.name == ".taken"
+    assert pool.take(source) is None
+    stats = pool.stats()
+    assert (stats["used"], stats["hits"], stats["misses"], stats["used_seconds"]) == (1, 1, 1, 12)
+
+def test_take_discards_candidate_with_stale_options(pool):
+    source = add_source(pool, "1.jpg")
+    add_candidate(pool, source, "a", seconds=7, options={"variants": ["old"]})
+    assert pool.take(source) is None
+    stats = pool.stats()
+    assert (stats["wasted"], stats["wasted_seconds"], stats["misses"]) == (1, 7, 1)
+
+def test_evict_removes_candidates_of_missing_source(pool):
+    source = add_source(pool, "1.jpg")
+    add_candidate(pool, source, "a", seconds=5)
+    source.unlink()
+    assert pool.evict() == 1
+    assert pool.candidates() == []
+    assert pool.stats()["wasted_seconds"] == 5
+
+def test_evict_keeps_candidates_of_source_being_rewritten(pool):
+    """막 수정된 원본도 살아 있는 원본으로 봄 (생성만 미룸)"""
+    source = add_source(pool, "1.jpg")
+    add_candidate(pool, source, "a")
+    os.utime(source, None)
+    assert pool.evict() == 0
+
+def test_evict_enforces_age_and_limits(pool):
+    first, second, third = (add_source(pool, f"{i}.jpg", data=f"image-{i}".encode()) for i in range(3))
+    add_candidate(pool, first, "old", mtime=time.time() - 2 * 24 * 3600)
+    add_candidate(pool, second, "a", mtime=time.time() - 30)
+    add_candidate(pool, second, "b", mtime=time.time() - 20)
+    add_candidate(pool, third, "c", mtime=time.time() - 10)
+    add_candidate(pool, first, "d", mtime=time.time() - 60)
+    # first/old: 오래됨, second/a: 원본당 1개 초과, first/d: 전체 2개 초과 중 가장 오래됨
+    assert pool.evict() == 3
+    assert sorted(c.name for c in pool.candidates()) == ["b", "c"]
+    assert pool.stats()["wasted"] == 3
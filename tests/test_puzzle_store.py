@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from generator.puzzle_store import ScanIndex, iter_puzzle_dirs, migrate, puzzle_path
+from generator.variants import parse_variants, split_variant_id, variant_ids
+
+def write_answer(puzzle_dir, **fields):
+    puzzle_dir.mkdir(parents=True, exist_ok=True)
+    (puzzle_dir / "answer.json").write_text(json.dumps({"total_differences": 3, **fields}))
+
+@pytest.fixture
+def index(tmp_path):
+    (tmp_path / "puzzles").mkdir()
+    (tmp_path / "IMG").mkdir()
+    return ScanIndex(tmp_path / "puzzles")
+
+def test_variant_source_survives_rescan(index, tmp_path):
+    """i5-easy → IMG/i5.png 기록은 다른 ID 때문에 업로드 폴더를 다시 스캔해도 남아 있음"""
+    upload_dir = tmp_path / "IMG"
+    source = upload_dir / "i5.png"
+    source.write_bytes(b"png")
+    index.record_source("i5-easy", source)
+
+    (upload_dir / "i6.jpg").write_bytes(b"jpg")
+    assert index.find_source(upload_dir, "i6") == upload_dir / "i6.jpg"
+    assert index.find_source(upload_dir, "i5-easy") == source
+    assert index.find_source(upload_dir, "i5") == source
+
+def test_recorded_source_dropped_when_file_is_gone(index, tmp_path):
+    upload_dir = tmp_path / "IMG"
+    source = upload_dir / "i5.png"
+    source.write_bytes(b"png")
+    index.record_source("i5-easy", source)
+    source.unlink()
+    assert index.find_source(upload_dir, "i5-easy") is None
+    assert index.connect().execute("SELECT COUNT(*) FROM sources").fetchone()[0] == 0
+
+def test_refresh_reads_only_changed_answers(index, tmp_path):
+    root = tmp_path / "puzzles"
+    write_answer(root / "i1", version="a")
+    write_answer(root / "i2", version="b", variant="easy", base_puzzle="i1")
+    assert index.refresh()["updated"] == ["i1", "i2"]
+    assert index.refresh()["updated"] == []
+
+    write_answer(root / "i1", version="changed-version")
+    (root / "i2" / "answer.json").unlink()
+    result = index.refresh()
+    assert (result["updated"], result["removed"]) == (["i1"], ["i2"])
+    assert index.refresh_puzzle("i1")["version"] == "changed-version"
+    assert index.lookup("i2") is None
+
+def test_sharded_layout_is_found_and_migrated(tmp_path):
+    write_answer(tmp_path / "i1")
+    assert migrate(tmp_path, "sharded") == 1
+    sharded = puzzle_path(tmp_path, "i1", "sharded")
+    assert (sharded / "answer.json").exists()
+    assert dict(iter_puzzle_dirs(tmp_path)) == {"i1": sharded}
+    assert puzzle_path(tmp_path, "i1") == sharded
+
+def test_variant_ids():
+    assert parse_variants("easy:5, medium:7") == [("easy", 5), ("medium", 7)]
+    assert variant_ids("i5", "easy:5") == ["i5-easy"]
+    assert split_variant_id("i5-easy", "easy:5") == ("i5", "easy")
+    assert split_variant_id("my-photo", "easy:5") == ("my-photo", None)
+    with pytest.raises(ValueError):
+        parse_variants("easy:0")
@@ -0,0 +1,54 @@
+import pytest
+
+from scoring import score_play, difference_points, time_bonus, ScoreError, HINT_PENALTY, TIME_LIMIT
+from leaderboard import TopK
+
+ANSWER = {"differences": [{"id": 1, "difficulty": 1}, {"id": 2, "difficulty": 3}, {"id": 3, "difficulty": 5}]}
+
+class GridTester:
+    """x // 100 + 1 이 차이점 ID (x >= 300이면 빗나감)"""
+
+    def hit(self, x, y):
+        return int(x // 100) + 1 if x < 300 else None
+
+def click(x, t):
+    return {"x": x, "y": 0, "t": t}
+
+def test_points_by_difficulty():
+    assert difference_points(ANSWER) == {1: 10, 2: 15, 3: 20}
+
+def test_all_found_gets_time_bonus():
+    result = score_play(ANSWER, GridTester(), [click(10, 5), click(350, 6), click(110, 7), click(210, 9)])
+    assert result["allFound"] and result["wrongClicks"] == 1
+    assert result["timeBonus"] == time_bonus(9) == 18
+    assert result["finalScore"] == 45 + 18
+
+def test_partial_play_with_hints_and_repeat_clicks():
+    result = score_play(ANSWER, GridTester(), [click(10, 5), click(20, 6)], hints_used=1, elapsed_seconds=60)
+    assert result["found"] == {1: 5.0}
+    assert result["timeBonus"] == 0
+    assert result["finalScore"] == 10 - HINT_PENALTY
+
+def test_clicks_after_time_limit_are_ignored():
+    result = score_play(ANSWER, GridTester(), [click(10, 5), click(110, TIME_LIMIT + 1)])
+    assert list(result["found"]) == [1]
+
+@pytest.mark.parametrize("clicks, hints", [
+    ([click(10, 5), click(110, 5.1)], 0),      # 사람이 낼 수 없는 속도
+    ([click(10, 5), click(110, 4)], 0),        # 시간 역순
+    ([{"x": 1}], 0),                           # 형식 오류
+    ([], 3),                                   # 힌트 한도 초과
+])
+def test_rejected_plays(clicks, hints):
+    with pytest.raises(ScoreError):
+        score_play(ANSWER, GridTester(), clicks, hints_used=hints)
+
+def test_topk_keeps_best_per_player():
+    board = TopK(k=3)
+    assert board.add("a", 50, 30, "t1") == 1
+    assert board.add("b", 60, 40, "t2") == 1
+    assert board.add("a", 40, 10, "t3") is None
+    assert board.add("c", 50, 20, "t4") == 2
+    assert board.add("d", 10, 5, "t5") is None
+    assert board.add("a", 70, 50, "t6") == 1
+    assert [(e["rank"], e["player"], e["score"]) for e in board.top()] == [(1, "a", 70), (2, "b", 60), (3, "c", 50)]
@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+class FakeConnection:
+    """next_puzzle_id가 읽는 DB 행 (SELECT id FROM puzzles)"""
+
+    def __init__(self, ids):
+        self.ids = ids
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, args=None):
+        pass
+
+    def fetchall(self):
+        return [{"id": puzzle_id} for puzzle_id in self.ids]
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    import admin_server
+    monkeypatch.setattr(admin_server, "UPLOAD_FOLDER", tmp_path)
+    monkeypatch.setattr(admin_server, "get_db_connection", lambda: FakeConnection(["i1", "i3-easy", "n7"]))
+    return admin_server
+
+def test_next_id_counts_db_rows_variants_and_reserved_files(server, tmp_path):
+    assert server.next_puzzle_id() == "i4"
+    (tmp_path / "i9.jpg").touch()
+    (tmp_path / "i12_resized.jpg").touch()
+    assert server.next_puzzle_id() == "i10"
+
+def test_concurrent_reservations_get_unique_ids(server, tmp_path):
+    """비동기 생성이 DB 행을 만들기 전에 온 업로드들도 서로 다른 ID와 원본 파일을 받음"""
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        reserved = list(pool.map(lambda _: server.reserve_upload_path(".jpg"), range(12)))
+    ids = [puzzle_id for puzzle_id, _ in reserved]
+    assert len(set(ids)) == 12
+    assert sorted(ids, key=lambda p: int(p[1:])) == [f"i{n}" for n in range(4, 16)]
+    for puzzle_id, path in reserved:
+        assert path == tmp_path / f"{puzzle_id}.jpg" and path.exists()
+
+def test_reserved_file_is_not_overwritten(server, tmp_path):
+    puzzle_id, path = server.reserve_upload_path(".png")
+    path.write_bytes(b"first upload")
+    next_id, next_path = server.reserve_upload_path(".png")
+    assert next_id != puzzle_id
+    assert path.read_bytes() == b"first upload"
@@ -0,0 +1,9 @@
+"""
+운영용 WSGI 진입점
+    gunicorn -c gunicorn.conf.py wsgi:app
+워커 프로세스마다 이 모듈을 import 하면서 create_app()이 백그라운드 스레드 시작과 초기 DB 적재 확인을 합니다.
+"""
+
+from admin_server import create_app
+
+app = create_app()